@@ -0,0 +1,80 @@
+"""Small in-process caches used by the API."""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """A thread-safe mapping that evicts the least recently used entry.
+
+    Entries may be given a ``ttl`` in seconds after which they are treated
+    as missing. ``clock`` returns the current time and defaults to
+    :func:`time.time`, so expiry can be compared with JWT ``exp`` claims.
+
+    With ``maxbytes`` the cache is also bounded by the total of
+    ``sizeof(value)`` over its entries; a value larger than ``maxbytes`` on
+    its own is not stored. Setting a key again re-measures its value.
+    """
+
+    def __init__(self, maxsize: int = 128, clock=time.time, maxbytes=None, sizeof=None):
+        self.maxsize = maxsize
+        self.clock = clock
+        self.maxbytes = maxbytes
+        self.sizeof = sizeof or (lambda value: 0)
+        self.nbytes = 0
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _remove(self, key):
+        _, _, size = self._data.pop(key)
+        self.nbytes -= size
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                expires, value, _ = self._data[key]
+            except KeyError:
+                return default
+            if expires is not None and expires <= self.clock():
+                self._remove(key)
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl: float | None = None):
+        expires = None if ttl is None else self.clock() + ttl
+        size = self.sizeof(value)
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            if self.maxbytes is not None and size > self.maxbytes:
+                return
+            self._data[key] = (expires, value, size)
+            self.nbytes += size
+            while len(self._data) > self.maxsize or (
+                self.maxbytes is not None and self.nbytes > self.maxbytes
+            ):
+                self._remove(next(iter(self._data)))
+
+    def pop(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            value = self._data[key][1]
+            self._remove(key)
+        return value
+
+    def discard(self, predicate):
+        """Remove every entry whose key satisfies ``predicate``."""
+        with self._lock:
+            for key in [k for k in self._data if predicate(k)]:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.nbytes = 0
+
+    def __len__(self):
+        return len(self._data)
@@ -1,17 +1,25 @@
 #!/usr/bin/env python3
+import functools
+import io
 import json
+import math
 import os
+import random
+import signal
 import subprocess
-import sqlite3
 import shutil
+import time
 from pathlib import Path
-from jinja2 import Template
 import argparse
+import itertools
 import logging
-from concurrent.futures import ThreadPoolExecutor
+import threading
+from contextlib import contextmanager, nullcontext
+
+from . import compression, db, facts, jsonstream, procfs, scheduler, snapshot, ssh
+from . import state as collect_state
+from .logconfig import configure_logging
 
-level_name = os.environ.get("LOG_LEVEL", "INFO").upper()
-logging.basicConfig(level=getattr(logging, level_name, logging.INFO))
 logger = logging.getLogger(__name__)
 
 DEFAULT_NGINX_PORT = 8080
@@ -30,111 +38,364 @@ RESULTS_DIR = DEFAULT_RESULTS_DIR
 NGINX_CONFIG = DEFAULT_NGINX_CONFIG
 DB_PATH = DEFAULT_DB_PATH
 INVENTORY = DEFAULT_INVENTORY
+SSH_MODE = "probe"
+LOCAL_COLLECTOR = "native"
+ANSIBLE_MODE = "per-host"
+FACT_CACHE = None
+FACT_CACHE_TIMEOUT = 86400
+COMPACT_FACTS = False
+# Also write the binary ``data.snap`` next to ``data.json``.
+SNAPSHOT = False
+# Collection state of incremental runs, ``None`` collects every host fully.
+STATE = None
 
 PLAYBOOK = BASE_DIR / ".." / "ansible" / "collect_facts.yml"
 
+# Collected hosts are written to the database in batches of this many, or
+# after this many seconds, whichever comes first.
+INGEST_BATCH_SIZE = 100
+INGEST_INTERVAL_SECONDS = 1.0
+
+DEFAULT_DAEMON_INTERVAL = 300.0
+DEFAULT_DAEMON_JITTER = 0.1
+
+
+def ansible_env(timeout=None):
+    """Environment for ``ansible-playbook`` runs."""
+    env = os.environ.copy()
+    env["OUTPUT_DIR"] = str(RESULTS_DIR)
+    if timeout is not None:
+        env["ANSIBLE_TASK_TIMEOUT"] = str(math.ceil(timeout))
+    if FACT_CACHE:
+        # Gather facts only when the cached ones are missing or expired.
+        env["ANSIBLE_GATHERING"] = "smart"
+        env["ANSIBLE_CACHE_PLUGIN"] = "jsonfile"
+        env["ANSIBLE_CACHE_PLUGIN_CONNECTION"] = str(FACT_CACHE)
+        env["ANSIBLE_CACHE_PLUGIN_TIMEOUT"] = str(FACT_CACHE_TIMEOUT)
+    return env
+
+
+def _record(host, data, full=True):
+    """Record a collected host in ``STATE``; return whether it changed."""
+    if STATE is None:
+        return True
+    digest = db.serialize_host(data)[1]
+    return STATE.record(host, digest, f"facts_{data['hostname']}.json", full=full)
+
+
+def _run_playbook_batch(hosts, forks, timeout):
+    """Collect ``hosts`` with a single forked ``ansible-playbook`` run.
+
+    Hosts whose facts file was written during the run are reported as
+    successful, all others as failed. Without ``hosts`` every facts file
+    written during the run is reported, plus a result for ``"all"`` if the
+    playbook failed or wrote nothing.
+
+    With ``hosts`` and a ``timeout`` the run is killed once every round of
+    ``forks`` hosts could have used its full timeout; hosts without facts
+    are then reported as timed out.
+    """
+    cmd = ["ansible-playbook", "-i", str(INVENTORY), str(PLAYBOOK)]
+    cmd.extend(["--forks", str(forks)])
+    wall_timeout = None
+    if hosts:
+        cmd.extend(["--limit", ",".join(hosts)])
+        if timeout is not None:
+            rounds = math.ceil(len(hosts) / forks)
+            wall_timeout = rounds * timeout + scheduler.TIMEOUT_GRACE_SECONDS
+    started = time.time()
+    clock = time.monotonic()
+    try:
+        proc = subprocess.run(cmd, env=ansible_env(timeout), timeout=wall_timeout)
+    except subprocess.TimeoutExpired:
+        status = scheduler.TIMEOUT
+        error = f"ansible-playbook did not finish within {wall_timeout:g}s"
+        returncode = None
+    else:
+        # Exit codes 2 and 4 only mean that some hosts failed or were
+        # unreachable.
+        status = scheduler.FAILED
+        returncode = proc.returncode
+        error = f"ansible-playbook exited with status {returncode}"
+    duration = time.monotonic() - clock
+    if not hosts:
+        written = 0
+        for path in RESULTS_DIR.glob("facts_*.json"):
+            result = _written_result(path, None, started, duration)
+            if result is not None:
+                written += 1
+                yield result
+        if returncode != 0 or not written:
+            status = scheduler.OK if returncode == 0 else status
+            yield scheduler.HostResult("all", status, duration, error=error)
+        return
+    for host in hosts:
+        path = RESULTS_DIR / f"facts_{host}.json"
+        result = _written_result(path, host, started, duration)
+        yield result or scheduler.HostResult(host, status, duration, error=error)
+
+
+def _written_result(path, host, started, duration):
+    """Successful result for a facts file written since ``started``."""
+    try:
+        if path.stat().st_mtime < math.floor(started):
+            return None
+        data = read_facts(path)
+    except (OSError, ValueError):
+        return None
+    host = host or data.get("hostname") or path.stem[len("facts_") :]
+    _record(host, data)
+    return scheduler.HostResult(host, scheduler.OK, duration, data=data)
+
+
+def collect_hosts(
+    hosts=None,
+    max_workers=scheduler.DEFAULT_MAX_WORKERS,
+    timeout=scheduler.DEFAULT_HOST_TIMEOUT,
+):
+    """Collect ``hosts`` concurrently and yield each result as it completes.
+
+    Uses the Ansible playbook if available and collects facts over SSH (or
+    locally) otherwise. With ``ANSIBLE_MODE`` ``"batch"`` one playbook run
+    covers all hosts using ``max_workers`` forks. Successful results carry
+    the host's fact document, except for a whole-inventory playbook run.
+    With ``STATE`` set, hosts collected within its TTL are reported as
+    skipped without being contacted.
+    """
+    ansible = shutil.which("ansible-playbook")
+    skipped = []
+    if STATE is not None and (hosts or not ansible):
+        pending = []
+        for host in hosts or ["localhost"]:
+            if STATE.is_fresh(host):
+                skipped.append(scheduler.HostResult(host, scheduler.SKIPPED, 0.0))
+            else:
+                pending.append(host)
+        if not pending:
+            return iter(skipped)
+        hosts = pending
+    return itertools.chain(
+        skipped, _collect_pending(hosts, ansible, max_workers, timeout)
+    )
 
-def run_playbook(hosts=None):
-    """Run the Ansible playbook if available or collect facts locally."""
-    if shutil.which("ansible-playbook"):
-        env = os.environ.copy()
-        env["OUTPUT_DIR"] = str(RESULTS_DIR)
 
-        def run_host(host):
+def _collect_pending(hosts, ansible, max_workers, timeout):
+    if ansible:
+        if ANSIBLE_MODE == "batch":
+            return _run_playbook_batch(hosts, max_workers, timeout)
+        env = ansible_env(timeout)
+
+        def task(host, timeout):
             cmd = ["ansible-playbook", "-i", str(INVENTORY), str(PLAYBOOK)]
-            if host:
+            if host != "all":
                 cmd.extend(["--limit", host])
-            subprocess.run(cmd, check=True, env=env)
+            subprocess.run(cmd, check=True, env=env, timeout=timeout)
+            if host != "all":
+                data = read_facts(RESULTS_DIR / f"facts_{host}.json")
+                _record(host, data)
+                return data
 
-        if hosts:
-            with ThreadPoolExecutor() as exc:
-                exc.map(run_host, hosts)
-        else:
-            run_host(None)
+        default = "all"
     else:
-        logger.info("ansible-playbook not found, collecting local facts only")
-        if hosts:
-            with ThreadPoolExecutor() as exc:
-                exc.map(collect_local_facts, hosts)
-        else:
-            collect_local_facts()
+        logger.info("ansible-playbook not found, collecting facts over SSH")
+        task = collect_local_facts
+        default = "localhost"
+    return scheduler.run_tasks(
+        task, hosts or [default], max_workers=max_workers, timeout=timeout
+    )
 
 
-def collect_local_facts(host=None):
-    """Collect basic host facts locally or via SSH."""
+def run_playbook(
+    hosts=None,
+    max_workers=scheduler.DEFAULT_MAX_WORKERS,
+    timeout=scheduler.DEFAULT_HOST_TIMEOUT,
+):
+    """Collect ``hosts``, storing them in the database as they arrive.
+
+    Results are written in batches of up to :data:`INGEST_BATCH_SIZE` hosts
+    and at least every :data:`INGEST_INTERVAL_SECONDS`, so the API sees new
+    data while slow hosts are still being collected. Returns the
+    :class:`~autoconfig.scheduler.Summary` of the run.
+    """
+    summary = scheduler.Summary()
+    pending = []
+    flushed = time.monotonic()
+    for result in collect_hosts(hosts, max_workers=max_workers, timeout=timeout):
+        summary.add(result)
+        if result.ok and result.data:
+            pending.append(result.data)
+        if pending and (
+            len(pending) >= INGEST_BATCH_SIZE
+            or time.monotonic() - flushed >= INGEST_INTERVAL_SECONDS
+        ):
+            save_to_db(pending, prune=False)
+            pending = []
+            flushed = time.monotonic()
+    if pending:
+        save_to_db(pending, prune=False)
+    if STATE is not None:
+        STATE.save()
+    summary.log()
+    return summary
+
+
+def _run_fact_commands(host=None, timings=None, timeout=None):
+    """Collect the raw fact outputs with one command (or SSH call) each."""
 
     def run_cmd(cmd, shell=False):
         if host and host != "localhost":
-            if shell:
-                remote_cmd = ["ssh", host, cmd]
-            else:
-                remote_cmd = ["ssh", host] + cmd
-            return subprocess.check_output(remote_cmd, text=True)
-        return subprocess.check_output(cmd, text=True, shell=shell)
-
-    hostname = run_cmd(["hostname"]).strip()
-    users = run_cmd(["getent", "passwd"]).splitlines()
+            args = [cmd] if shell else cmd
+            remote_cmd = ssh.ssh_command(host, *args, timings=timings, timeout=timeout)
+            start = time.perf_counter()
+            output = subprocess.check_output(remote_cmd, text=True, timeout=timeout)
+            if timings is not None:
+                timings["command"] = timings.get("command", 0.0) + (
+                    time.perf_counter() - start
+                )
+            return output
+        return subprocess.check_output(cmd, text=True, shell=shell, timeout=timeout)
+
+    outputs = {
+        "hostname": run_cmd(["hostname"]),
+        "users": run_cmd(["getent", "passwd"]),
+    }
     try:
-        ports = run_cmd(["ss", "-tulwn"]).splitlines()
+        outputs["ports"] = run_cmd(["ss", "-tulwn"])
     except FileNotFoundError:
-        ports = []
-    disk = run_cmd(
+        outputs["ports"] = ""
+    outputs["disk"] = run_cmd(
         "df -h --output=size,used,avail,pcent / | tail -n 1", shell=True
-    ).strip()
-    memory = run_cmd("free -m | grep 'Mem:'", shell=True).strip()
-    cpu_load = run_cmd(["cat", "/proc/loadavg"]).strip()
-
-    net_stats = run_cmd(["cat", "/proc/net/dev"]).splitlines()
-
+    )
+    outputs["memory"] = run_cmd("free -m | grep 'Mem:'", shell=True)
+    outputs["cpu_load"] = run_cmd(["cat", "/proc/loadavg"])
+    outputs["net"] = run_cmd(["cat", "/proc/net/dev"])
     try:
-        sensors_out = run_cmd(["sensors"]).splitlines()
+        outputs["sensors"] = run_cmd(["sensors"])
     except FileNotFoundError:
-        sensors_out = []
+        outputs["sensors"] = ""
+    return outputs
+
+
+def read_facts(path):
+    """Load a ``facts_*.json`` file and add its typed fields."""
+    with open(path, "r") as f:
+        return facts.normalize(json.load(f), compact=COMPACT_FACTS)
+
+
+# How the raw output of each section is stored in the fact document.
+SECTION_SHAPES = {
+    "hostname": str.strip,
+    "users": str.splitlines,
+    "ports": str.splitlines,
+    "disk": str.strip,
+    "memory": str.strip,
+    "cpu_load": str.strip,
+    "net": str.splitlines,
+    "sensors": str.splitlines,
+}
+
+
+def facts_from_outputs(outputs, previous=None):
+    """Shape raw command outputs into the fact document.
+
+    Sections missing from ``outputs`` are taken from the ``previous``
+    document of the host.
+    """
+    data = dict(previous or {})
+    for name, shape in SECTION_SHAPES.items():
+        if name in outputs:
+            data[name] = shape(outputs[name])
+    return facts.normalize(data, compact=COMPACT_FACTS)
+
+
+def collect_local_facts(host=None, timeout=None):
+    """Collect basic host facts locally or via SSH.
+
+    Remote hosts are probed in a single SSH session unless ``SSH_MODE`` is
+    ``"per-command"``. The local host is read from ``/proc`` directly unless
+    ``LOCAL_COLLECTOR`` is ``"commands"``. The facts are written to
+    ``facts_<hostname>.json`` and returned.
+
+    With ``STATE`` set only the volatile sections are collected while the
+    stable ones are recent, and an unchanged document is not rewritten.
+    """
+    key = host or "localhost"
+    sections = previous = None
+    if STATE is not None:
+        sections = STATE.sections(key)
+        if sections is not None:
+            try:
+                previous = read_facts(RESULTS_DIR / STATE.get(key)["file"])
+            except (OSError, ValueError):
+                sections = None
+
+    timings = {}
+    remote = host and host != "localhost"
+    if remote and SSH_MODE == "probe":
+        outputs = ssh.run_probe(
+            host, sections=sections, timeout=timeout, timings=timings
+        )
+    elif not remote and LOCAL_COLLECTOR == "native" and procfs.available():
+        outputs = procfs.collect_outputs(sections)
+    else:
+        sections = None
+        outputs = _run_fact_commands(host, timings=timings, timeout=timeout)
+    if timings:
+        logger.info(
+            "%s: SSH handshake %.3fs, commands %.3fs",
+            host,
+            timings.get("handshake", 0.0),
+            timings.get("command", 0.0),
+        )
+    data = facts_from_outputs(outputs, previous if sections else None)
+
+    path = RESULTS_DIR / f"facts_{data['hostname']}.json"
+    if _record(key, data, full=sections is None) or not path.exists():
+        RESULTS_DIR.mkdir(exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2)
+    return data
 
-    RESULTS_DIR.mkdir(exist_ok=True)
-    data = {
-        "hostname": hostname,
-        "users": users,
-        "ports": ports,
-        "disk": disk,
-        "memory": memory,
-        "cpu_load": cpu_load,
-        "net": net_stats,
-        "sensors": sensors_out,
-    }
-    with open(RESULTS_DIR / f"facts_{hostname}.json", "w") as f:
-        json.dump(data, f, indent=2)
+
+def iter_results():
+    """Yield the fact document of every ``facts_*.json`` file in turn."""
+    for path in sorted(RESULTS_DIR.glob("facts_*.json")):
+        yield read_facts(path)
 
 
 def load_results():
-    hosts = []
-    for path in RESULTS_DIR.glob("facts_*.json"):
-        with open(path, "r") as f:
-            data = json.load(f)
-            hosts.append(data)
-    return hosts
-
-
-def save_to_db(hosts):
-    """Store hosts data in a small SQLite database for the API."""
-    with sqlite3.connect(DB_PATH) as conn:
-        cur = conn.cursor()
-        cur.execute(
-            "CREATE TABLE IF NOT EXISTS hosts (hostname TEXT PRIMARY KEY, data TEXT)"
-        )
-        cur.execute("DELETE FROM hosts")
-        for h in hosts:
-            cur.execute(
-                "INSERT OR REPLACE INTO hosts(hostname, data) VALUES(?, ?)",
-                (h.get("hostname"), json.dumps(h)),
-            )
+    return list(iter_results())
+
+
+def save_to_db(hosts, prune=True):
+    """Store hosts data in a small SQLite database for the API.
+
+    With ``prune`` the database is made to match ``hosts`` exactly;
+    otherwise the hosts are only added or updated. ``hosts`` may be a slow
+    generator reading and writing files, so every batch is committed on its
+    own and other writers only wait for a single batch.
+    """
+    with db.connect(DB_PATH) as conn:
+        db.init_hosts_schema(conn)
+        stats = db.sync_hosts(conn, hosts, prune=prune, commit_batches=True)
+    if not prune:
+        return stats
+    logger.info(
+        "Database updated: %(added)d added, %(changed)d changed, "
+        "%(removed)d removed",
+        stats,
+    )
+    return stats
 
 
-with open(HTML_TEMPLATE_PATH, "r") as f:
-    HTML_TEMPLATE = Template(f.read())
+@functools.cache
+def load_template(path):
+    """Compile the Jinja template at ``path`` once, on first use."""
+    # Imported here so runs that never render do not pay for Jinja.
+    from jinja2 import Template
 
-with open(NGINX_TEMPLATE_PATH, "r") as f:
-    NGINX_TEMPLATE = Template(f.read())
+    with open(path, "r") as f:
+        return Template(f.read())
 
 
 def parse_args():
@@ -165,33 +426,258 @@ def parse_args():
         action="store_true",
         help="collect data only and do not launch nginx",
     )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="keep running and collect every --interval seconds, writing "
+        "hosts straight into the database instead of generating a report",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=DEFAULT_DAEMON_INTERVAL,
+        help="seconds between collections in daemon mode",
+    )
+    parser.add_argument(
+        "--jitter",
+        type=float,
+        default=DEFAULT_DAEMON_JITTER,
+        help="fraction by which daemon intervals are randomly varied",
+    )
+    parser.add_argument(
+        "--write-site",
+        action="store_true",
+        help="in daemon mode, also rewrite index.html and data.json after "
+        "every collection",
+    )
     parser.add_argument(
         "--hosts",
         type=lambda s: s.split(","),
         help="comma separated list of hosts to process in parallel",
     )
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=scheduler.DEFAULT_MAX_WORKERS,
+        help="maximum number of hosts collected concurrently",
+    )
+    parser.add_argument(
+        "--host-timeout",
+        type=float,
+        default=scheduler.DEFAULT_HOST_TIMEOUT,
+        help="seconds after which a single host's collection is abandoned",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="skip hosts collected within --ttl, refresh users and ports only "
+        "every --stable-ttl and leave unchanged facts files alone",
+    )
+    parser.add_argument(
+        "--ttl",
+        type=float,
+        default=collect_state.DEFAULT_TTL,
+        help="seconds an incrementally collected host stays fresh",
+    )
+    parser.add_argument(
+        "--stable-ttl",
+        type=float,
+        default=collect_state.DEFAULT_STABLE_TTL,
+        help="seconds between collections of the users and ports sections",
+    )
+    parser.add_argument(
+        "--ansible-mode",
+        choices=["batch", "per-host"],
+        default="per-host",
+        help="run one ansible-playbook process per host (per-host) or one over "
+        "all hosts with --max-workers forks (batch)",
+    )
+    parser.add_argument(
+        "--fact-cache",
+        help="directory for Ansible's jsonfile fact cache; facts are only "
+        "gathered when missing or expired",
+    )
+    parser.add_argument(
+        "--fact-cache-timeout",
+        type=int,
+        default=FACT_CACHE_TIMEOUT,
+        help="seconds cached Ansible facts stay valid",
+    )
+    parser.add_argument(
+        "--ssh-mode",
+        choices=["probe", "per-command"],
+        default="probe",
+        help="without Ansible, collect each remote host in one SSH session "
+        "(probe) or with one SSH call per fact (per-command)",
+    )
+    parser.add_argument(
+        "--local-collector",
+        choices=["native", "commands"],
+        default="native",
+        help="read local facts from /proc directly (native) or by running "
+        "the same commands as for remote hosts (commands)",
+    )
+    parser.add_argument(
+        "--compact-facts",
+        action="store_true",
+        help="store only the parsed numeric facts and drop the raw command "
+        "output for load, memory, disk, network and ports",
+    )
+    parser.add_argument(
+        "--snapshot",
+        action="store_true",
+        help="also write data.snap, a memory-mappable binary copy of "
+        "data.json that the API loads faster",
+    )
+    parser.add_argument(
+        "--no-ssh-multiplex",
+        dest="ssh_multiplex",
+        action="store_false",
+        help="open a new SSH connection for every session instead of reusing "
+        "a persistent ControlMaster connection per host",
+    )
+    parser.add_argument(
+        "--ssh-control-dir",
+        default=str(ssh.DEFAULT_CONTROL_DIR),
+        help="directory for SSH ControlMaster sockets, shared between runs",
+    )
+    parser.add_argument(
+        "--ssh-persist",
+        type=int,
+        default=ssh.CONTROL_PERSIST_SECONDS,
+        help="seconds an idle SSH master connection stays open",
+    )
+    parser.add_argument(
+        "--ssh-max-masters",
+        type=int,
+        default=ssh.MAX_MASTERS,
+        help="maximum number of SSH master connections kept open",
+    )
     return parser.parse_args()
 
 
-def generate_site(hosts):
-    """Generate the React web site and JSON data."""
-    html = HTML_TEMPLATE.render()
+def write_index():
+    """Render ``index.html`` and its gzip copy."""
     output_file = RESULTS_DIR / "index.html"
     with open(output_file, "w") as f:
-        f.write(html)
+        f.write(load_template(HTML_TEMPLATE_PATH).render())
+    # Precompressed copies served by nginx ``gzip_static``.
+    compression.write_gzip_copy(output_file)
+    return output_file
+
+
+@contextmanager
+def data_json_writer():
+    """Stream hosts into ``data.json`` and ``data.json.gz`` in one pass.
 
+    Yields a :class:`~autoconfig.jsonstream.ArrayWriter`. Both files are
+    written under temporary names and replace the old ones only once the
+    block completes, so readers never see a partial file.
+    """
     data_file = RESULTS_DIR / "data.json"
-    with open(data_file, "w") as f:
-        json.dump(hosts, f, indent=2)
+    gz_file = RESULTS_DIR / "data.json.gz"
+    tmp = data_file.with_name(".data.json.tmp")
+    tmp_gz = gz_file.with_name(".data.json.gz.tmp")
+    try:
+        with open(tmp, "w") as f, open(tmp_gz, "wb") as raw:
+            with io.TextIOWrapper(compression.gzip_file(raw), encoding="utf-8") as gz:
+                writer = jsonstream.ArrayWriter(f, gz)
+                yield writer
+                writer.close()
+        os.replace(tmp, data_file)
+        os.replace(tmp_gz, gz_file)
+    finally:
+        tmp.unlink(missing_ok=True)
+        tmp_gz.unlink(missing_ok=True)
+
+
+def write_data(hosts):
+    """Write ``hosts`` to ``data.json`` and yield each one on.
+
+    With ``SNAPSHOT`` the binary snapshot is written in the same pass. It
+    is replaced after ``data.json`` so the API sees it as current.
+    """
+    snap = (
+        snapshot.SnapshotWriter(RESULTS_DIR / snapshot.SNAPSHOT_FILE)
+        if SNAPSHOT
+        else nullcontext()
+    )
+    with snap, data_json_writer() as writer:
+        hosts = writer.tee(hosts)
+        yield from snap.tee(hosts) if SNAPSHOT else hosts
+
 
-    save_to_db(hosts)
+def write_site(hosts):
+    """Write the React web site and ``data.json`` with gzip copies."""
+    output_file = write_index()
+    for _ in write_data(hosts):
+        pass
+    return output_file
 
+
+def generate_site(hosts):
+    """Generate the web site and ``data.json`` and sync the database.
+
+    ``hosts`` may be a generator such as :func:`iter_results`: each document
+    is written to ``data.json`` as the database sync consumes it, so the
+    fleet is read once and never held in memory as a whole.
+    """
+    output_file = write_index()
+    save_to_db(write_data(hosts))
     logger.info("Report written to %s", output_file)
 
 
+def next_delay(interval, jitter=DEFAULT_DAEMON_JITTER, rng=random.random):
+    """Seconds until the next cycle: ``interval`` randomized by ``jitter``.
+
+    Collectors started at the same time drift apart instead of hitting the
+    fleet and the database in lockstep.
+    """
+    return max(0.0, interval * (1 + jitter * (2 * rng() - 1)))
+
+
+def run_daemon(
+    hosts=None,
+    interval=DEFAULT_DAEMON_INTERVAL,
+    jitter=DEFAULT_DAEMON_JITTER,
+    max_workers=scheduler.DEFAULT_MAX_WORKERS,
+    timeout=scheduler.DEFAULT_HOST_TIMEOUT,
+    site=False,
+    stop=None,
+    cycles=None,
+):
+    """Collect ``hosts`` every ``interval`` seconds until ``stop`` is set.
+
+    Each cycle ingests hosts straight into the database as they arrive; the
+    data generation bump tells a running API to serve the new data without
+    ``/api/reload``. With ``site`` the web site and ``data.json`` are
+    rewritten after every cycle. ``cycles`` limits the number of runs.
+    """
+    stop = stop or threading.Event()
+    # Start at a random point of the first interval as well.
+    delay = interval * jitter * random.random()
+    count = 0
+    while not stop.wait(delay):
+        started = time.monotonic()
+        try:
+            run_playbook(hosts, max_workers=max_workers, timeout=timeout)
+            if site:
+                write_site(iter_results())
+        except Exception:
+            logger.exception("Collection cycle failed")
+        count += 1
+        if cycles is not None and count >= cycles:
+            break
+        elapsed = time.monotonic() - started
+        delay = max(0.0, next_delay(interval, jitter) - elapsed)
+        logger.info("Next collection in %.0fs", delay)
+    return count
+
+
 def generate_nginx_config(port=DEFAULT_NGINX_PORT):
     """Create an nginx config to serve the results directory."""
-    config_text = NGINX_TEMPLATE.render(port=port, root=RESULTS_DIR)
+    template = load_template(NGINX_TEMPLATE_PATH)
+    config_text = template.render(port=port, root=RESULTS_DIR)
     with open(NGINX_CONFIG, "w") as f:
         f.write(config_text)
     return NGINX_CONFIG
@@ -219,18 +705,62 @@ def start_nginx(config_path):
 
 
 def main():
+    configure_logging()
     args = parse_args()
 
-    global RESULTS_DIR, DB_PATH, NGINX_CONFIG, INVENTORY
+    global RESULTS_DIR, DB_PATH, NGINX_CONFIG, INVENTORY, SSH_MODE, LOCAL_COLLECTOR
+    global ANSIBLE_MODE, FACT_CACHE, FACT_CACHE_TIMEOUT, COMPACT_FACTS, STATE
+    global SNAPSHOT
     RESULTS_DIR = Path(args.output_dir)
     INVENTORY = Path(args.inventory)
+    SSH_MODE = args.ssh_mode
+    LOCAL_COLLECTOR = args.local_collector
+    ANSIBLE_MODE = args.ansible_mode
+    FACT_CACHE = Path(args.fact_cache) if args.fact_cache else None
+    FACT_CACHE_TIMEOUT = args.fact_cache_timeout
+    COMPACT_FACTS = args.compact_facts
+    SNAPSHOT = args.snapshot
+    ssh.MASTERS = (
+        ssh.MasterPool(
+            args.ssh_control_dir,
+            max_masters=args.ssh_max_masters,
+            persist=args.ssh_persist,
+        )
+        if args.ssh_multiplex
+        else None
+    )
     DB_PATH = RESULTS_DIR / "data.db"
     NGINX_CONFIG = RESULTS_DIR / "nginx.conf"
 
     RESULTS_DIR.mkdir(exist_ok=True)
-    run_playbook(hosts=args.hosts)
-    hosts = load_results()
-    generate_site(hosts)
+    STATE = (
+        collect_state.CollectionState(
+            RESULTS_DIR / collect_state.STATE_FILE,
+            ttl=args.ttl,
+            stable_ttl=args.stable_ttl,
+        )
+        if args.incremental
+        else None
+    )
+    if args.daemon:
+        stop = threading.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: stop.set())
+        logger.info("Collecting every %gs until interrupted", args.interval)
+        run_daemon(
+            hosts=args.hosts,
+            interval=args.interval,
+            jitter=args.jitter,
+            max_workers=args.max_workers,
+            timeout=args.host_timeout,
+            site=args.write_site,
+            stop=stop,
+        )
+        return
+    run_playbook(
+        hosts=args.hosts, max_workers=args.max_workers, timeout=args.host_timeout
+    )
+    generate_site(iter_results())
     cfg = generate_nginx_config(port=args.port)
     logger.info("nginx configuration written to %s", cfg)
     if args.skip_nginx:
@@ -0,0 +1,61 @@
+"""HTTP content encodings for API responses and static report files.
+
+``gzip`` is always available. ``br`` and ``zstd`` are offered when the
+optional ``brotli`` and ``zstandard`` packages are installed.
+"""
+
+import gzip
+import shutil
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+# Responses smaller than this are not worth the CPU and header overhead.
+MIN_SIZE = 1024
+
+
+def _gzip(body: bytes) -> bytes:
+    return gzip.compress(body, compresslevel=6, mtime=0)
+
+
+ENCODERS = {"gzip": _gzip}
+if brotli is not None:
+    ENCODERS["br"] = lambda body: brotli.compress(body, quality=5)
+if zstandard is not None:
+    ENCODERS["zstd"] = lambda body: zstandard.ZstdCompressor(level=3).compress(body)
+
+# Server preference when the client accepts several encodings equally.
+PREFERENCE = tuple(e for e in ("zstd", "br", "gzip") if e in ENCODERS)
+
+
+def choose_encoding(accept) -> str | None:
+    """Pick the best supported encoding from a werkzeug ``Accept`` object."""
+    best, best_quality = None, 0
+    for encoding in PREFERENCE:
+        quality = accept.quality(encoding)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def encode(body: bytes, encoding: str) -> bytes:
+    return ENCODERS[encoding](body)
+
+
+def gzip_file(raw):
+    """Wrap binary file ``raw`` for writing a reproducible static gzip copy."""
+    return gzip.GzipFile(filename="", mode="wb", compresslevel=9, fileobj=raw, mtime=0)
+
+
+def write_gzip_copy(path):
+    """Write ``<path>.gz`` next to ``path`` for nginx ``gzip_static``."""
+    with open(path, "rb") as src, open(f"{path}.gz", "wb") as raw:
+        with gzip_file(raw) as dst:
+            shutil.copyfileobj(src, dst)
@@ -0,0 +1,413 @@
+"""SQLite connection management shared by the API and the collector."""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import NamedTuple
+
+from . import facts, history
+
+logger = logging.getLogger(__name__)
+
+POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "8"))
+BUSY_TIMEOUT_SECONDS = 5.0
+# ``sqlite3`` keeps an LRU of compiled statements per connection. Long lived
+# pooled connections make that cache effective, so give it some headroom.
+STATEMENT_CACHE_SIZE = 256
+
+PRAGMAS = (
+    # Readers no longer block on ``/api/reload`` and vice versa.
+    "PRAGMA journal_mode=WAL",
+    # Durable enough in WAL mode and avoids an fsync per transaction.
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA mmap_size=268435456",
+    # Negative values are KiB: keep up to 16 MiB of pages per connection.
+    "PRAGMA cache_size=-16384",
+    "PRAGMA temp_store=MEMORY",
+)
+
+
+def open_connection(path) -> sqlite3.Connection:
+    """Open a tuned connection to ``path``."""
+    conn = sqlite3.connect(
+        str(path),
+        timeout=BUSY_TIMEOUT_SECONDS,
+        check_same_thread=False,
+        cached_statements=STATEMENT_CACHE_SIZE,
+    )
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+class ConnectionPool:
+    """A small LIFO pool of connections to a single database file.
+
+    Connections are handed to one thread at a time, so they are opened with
+    ``check_same_thread=False`` and returned to the pool after use. At most
+    ``size`` idle connections are kept; extra ones are closed.
+    """
+
+    def __init__(self, path, size: int = POOL_SIZE):
+        self.path = str(path)
+        self.size = size
+        self._idle: list[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection and run the block in a transaction."""
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            conn = open_connection(self.path)
+        try:
+            with conn:
+                yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            with self._lock:
+                if len(self._idle) < self.size:
+                    self._idle.append(conn)
+                    conn = None
+            if conn is not None:
+                conn.close()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+_pools: dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(path) -> ConnectionPool:
+    """Return the shared pool for ``path``, creating it on first use."""
+    key = str(Path(path))
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = _pools[key] = ConnectionPool(key)
+    return pool
+
+
+@contextmanager
+def connect(path):
+    """Context manager yielding a pooled connection to ``path``.
+
+    The block runs inside a transaction which is committed on success and
+    rolled back if an exception escapes, mirroring ``with sqlite3.connect()``.
+    """
+    with get_pool(path).connection() as conn:
+        yield conn
+
+
+def close_all():
+    """Close every idle pooled connection."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+# Where a host row came from. A full sync only prunes rows of its own
+# source, so hosts pushed to the API survive reloads of ``data.json``.
+SOURCE_FILE = "file"
+SOURCE_PUSH = "push"
+
+# Columns of ``hosts`` besides the primary key and the JSON document.
+EXTRA_COLUMNS = {
+    "content_hash": "TEXT",
+    **facts.METRIC_COLUMNS,
+    "source": f"TEXT NOT NULL DEFAULT '{SOURCE_FILE}'",
+}
+HOST_COLUMNS = ("hostname", "data") + tuple(EXTRA_COLUMNS)
+UPSERT_HOST_SQL = (
+    "INSERT INTO hosts({}) VALUES({}) ON CONFLICT(hostname) DO UPDATE SET {}"
+).format(
+    ", ".join(HOST_COLUMNS),
+    ", ".join("?" * len(HOST_COLUMNS)),
+    ", ".join(f"{c} = excluded.{c}" for c in HOST_COLUMNS[1:]),
+)
+DELETE_SEARCH_SQL = (
+    "DELETE FROM hosts_fts WHERE rowid = (SELECT rowid FROM hosts WHERE hostname = ?)"
+)
+INSERT_SEARCH_SQL = (
+    "INSERT INTO hosts_fts(rowid, name, users, ports) "
+    "SELECT rowid, hostname, ?, ? FROM hosts WHERE hostname = ?"
+)
+# Number of host documents hashed and written per ``executemany`` call.
+BATCH_SIZE = 500
+
+
+def init_hosts_schema(conn):
+    """Create the ``hosts`` table and upgrade older databases in place."""
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS hosts (hostname TEXT PRIMARY KEY, data TEXT)"
+    )
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(hosts)")}
+    added = False
+    for column, sql_type in EXTRA_COLUMNS.items():
+        if column not in existing:
+            conn.execute(f"ALTER TABLE hosts ADD COLUMN {column} {sql_type}")
+            added = True
+    for column in facts.METRIC_COLUMNS:
+        conn.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_hosts_{column} "
+            f"ON hosts({column}, hostname)"
+        )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS generation ("
+        "id INTEGER PRIMARY KEY CHECK (id = 1), "
+        "value INTEGER NOT NULL, updated_at REAL NOT NULL)"
+    )
+    conn.execute(
+        "INSERT OR IGNORE INTO generation(id, value, updated_at) VALUES(1, 0, ?)",
+        (time.time(),),
+    )
+    if added:
+        rows = conn.execute("SELECT data, source FROM hosts").fetchall()
+        conn.executemany(
+            UPSERT_HOST_SQL,
+            (host_row(json.loads(data), source=source) for data, source in rows),
+        )
+    init_search_schema(conn)
+    history.init_schema(conn)
+
+
+def init_search_schema(conn):
+    """Create the FTS5 index over hostnames, user names and ports.
+
+    The index is optional: if SQLite was built without FTS5 a warning is
+    logged and :func:`has_search_index` reports ``False``.
+    """
+    if has_search_index(conn):
+        return
+    try:
+        conn.execute(
+            "CREATE VIRTUAL TABLE hosts_fts USING fts5("
+            "name, users, ports, tokenize = \"unicode61 tokenchars '_'\")"
+        )
+    except sqlite3.OperationalError as exc:
+        logger.warning("Full-text host search disabled: %s", exc)
+        return
+    conn.execute(
+        "CREATE TRIGGER IF NOT EXISTS hosts_fts_delete AFTER DELETE ON hosts "
+        "BEGIN DELETE FROM hosts_fts WHERE rowid = old.rowid; END"
+    )
+    rows = conn.execute("SELECT data FROM hosts").fetchall()
+    conn.executemany(INSERT_SEARCH_SQL, (search_row(json.loads(r[0])) for r in rows))
+
+
+def has_search_index(conn) -> bool:
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'hosts_fts'"
+    ).fetchone()
+    return row is not None
+
+
+def search_row(host):
+    """Return the ``hosts_fts`` values for a host document."""
+    sockets = host.get("sockets")
+    if not isinstance(sockets, list):
+        sockets = facts.parse_ss(host.get("ports"))
+    ports = {str(s["port"]) for s in sockets if isinstance(s, dict) and s.get("port")}
+    return (
+        " ".join(facts.parse_usernames(host.get("users"))),
+        " ".join(sorted(ports, key=int)),
+        host.get("hostname"),
+    )
+
+
+def serialize_host(host):
+    """Return the canonical JSON text of a host and its content hash."""
+    data = json.dumps(host, sort_keys=True, separators=(",", ":"))
+    digest = hashlib.blake2b(data.encode(), digest_size=16).hexdigest()
+    return data, digest
+
+
+class SerializedHost(NamedTuple):
+    """A host document already in the canonical form of :func:`serialize_host`.
+
+    :func:`sync_hosts` compares ``digest`` with the stored hash and only
+    parses ``data`` when the host was added or changed.
+    """
+
+    hostname: str
+    data: str
+    digest: str
+
+
+def host_row(host, data=None, digest=None, source=SOURCE_FILE):
+    """Return the ``hosts`` row values for a host document."""
+    if data is None:
+        data, digest = serialize_host(host)
+    metrics = facts.host_metrics(host)
+    return (
+        (host.get("hostname"), data, digest)
+        + tuple(metrics[c] for c in facts.METRIC_COLUMNS)
+        + (source,)
+    )
+
+
+def get_generation(conn):
+    """Return ``(generation, updated_at)`` of the host data."""
+    row = conn.execute("SELECT value, updated_at FROM generation").fetchone()
+    return (row[0], row[1]) if row else (0, 0.0)
+
+
+def bump_generation(conn) -> int:
+    """Record that the host data changed and return the new generation."""
+    conn.execute(
+        "UPDATE generation SET value = value + 1, updated_at = ? WHERE id = 1",
+        (time.time(),),
+    )
+    return get_generation(conn)[0]
+
+
+def _batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+@contextmanager
+def _checkpoints_deferred(conn, enabled=True):
+    """Suspend WAL auto-checkpoints of ``conn`` for the block.
+
+    Committing in batches would otherwise checkpoint after nearly every
+    commit and copy the same index pages into the database again and again;
+    the first commit after the block checkpoints the whole WAL once.
+    """
+    if not enabled:
+        yield
+        return
+    pages = conn.execute("PRAGMA wal_autocheckpoint").fetchone()[0]
+    conn.execute("PRAGMA wal_autocheckpoint=0")
+    try:
+        yield
+    finally:
+        conn.execute(f"PRAGMA wal_autocheckpoint={pages}")
+
+
+def sync_hosts(
+    conn,
+    hosts,
+    batch_size: int = BATCH_SIZE,
+    prune: bool = True,
+    source: str = SOURCE_FILE,
+    commit_batches: bool = False,
+):
+    """Make the ``hosts`` table match ``hosts`` touching only changed rows.
+
+    ``hosts`` may be any iterable, including a generator streaming documents
+    from disk: it is consumed in batches of ``batch_size`` so memory use does
+    not grow with the fleet. Each document is hashed and compared with the
+    stored ``content_hash``; new and modified hosts are upserted with
+    ``executemany``; :class:`SerializedHost` items skip serializing and are
+    only parsed when they changed. Rows are tagged with ``source``; a host
+    stored from another source is rewritten even if its content matches.
+    With ``prune`` hosts of the same ``source`` missing from ``hosts`` are
+    deleted afterwards. Run inside one transaction, readers either see the old or
+    the new fleet, never an empty table. With ``commit_batches`` every batch
+    is committed on its own instead, so the write lock is not held while the
+    next batch is read from a slow source; readers may then see a partly
+    updated fleet, but hosts are only pruned, and the generation bumped, in
+    the final transaction. The metrics of added and changed hosts are
+    recorded as :mod:`~autoconfig.history` samples. Returns the number of
+    ``added``, ``changed`` and ``removed`` rows and bumps the generation if
+    any.
+    """
+    now = time.time()
+    search = has_search_index(conn)
+    if prune:
+        conn.execute(
+            "CREATE TEMP TABLE IF NOT EXISTS sync_seen (hostname TEXT PRIMARY KEY)"
+        )
+        conn.execute("DELETE FROM sync_seen")
+    if commit_batches:
+        conn.commit()
+    added = changed = removed = 0
+    with _checkpoints_deferred(conn, commit_batches):
+        for batch in _batches(hosts, batch_size):
+            documents = {}
+            for host in batch:
+                if isinstance(host, SerializedHost):
+                    hostname = host.hostname
+                elif isinstance(host, dict):
+                    hostname = host.get("hostname")
+                else:
+                    hostname = None
+                if not isinstance(hostname, str) or not hostname:
+                    logger.warning("Skipping host document without hostname")
+                    continue
+                documents[hostname] = host
+            names = list(documents)
+            placeholders = ", ".join("?" * len(names))
+            existing = {
+                hostname: (digest, row_source)
+                for hostname, digest, row_source in conn.execute(
+                    "SELECT hostname, content_hash, source FROM hosts "
+                    f"WHERE hostname IN ({placeholders})",
+                    names,
+                )
+            }
+            rows = []
+            search_rows = []
+            for hostname, host in documents.items():
+                if isinstance(host, SerializedHost):
+                    data, digest = host.data, host.digest
+                else:
+                    data, digest = serialize_host(host)
+                if hostname not in existing:
+                    added += 1
+                elif existing[hostname] != (digest, source):
+                    changed += 1
+                else:
+                    continue
+                if isinstance(host, SerializedHost):
+                    host = json.loads(data)
+                rows.append(host_row(host, data, digest, source))
+                if search:
+                    search_rows.append(search_row(host))
+            conn.executemany(UPSERT_HOST_SQL, rows)
+            history.record(conn, ((r[0], r[3:-1]) for r in rows), now)
+            if search_rows:
+                conn.executemany(DELETE_SEARCH_SQL, ((r[2],) for r in search_rows))
+                conn.executemany(INSERT_SEARCH_SQL, search_rows)
+            if prune:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO sync_seen(hostname) VALUES(?)",
+                    ((name,) for name in names),
+                )
+            if commit_batches:
+                conn.commit()
+    if prune:
+        removed = conn.execute(
+            "DELETE FROM hosts WHERE source = ? "
+            "AND hostname NOT IN (SELECT hostname FROM sync_seen)",
+            (source,),
+        ).rowcount
+        conn.execute("DELETE FROM sync_seen")
+    if added or changed or removed:
+        history.maintain(conn, now)
+        bump_generation(conn)
+    return {"added": added, "changed": changed, "removed": removed}
@@ -0,0 +1,114 @@
+"""Change notifications for Server-Sent Event streams.
+
+One :class:`GenerationWatcher` per database polls the data generation in a
+single background thread and wakes every waiting stream through a shared
+condition. Open streams therefore cost no database work of their own; under
+a cooperative server (e.g. gunicorn with gevent workers) they are cheap
+greenlets instead of blocked worker threads.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+from . import db
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL_SECONDS = 1.0
+
+
+class GenerationWatcher:
+    """Track the generation of one database and notify subscribers."""
+
+    def __init__(self, path, interval: float = POLL_INTERVAL_SECONDS):
+        self.path = path
+        self.interval = interval
+        self.generation = None
+        self.updated_at = None
+        self._cond = threading.Condition()
+        self._wakeup = threading.Event()
+        self._subscribers = 0
+        self._thread = None
+
+    def _poll(self):
+        try:
+            with db.connect(self.path) as conn:
+                generation, updated_at = db.get_generation(conn)
+        except sqlite3.Error:
+            logger.exception("Failed to read data generation")
+            return
+        with self._cond:
+            if generation != self.generation:
+                self.generation, self.updated_at = generation, updated_at
+                self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            self._poll()
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            with self._cond:
+                if not self._subscribers:
+                    self._thread = None
+                    return
+
+    @contextmanager
+    def subscribe(self):
+        """Register a stream for the duration of the block."""
+        with self._cond:
+            self._subscribers += 1
+            if self._thread is None:
+                # The last value may be stale; wait for a fresh poll.
+                self.generation = None
+                self._thread = threading.Thread(
+                    target=self._run, name="generation-watcher", daemon=True
+                )
+                self._thread.start()
+        try:
+            yield self
+        finally:
+            with self._cond:
+                self._subscribers -= 1
+
+    def check_now(self):
+        """Poll immediately, e.g. right after this process changed data."""
+        self._wakeup.set()
+
+    def wait(self, known, timeout: float):
+        """Wait until the generation differs from ``known``.
+
+        Returns the current generation, which equals ``known`` on timeout.
+        """
+        with self._cond:
+            self._cond.wait_for(
+                lambda: self.generation is not None and self.generation != known,
+                timeout,
+            )
+            return self.generation
+
+
+_watchers: dict[str, GenerationWatcher] = {}
+_watchers_lock = threading.Lock()
+
+
+def get_watcher(path) -> GenerationWatcher:
+    key = str(Path(path))
+    with _watchers_lock:
+        watcher = _watchers.get(key)
+        if watcher is None:
+            watcher = _watchers[key] = GenerationWatcher(key)
+        return watcher
+
+
+def format_event(event: str, data: dict, event_id=None) -> str:
+    """Serialize one Server-Sent Event."""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
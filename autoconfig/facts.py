@@ -0,0 +1,223 @@
+"""Helpers turning raw command output from the collector into numbers."""
+
+import re
+
+_UNITS = {"": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40, "P": 1 << 50}
+_SIZE_RE = re.compile(r"^([0-9]+(?:[.,][0-9]+)?)([KMGTP]?)i?B?$", re.IGNORECASE)
+
+MIB = 1 << 20
+
+# Numeric columns stored next to the raw JSON document of every host.
+METRIC_COLUMNS = {
+    "load1": "REAL",
+    "load5": "REAL",
+    "load15": "REAL",
+    "mem_total": "INTEGER",
+    "mem_used": "INTEGER",
+    "mem_available": "INTEGER",
+    "disk_total": "INTEGER",
+    "disk_used": "INTEGER",
+    "disk_used_pct": "REAL",
+    "rx_bytes": "INTEGER",
+    "tx_bytes": "INTEGER",
+    "user_count": "INTEGER",
+    "port_count": "INTEGER",
+}
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_size(text):
+    """Convert a ``df -h`` style size such as ``20G`` into bytes."""
+    match = _SIZE_RE.match(str(text).strip())
+    if not match:
+        return None
+    value = float(match.group(1).replace(",", "."))
+    return int(value * _UNITS[match.group(2).upper()])
+
+
+def parse_loadavg(value):
+    """Return ``(load1, load5, load15)`` from ``/proc/loadavg`` content."""
+    if isinstance(value, (int, float)):
+        return float(value), None, None
+    parts = str(value or "").split()
+    loads = [_number(p) for p in parts[:3]]
+    loads += [None] * (3 - len(loads))
+    return tuple(loads)
+
+
+def parse_memory(value):
+    """Return ``(total, used, available)`` in bytes from ``free -m`` output.
+
+    A bare number is taken as the amount of used memory in MiB.
+    """
+    if isinstance(value, (int, float)):
+        return None, int(value * MIB), None
+    parts = str(value or "").split()
+    if parts and parts[0].endswith(":"):
+        parts = parts[1:]
+    numbers = [_number(p) for p in parts]
+    total = numbers[0] if len(numbers) > 0 else None
+    used = numbers[1] if len(numbers) > 1 else None
+    available = numbers[5] if len(numbers) > 5 else None
+    return tuple(None if n is None else int(n * MIB) for n in (total, used, available))
+
+
+def parse_disk(value):
+    """Return ``(size, used, used_pct)`` from a ``df -h --output`` line."""
+    if isinstance(value, (int, float)):
+        return None, None, float(value)
+    parts = str(value or "").split()
+    size = parse_size(parts[0]) if len(parts) > 0 else None
+    used = parse_size(parts[1]) if len(parts) > 1 else None
+    pct = _number(parts[3].rstrip("%")) if len(parts) > 3 else None
+    if pct is None and size and used is not None:
+        pct = round(used * 100.0 / size, 2)
+    return size, used, pct
+
+
+def parse_net_dev(lines):
+    """Return ``{interface: (rx_bytes, tx_bytes)}`` from ``/proc/net/dev``."""
+    counters = {}
+    for line in lines or []:
+        if ":" not in line:
+            continue
+        name, _, rest = line.partition(":")
+        fields = rest.split()
+        if len(fields) < 9:
+            continue
+        try:
+            counters[name.strip()] = (int(fields[0]), int(fields[8]))
+        except ValueError:
+            continue
+    return counters
+
+
+def parse_usernames(lines):
+    """Return the account names from ``getent passwd`` lines."""
+    names = []
+    for line in lines or []:
+        name = str(line).split(":", 1)[0].strip()
+        if name:
+            names.append(name)
+    return names
+
+
+def parse_ss(lines):
+    """Return the sockets listed in ``ss -tulwn`` output.
+
+    Each socket is a dict with ``proto``, ``state``, ``address`` and
+    ``port`` (an ``int`` or ``None`` for wildcards).
+    """
+    sockets = []
+    for line in lines or []:
+        parts = str(line).split()
+        if len(parts) < 5 or parts[0] == "Netid":
+            continue
+        address, _, port = parts[4].rpartition(":")
+        sockets.append(
+            {
+                "proto": parts[0],
+                "state": parts[1],
+                "address": address.strip("[]"),
+                "port": int(port) if port.isdigit() else None,
+            }
+        )
+    return sockets
+
+
+# Raw command output that :func:`normalize` can replace with typed fields.
+RAW_FIELDS = ("cpu_load", "memory", "disk", "net", "ports")
+
+
+def normalize(host, compact=False):
+    """Return ``host`` with typed fields parsed from its raw command output.
+
+    Adds ``load`` (``[load1, load5, load15]``), ``memory_bytes`` and
+    ``disk_usage`` (``total``/``used``/... in bytes), ``interfaces``
+    (``{name: {"rx_bytes", "tx_bytes"}}``) and ``sockets`` (see
+    :func:`parse_ss`). With ``compact`` the raw :data:`RAW_FIELDS` are
+    dropped. Documents that were already compacted are returned unchanged.
+    """
+    doc = dict(host)
+    if "cpu_load" in host:
+        doc["load"] = list(parse_loadavg(host["cpu_load"]))
+    if "memory" in host:
+        total, used, available = parse_memory(host["memory"])
+        doc["memory_bytes"] = {"total": total, "used": used, "available": available}
+    if "disk" in host:
+        total, used, used_pct = parse_disk(host["disk"])
+        doc["disk_usage"] = {"total": total, "used": used, "used_pct": used_pct}
+    if "net" in host:
+        doc["interfaces"] = {
+            name: {"rx_bytes": rx, "tx_bytes": tx}
+            for name, (rx, tx) in parse_net_dev(host["net"]).items()
+        }
+    if "ports" in host:
+        doc["sockets"] = parse_ss(host["ports"])
+    if compact:
+        for name in RAW_FIELDS:
+            doc.pop(name, None)
+    return doc
+
+
+def _typed(host, key, names):
+    value = host.get(key)
+    if not isinstance(value, dict):
+        return None
+    return tuple(value.get(name) for name in names)
+
+
+def host_metrics(host):
+    """Return the values of :data:`METRIC_COLUMNS` for a host document.
+
+    Typed fields added by :func:`normalize` are preferred over raw output.
+    """
+    load = host.get("load")
+    if isinstance(load, list):
+        load1, load5, load15 = (load + [None] * 3)[:3]
+    else:
+        load1, load5, load15 = parse_loadavg(host.get("cpu_load"))
+    mem_total, mem_used, mem_available = _typed(
+        host, "memory_bytes", ("total", "used", "available")
+    ) or parse_memory(host.get("memory"))
+    disk_total, disk_used, disk_used_pct = _typed(
+        host, "disk_usage", ("total", "used", "used_pct")
+    ) or parse_disk(host.get("disk"))
+    interfaces = host.get("interfaces")
+    if isinstance(interfaces, dict):
+        counters = {
+            name: (c.get("rx_bytes") or 0, c.get("tx_bytes") or 0)
+            for name, c in interfaces.items()
+        }
+    else:
+        counters = parse_net_dev(host.get("net"))
+    external = [c for name, c in counters.items() if name != "lo"]
+    users = host.get("users")
+    ports = host.get("ports")
+    if isinstance(host.get("sockets"), list):
+        port_count = len(host["sockets"])
+    elif isinstance(ports, list):
+        port_count = sum(1 for p in ports if not str(p).startswith("Netid"))
+    else:
+        port_count = None
+    return {
+        "load1": load1,
+        "load5": load5,
+        "load15": load15,
+        "mem_total": mem_total,
+        "mem_used": mem_used,
+        "mem_available": mem_available,
+        "disk_total": disk_total,
+        "disk_used": disk_used,
+        "disk_used_pct": disk_used_pct,
+        "rx_bytes": sum(rx for rx, _ in external) if counters else None,
+        "tx_bytes": sum(tx for _, tx in external) if counters else None,
+        "user_count": len(users) if isinstance(users, list) else None,
+        "port_count": port_count,
+    }
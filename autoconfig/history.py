@@ -0,0 +1,205 @@
+"""Time series of host metrics with automatic downsampling.
+
+Samples live in one table per resolution tier. Each row holds every metric
+of :data:`~autoconfig.facts.METRIC_COLUMNS` for one host and bucket and is
+keyed by ``(host_id, ts)`` in a ``WITHOUT ROWID`` table, so a host's range
+is a single contiguous b-tree scan and no hostname or metric name is
+repeated per row. Minute samples are rolled up into hourly and daily means
+once a bucket is complete, and every tier is trimmed to its retention.
+"""
+
+import time
+from dataclasses import dataclass
+
+from .facts import METRIC_COLUMNS
+
+METRICS = tuple(METRIC_COLUMNS)
+# Fractional metrics are stored as scaled integers: SQLite encodes small
+# integers in one to three bytes instead of eight for a REAL.
+SCALE = {m: 100 for m, sql_type in METRIC_COLUMNS.items() if sql_type == "REAL"}
+
+
+@dataclass(frozen=True)
+class Tier:
+    table: str
+    step: int
+    retention: int
+
+
+MINUTE, HOUR, DAY = 60, 3600, 86400
+
+# Finest first. Each tier is rolled up into the next one.
+TIERS = (
+    Tier("history_1m", MINUTE, 2 * DAY),
+    Tier("history_1h", HOUR, 90 * DAY),
+    Tier("history_1d", DAY, 5 * 365 * DAY),
+)
+
+# Default number of points returned when no step is requested.
+MAX_POINTS = 1000
+
+_COLUMNS = ", ".join(METRICS)
+_PLACEHOLDERS = ", ".join("?" * (len(METRICS) + 2))
+
+
+def init_schema(conn):
+    """Create the history tables."""
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS history_hosts ("
+        "id INTEGER PRIMARY KEY, hostname TEXT NOT NULL UNIQUE)"
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS history_rollups ("
+        "tier TEXT PRIMARY KEY, done_until INTEGER NOT NULL) WITHOUT ROWID"
+    )
+    columns = ", ".join(f"{name} INTEGER" for name in METRICS)
+    for tier in TIERS:
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {tier.table} ("
+            "host_id INTEGER NOT NULL, ts INTEGER NOT NULL, n INTEGER NOT NULL, "
+            f"{columns}, PRIMARY KEY (host_id, ts)) WITHOUT ROWID"
+        )
+
+
+def host_ids(conn, hostnames) -> dict:
+    """Return ``{hostname: id}``, registering unknown hosts."""
+    hostnames = list(hostnames)
+    conn.executemany(
+        "INSERT OR IGNORE INTO history_hosts(hostname) VALUES(?)",
+        ((name,) for name in hostnames),
+    )
+    placeholders = ", ".join("?" * len(hostnames))
+    return dict(
+        conn.execute(
+            "SELECT hostname, id FROM history_hosts "
+            f"WHERE hostname IN ({placeholders})",
+            hostnames,
+        )
+    )
+
+
+def record(conn, samples, ts=None):
+    """Store ``(hostname, metric_values)`` pairs as minute samples.
+
+    ``metric_values`` follow the order of :data:`METRICS`. A second sample
+    of a host in the same minute replaces the first.
+    """
+    samples = list(samples)
+    if not samples:
+        return
+    ts = int(time.time() if ts is None else ts)
+    ts -= ts % MINUTE
+    ids = host_ids(conn, (name for name, _ in samples))
+    scales = [SCALE.get(m, 1) for m in METRICS]
+    conn.executemany(
+        f"INSERT OR REPLACE INTO {TIERS[0].table}(host_id, ts, n, {_COLUMNS}) "
+        f"VALUES({_PLACEHOLDERS}, ?)",
+        (
+            (ids[name], ts, 1)
+            + tuple(
+                None if v is None else round(v * scale)
+                for v, scale in zip(values, scales)
+            )
+            for name, values in samples
+        ),
+    )
+
+
+def _done_until(conn, tier: Tier) -> int | None:
+    row = conn.execute(
+        "SELECT done_until FROM history_rollups WHERE tier = ?", (tier.table,)
+    ).fetchone()
+    return row[0] if row else None
+
+
+def rollup(conn, source: Tier, target: Tier, now: float):
+    """Aggregate complete ``target`` buckets from ``source`` rows."""
+    boundary = int(now) - int(now) % target.step
+    start = _done_until(conn, target)
+    if start is None:
+        row = conn.execute(f"SELECT min(ts) FROM {source.table}").fetchone()
+        if row[0] is None:
+            return
+        start = row[0] - row[0] % target.step
+    if start >= boundary:
+        return
+    # Means weighted by the number of samples behind each source row, rounded
+    # rather than truncated by integer division.
+    means = ", ".join(
+        f"round(sum({m} * n) * 1.0 / sum(CASE WHEN {m} IS NOT NULL THEN n END))"
+        for m in METRICS
+    )
+    conn.execute(
+        f"INSERT OR REPLACE INTO {target.table}(host_id, ts, n, {_COLUMNS}) "
+        f"SELECT host_id, ts - ts % {target.step}, sum(n), {means} "
+        f"FROM {source.table} "
+        "WHERE host_id IN (SELECT id FROM history_hosts) AND ts >= ? AND ts < ? "
+        f"GROUP BY host_id, ts - ts % {target.step}",
+        (start, boundary),
+    )
+    conn.execute(
+        "INSERT OR REPLACE INTO history_rollups(tier, done_until) VALUES(?, ?)",
+        (target.table, boundary),
+    )
+
+
+def expire(conn, tier: Tier, now: float):
+    """Delete rows of ``tier`` older than its retention."""
+    cutoff = int(now) - tier.retention
+    conn.execute(
+        f"DELETE FROM {tier.table} "
+        "WHERE host_id IN (SELECT id FROM history_hosts) AND ts < ?",
+        (cutoff,),
+    )
+
+
+def maintain(conn, now=None):
+    """Roll up complete buckets and apply retention to every tier."""
+    now = time.time() if now is None else now
+    for source, target in zip(TIERS, TIERS[1:]):
+        rollup(conn, source, target, now)
+    for tier in TIERS:
+        expire(conn, tier, now)
+
+
+def default_step(start: float, end: float) -> int:
+    """Step giving at most :data:`MAX_POINTS` buckets between the bounds."""
+    return max(MINUTE, -(-int(end - start) // MAX_POINTS))
+
+
+def choose_tier(start: float, step: int, now=None) -> Tier:
+    """Pick the tier to answer a query starting at ``start``.
+
+    That is the coarsest tier still resolving ``step`` whose retention
+    covers ``start``, otherwise the finest tier covering it. Coarser tiers
+    only contain complete buckets, so the current hour or day is missing
+    from them.
+    """
+    now = time.time() if now is None else now
+    covering = [t for t in TIERS if now - t.retention <= start] or [TIERS[-1]]
+    for tier in reversed(covering):
+        if tier.step <= step:
+            return tier
+    return covering[0]
+
+
+def query(conn, hostname: str, metric: str, start: float, end: float, step: int):
+    """Return ``[[ts, value], ...]`` of ``metric`` for ``hostname``.
+
+    Values are averaged over buckets of ``step`` seconds, which is rounded
+    up to a multiple of the step of the tier used.
+    """
+    if metric not in METRICS:
+        raise ValueError(f"unknown metric: {metric}")
+    tier = choose_tier(start, step)
+    step = max(tier.step, -(-step // tier.step) * tier.step)
+    rows = conn.execute(
+        f"SELECT ts - ts % :step AS bucket, sum({metric} * n) * 1.0 "
+        f"/ sum(CASE WHEN {metric} IS NOT NULL THEN n END) / {SCALE.get(metric, 1)} "
+        f"FROM {tier.table} "
+        "WHERE host_id = (SELECT id FROM history_hosts WHERE hostname = :host) "
+        "AND ts >= :start AND ts <= :end "
+        "GROUP BY bucket ORDER BY bucket",
+        {"step": step, "host": hostname, "start": int(start), "end": int(end)},
+    )
+    return tier, step, [[ts, value] for ts, value in rows if value is not None]
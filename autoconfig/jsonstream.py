@@ -0,0 +1,97 @@
+"""Incremental reading and writing of large JSON documents."""
+
+import json
+
+CHUNK_SIZE = 1 << 16
+_WHITESPACE = " \t\n\r"
+
+
+def iter_json_array(fp, chunk_size: int = CHUNK_SIZE):
+    """Yield the elements of the top-level JSON array in text file ``fp``.
+
+    Only one element (plus one read chunk) is held in memory at a time, so
+    arbitrarily large arrays can be processed with flat memory usage.
+    ``ValueError`` is raised for malformed input.
+    """
+    decoder = json.JSONDecoder()
+    buf = ""
+    pos = 0
+    eof = False
+
+    def fill():
+        nonlocal buf, pos, eof
+        chunk = fp.read(chunk_size)
+        if not chunk:
+            eof = True
+            return False
+        buf = buf[pos:] + chunk
+        pos = 0
+        return True
+
+    def next_char():
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in _WHITESPACE:
+                pos += 1
+            if pos < len(buf):
+                return buf[pos]
+            if not fill():
+                return ""
+
+    if next_char() != "[":
+        raise ValueError("expected a JSON array")
+    pos += 1
+    if next_char() == "]":
+        return
+    while True:
+        if not next_char():
+            raise ValueError("unexpected end of JSON array")
+        while True:
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof or not fill():
+                    raise ValueError("malformed JSON array element") from None
+                continue
+            # A number at the end of the buffer may continue in the next chunk.
+            if end == len(buf) and not eof and fill():
+                continue
+            break
+        pos = end
+        yield value
+        sep = next_char()
+        pos += 1
+        if sep == "]":
+            return
+        if sep != ",":
+            raise ValueError("expected ',' or ']' in JSON array")
+
+
+class ArrayWriter:
+    """Write a compact JSON array to text files one element at a time.
+
+    Elements are serialized without indentation, one per line, and written
+    to every file in ``fps``. Call :meth:`close` to terminate the array.
+    """
+
+    def __init__(self, *fps):
+        self.fps = fps
+        self.count = 0
+
+    def _emit(self, text: str):
+        for fp in self.fps:
+            fp.write(text)
+
+    def write(self, item):
+        text = json.dumps(item, separators=(",", ":"))
+        self._emit(("[\n" if not self.count else ",\n") + text)
+        self.count += 1
+
+    def tee(self, items):
+        """Write each of ``items`` and yield it on to the caller."""
+        for item in items:
+            self.write(item)
+            yield item
+
+    def close(self):
+        self._emit("\n]\n" if self.count else "[]\n")
@@ -0,0 +1,14 @@
+"""Logging setup for the command line entry points.
+
+Library imports leave logging alone; ``main`` functions and WSGI factories
+call :func:`configure_logging` once at startup.
+"""
+
+import logging
+import os
+
+
+def configure_logging():
+    """Configure the root logger from ``LOG_LEVEL`` (default ``INFO``)."""
+    level_name = os.environ.get("LOG_LEVEL", "INFO").upper()
+    logging.basicConfig(level=getattr(logging, level_name, logging.INFO))
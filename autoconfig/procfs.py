@@ -0,0 +1,170 @@
+"""Native fact collection for the local host.
+
+Reads ``/proc``, ``statvfs`` and the password database directly instead of
+spawning ``hostname``, ``df``, ``free``, ``ss`` and friends. Every function
+returns text in the format of the command it replaces, so
+:func:`collect_outputs` is a drop-in for running the fact commands locally.
+"""
+
+import ipaddress
+import math
+import os
+import pwd
+import socket
+from pathlib import Path
+
+PROC = Path("/proc")
+HWMON = Path("/sys/class/hwmon")
+
+# ``/proc/net/tcp`` state codes reported by ``ss -tulwn``.
+TCP_LISTEN = "0A"
+UDP_UNCONN = "07"
+
+
+def available(proc=PROC) -> bool:
+    return (Path(proc) / "loadavg").exists()
+
+
+def _read(path) -> str:
+    with open(path) as f:
+        return f.read()
+
+
+def hostname() -> str:
+    return socket.gethostname() + "\n"
+
+
+def users() -> str:
+    """``getent passwd`` lines for every account."""
+    return "".join(
+        f"{p.pw_name}:{p.pw_passwd}:{p.pw_uid}:{p.pw_gid}:{p.pw_gecos}:"
+        f"{p.pw_dir}:{p.pw_shell}\n"
+        for p in pwd.getpwall()
+    )
+
+
+def human_size(value: int) -> str:
+    """Format bytes like ``df -h``: powers of 1024, rounded up."""
+    for unit in ("", "K", "M", "G", "T", "P"):
+        if value < 1024 or unit == "P":
+            break
+        value /= 1024
+    if not unit:
+        return str(int(value))
+    if value < 10:
+        return f"{math.ceil(value * 10) / 10:.1f}{unit}"
+    return f"{math.ceil(value)}{unit}"
+
+
+def disk(path="/") -> str:
+    """``df -h --output=size,used,avail,pcent`` line for ``path``."""
+    st = os.statvfs(path)
+    size = st.f_blocks * st.f_frsize
+    used = (st.f_blocks - st.f_bfree) * st.f_frsize
+    avail = st.f_bavail * st.f_frsize
+    pct = math.ceil(used * 100 / (used + avail)) if used + avail else 0
+    return f"{human_size(size)} {human_size(used)} {human_size(avail)} {pct}%\n"
+
+
+def memory(proc=PROC) -> str:
+    """``free -m | grep Mem:`` line computed from ``/proc/meminfo``."""
+    info = {}
+    for line in _read(Path(proc) / "meminfo").splitlines():
+        key, _, rest = line.partition(":")
+        fields = rest.split()
+        if fields:
+            info[key] = int(fields[0])
+    total = info.get("MemTotal", 0)
+    free = info.get("MemFree", 0)
+    cache = info.get("Buffers", 0) + info.get("Cached", 0)
+    cache += info.get("SReclaimable", 0)
+    avail = info.get("MemAvailable", free)
+    values = (total, total - avail, free, info.get("Shmem", 0), cache, avail)
+    return "Mem: " + " ".join(str(v // 1024) for v in values) + "\n"
+
+
+def loadavg(proc=PROC) -> str:
+    return _read(Path(proc) / "loadavg")
+
+
+def net_dev(proc=PROC) -> str:
+    return _read(Path(proc) / "net" / "dev")
+
+
+def _address(text: str) -> tuple[str, int]:
+    """Decode a ``/proc/net/tcp`` ``ADDR:PORT`` pair."""
+    addr, _, port = text.partition(":")
+    raw = bytes.fromhex(addr)
+    # Addresses are stored as native-endian 32-bit words.
+    raw = b"".join(raw[i : i + 4][::-1] for i in range(0, len(raw), 4))
+    if len(raw) == 4:
+        return str(ipaddress.IPv4Address(raw)), int(port, 16)
+    return f"[{ipaddress.IPv6Address(raw)}]", int(port, 16)
+
+
+def sockets(proc=PROC) -> str:
+    """``ss -tulwn`` style listing of listening TCP and bound UDP sockets."""
+    rows = ["Netid State Recv-Q Send-Q Local Address:Port Peer Address:Port"]
+    for proto, state_code, state in (
+        ("tcp", TCP_LISTEN, "LISTEN"),
+        ("udp", UDP_UNCONN, "UNCONN"),
+    ):
+        for suffix in ("", "6"):
+            try:
+                lines = _read(Path(proc) / "net" / f"{proto}{suffix}").splitlines()
+            except OSError:
+                continue
+            for line in lines[1:]:
+                fields = line.split()
+                if len(fields) < 5 or fields[3] != state_code:
+                    continue
+                local, port = _address(fields[1])
+                peer, peer_port = _address(fields[2])
+                tx_queue, _, rx_queue = fields[4].partition(":")
+                rows.append(
+                    f"{proto} {state} {int(rx_queue, 16)} {int(tx_queue, 16)} "
+                    f"{local}:{port} {peer}:{peer_port or '*'}"
+                )
+    return "\n".join(rows) + "\n"
+
+
+def sensors(hwmon=HWMON) -> str:
+    """Temperatures from ``/sys/class/hwmon`` in the layout of ``sensors``."""
+    chips = []
+    for chip in sorted(Path(hwmon).glob("hwmon*")):
+        try:
+            name = _read(chip / "name").strip()
+        except OSError:
+            continue
+        lines = [name]
+        for sensor in sorted(chip.glob("temp*_input")):
+            prefix = sensor.name[: -len("_input")]
+            try:
+                value = int(_read(sensor)) / 1000
+            except (OSError, ValueError):
+                continue
+            try:
+                label = _read(chip / f"{prefix}_label").strip()
+            except OSError:
+                label = prefix
+            lines.append(f"{label}:  {value:+.1f}°C")
+        if len(lines) > 1:
+            chips.append("\n".join(lines) + "\n")
+    return "\n".join(chips)
+
+
+READERS = {
+    "hostname": hostname,
+    "users": users,
+    "ports": sockets,
+    "disk": disk,
+    "memory": memory,
+    "cpu_load": loadavg,
+    "net": net_dev,
+    "sensors": sensors,
+}
+
+
+def collect_outputs(sections=None) -> dict:
+    """Return the raw fact outputs of the local host without subprocesses."""
+    return {name: READERS[name]() for name in sections or READERS}
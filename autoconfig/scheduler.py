@@ -0,0 +1,164 @@
+"""Bounded concurrent collection with per-host timeouts.
+
+:func:`run_tasks` runs one task per host on at most ``max_workers`` threads
+and yields a :class:`HostResult` as soon as each host finishes, so callers
+can ingest results while slower hosts are still being collected.
+"""
+
+import logging
+import subprocess
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_WORKERS = 16
+DEFAULT_HOST_TIMEOUT = 120.0
+# Extra time a task gets to honour its own timeout before it is abandoned.
+TIMEOUT_GRACE_SECONDS = 5.0
+
+OK = "ok"
+FAILED = "failed"
+TIMEOUT = "timeout"
+SKIPPED = "skipped"
+
+_END = object()
+
+
+@dataclass
+class HostResult:
+    host: str
+    status: str
+    duration: float
+    data: object = None
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status == OK
+
+
+@dataclass
+class Summary:
+    """Outcome counts and per-host durations of one collection run."""
+
+    results: list = field(default_factory=list)
+
+    def add(self, result: HostResult):
+        self.results.append(result)
+
+    def hosts(self, status: str) -> list[str]:
+        return [r.host for r in self.results if r.status == status]
+
+    def as_dict(self) -> dict:
+        return {
+            "ok": len(self.hosts(OK)),
+            "failed": self.hosts(FAILED),
+            "timeout": self.hosts(TIMEOUT),
+            "skipped": len(self.hosts(SKIPPED)),
+            "durations": {r.host: round(r.duration, 3) for r in self.results},
+        }
+
+    def log(self):
+        durations = sorted(r.duration for r in self.results)
+        slowest = max(self.results, key=lambda r: r.duration, default=None)
+        logger.info(
+            "Collected %d hosts: %d ok, %d failed, %d timed out, %d skipped%s",
+            len(self.results),
+            len(self.hosts(OK)),
+            len(self.hosts(FAILED)),
+            len(self.hosts(TIMEOUT)),
+            len(self.hosts(SKIPPED)),
+            (
+                f"; median {durations[len(durations) // 2]:.2f}s, "
+                f"slowest {slowest.host} {slowest.duration:.2f}s"
+                if slowest
+                else ""
+            ),
+        )
+        for result in self.results:
+            if result.status in (FAILED, TIMEOUT):
+                logger.warning("%s %s: %s", result.host, result.status, result.error)
+
+
+def _result(future, host: str, started: float) -> HostResult:
+    duration = time.monotonic() - started
+    try:
+        data = future.result()
+    except subprocess.TimeoutExpired as exc:
+        return HostResult(host, TIMEOUT, duration, error=str(exc))
+    except Exception as exc:
+        return HostResult(host, FAILED, duration, error=str(exc) or repr(exc))
+    return HostResult(host, OK, duration, data=data)
+
+
+def run_tasks(
+    task,
+    hosts,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    timeout: float | None = DEFAULT_HOST_TIMEOUT,
+    grace: float = TIMEOUT_GRACE_SECONDS,
+):
+    """Run ``task(host, timeout)`` for every host and yield results.
+
+    Results are yielded in completion order. At most ``max_workers`` hosts
+    are in flight, so ``hosts`` may be a lazy iterable. Tasks should pass
+    ``timeout`` to the subprocesses they start; a task still running
+    ``grace`` seconds after its timeout is reported as timed out and no
+    longer waited for, although its thread keeps its worker slot until the
+    task returns. Hosts are only submitted while a thread is free, so the
+    timeout of a host counts from the moment its task starts rather than
+    from when it was queued behind an abandoned task.
+    """
+    hosts = iter(hosts)
+    running = {}
+    # Futures reported as timed out whose threads are still busy.
+    abandoned = set()
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="collect")
+    pending = next(hosts, _END)
+    try:
+        while True:
+            while pending is not _END and len(running) + len(abandoned) < max_workers:
+                future = executor.submit(task, pending, timeout)
+                running[future] = (pending, time.monotonic())
+                pending = next(hosts, _END)
+            if not running:
+                if pending is _END:
+                    return
+                # Every thread is held by a task already reported as timed
+                # out; the next host starts once one of them returns.
+                done, _ = wait(abandoned, return_when=FIRST_COMPLETED)
+                abandoned -= done
+                continue
+
+            wait_timeout = None
+            if timeout is not None:
+                oldest = min(started for _, started in running.values())
+                wait_timeout = max(0.0, oldest + timeout + grace - time.monotonic())
+            done, _ = wait(
+                running.keys() | abandoned,
+                timeout=wait_timeout,
+                return_when=FIRST_COMPLETED,
+            )
+            abandoned -= done
+            for future in done:
+                if future in running:
+                    host, started = running.pop(future)
+                    yield _result(future, host, started)
+
+            if timeout is None:
+                continue
+            now = time.monotonic()
+            for future, (host, started) in list(running.items()):
+                if now - started >= timeout + grace:
+                    del running[future]
+                    abandoned.add(future)
+                    yield HostResult(
+                        host,
+                        TIMEOUT,
+                        now - started,
+                        error=f"no result after {timeout:g}s",
+                    )
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
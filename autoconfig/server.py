@@ -1,24 +1,29 @@
+import base64
+import binascii
+import gzip
+import hashlib
+import io
 import json
+import math
+import re
 import sqlite3
+import tempfile
+import threading
 from pathlib import Path
 from flask import Flask, jsonify, send_from_directory, request, g
 from functools import wraps
-import jwt
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import os
 import logging
 import argparse
 import uuid
-from dataclasses import asdict, dataclass
-from prometheus_client import (
-    Counter,
-    Histogram,
-    generate_latest,
-    CONTENT_TYPE_LATEST,
-)
+from dataclasses import asdict, dataclass, field
+
+from . import compression, db, events, facts, history, jsonstream, snapshot
+from .cache import LRUCache
+from .facts import METRIC_COLUMNS
+from .logconfig import configure_logging
 
-level_name = os.environ.get("LOG_LEVEL", "INFO").upper()
-logging.basicConfig(level=getattr(logging, level_name, logging.INFO))
 logger = logging.getLogger(__name__)
 
 # JWT authentication settings
@@ -48,6 +53,15 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 RESULTS_DIR = BASE_DIR / "results"
 DB_PATH = RESULTS_DIR / "data.db"
 DATA_JSON = RESULTS_DIR / "data.json"
+DATA_SNAPSHOT = RESULTS_DIR / snapshot.SNAPSHOT_FILE
+
+# Serialized ``/api/hosts`` responses keyed by data generation and query,
+# bounded by entry count and by the bytes of the bodies they hold.
+HOSTS_CACHE = LRUCache(
+    int(os.environ.get("HOSTS_CACHE_SIZE", "128")),
+    maxbytes=int(os.environ.get("HOSTS_CACHE_BYTES", str(64 * 2**20))),
+    sizeof=lambda entry: entry.nbytes,
+)
 
 
 @dataclass
@@ -65,33 +79,110 @@ class Template:
         return asdict(self)
 
 
-def create_token(username: str, role: str) -> str:
+# Verified token payloads keyed by token digest. Entries expire with the
+# token's ``exp`` claim or after ``TOKEN_CACHE_TTL`` seconds, whichever is
+# sooner, so a cache hit skips the HMAC check and claim validation.
+TOKEN_CACHE = LRUCache(int(os.environ.get("TOKEN_CACHE_SIZE", "1024")))
+TOKEN_CACHE_TTL = float(os.environ.get("TOKEN_CACHE_TTL", "300"))
+# Digests of revoked tokens mapped to their expiry time.
+REVOKED_TOKENS: dict[str, float] = {}
+
+
+def _jwt():
+    """Return the PyJWT module, imported on the first token operation."""
+    import jwt
+
+    return jwt
+
+
+def create_token(
+    username: str, role: str, expires_in: int | None = None, scope: str | None = None
+) -> str:
+    """Return a signed token; ``scope`` restricts it to one use.
+
+    Scoped tokens are not accepted in the ``Authorization`` header, see
+    :func:`authenticate`.
+    """
+    expires_in = JWT_EXPIRES_SECONDS if expires_in is None else expires_in
     payload = {
         "sub": username,
         "role": role,
-        "exp": datetime.utcnow() + timedelta(seconds=JWT_EXPIRES_SECONDS),
+        "jti": uuid.uuid4().hex,
+        "exp": datetime.utcnow() + timedelta(seconds=expires_in),
     }
-    return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
+    if scope is not None:
+        payload["scope"] = scope
+    return _jwt().encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
+
+
+def _token_digest(token: str) -> str:
+    # The secret is part of the key so rotating it invalidates cached tokens.
+    return hashlib.sha256(f"{JWT_SECRET}\0{token}".encode()).hexdigest()
 
 
 def decode_token(token: str):
+    digest = _token_digest(token)
+    if digest in REVOKED_TOKENS:
+        return None
+    payload = TOKEN_CACHE.get(digest)
+    if payload is not None:
+        return dict(payload)
+    jwt = _jwt()
     try:
-        return jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
     except jwt.PyJWTError:
         return None
+    ttl = TOKEN_CACHE_TTL
+    if "exp" in payload:
+        ttl = min(ttl, payload["exp"] - datetime.now(timezone.utc).timestamp())
+    if ttl > 0:
+        TOKEN_CACHE.set(digest, payload, ttl=ttl)
+    return dict(payload)
+
+
+def revoke_token(token: str, payload: dict | None = None):
+    """Invalidate ``token`` until it expires.
+
+    Revocations are kept in memory of the current process only.
+    """
+    now = datetime.now(timezone.utc).timestamp()
+    for digest, expires in list(REVOKED_TOKENS.items()):
+        if expires <= now:
+            REVOKED_TOKENS.pop(digest, None)
+    digest = _token_digest(token)
+    TOKEN_CACHE.pop(digest)
+    expires = (payload or {}).get("exp", now + JWT_EXPIRES_SECONDS)
+    REVOKED_TOKENS[digest] = expires
+
+
+def authenticate(query_scope: str | None = None) -> bool:
+    """Verify the request's token and set ``g.user`` and ``g.token``.
+
+    The token is taken from the ``Authorization: Bearer`` header, which
+    only accepts unscoped tokens. With ``query_scope`` a ``token`` query
+    parameter carrying a token of that scope is accepted as well, for
+    clients such as ``EventSource`` that cannot set headers.
+    """
+    auth = request.headers.get("Authorization", "")
+    if auth.startswith("Bearer "):
+        token, scope = auth.split(None, 1)[1], None
+    elif query_scope is not None and "token" in request.args:
+        token, scope = request.args["token"], query_scope
+    else:
+        return False
+    payload = decode_token(token)
+    if not payload or payload.get("scope") != scope:
+        return False
+    g.user = payload
+    g.token = token
+    return True
 
 
 def require_auth(f):
     @wraps(f)
     def wrapper(*args, **kwargs):
-        auth = request.headers.get("Authorization", "")
-        if not auth.startswith("Bearer "):
-            return "", 401
-        token = auth.split(None, 1)[1]
-        payload = decode_token(token)
-        if not payload:
+        if not authenticate():
             return "", 401
-        g.user = payload
         return f(*args, **kwargs)
 
     return wrapper
@@ -114,17 +205,31 @@ def require_roles(*roles):
 
 app = Flask(__name__)
 
-# Prometheus metrics
-HTTP_REQUESTS_TOTAL = Counter(
-    "http_requests_total",
-    "Total HTTP requests",
-    ["method", "endpoint", "http_status"],
-)
-HTTP_REQUEST_DURATION_SECONDS = Histogram(
-    "http_request_duration_seconds",
-    "HTTP request duration in seconds",
-    ["endpoint"],
-)
+_metrics_lock = threading.Lock()
+_metrics = None
+
+
+def request_metrics():
+    """Return the Prometheus request metrics, creating them on first use."""
+    global _metrics
+    # Metrics registered twice raise ``DuplicateTimeseries``, so the first
+    # requests are serialized here.
+    with _metrics_lock:
+        if _metrics is None:
+            from prometheus_client import Counter, Histogram
+
+            requests_total = Counter(
+                "http_requests_total",
+                "Total HTTP requests",
+                ["method", "endpoint", "http_status"],
+            )
+            duration_seconds = Histogram(
+                "http_request_duration_seconds",
+                "HTTP request duration in seconds",
+                ["endpoint"],
+            )
+            _metrics = requests_total, duration_seconds
+        return _metrics
 
 
 @app.before_request
@@ -136,18 +241,41 @@ def start_timer():
 def record_metrics(response):
     endpoint = request.endpoint or "unknown"
     duration = datetime.utcnow().timestamp() - g.get("start_time", 0)
-    HTTP_REQUESTS_TOTAL.labels(
-        request.method, endpoint, response.status_code
-    ).inc()
-    HTTP_REQUEST_DURATION_SECONDS.labels(endpoint).observe(duration)
+    requests_total, duration_seconds = request_metrics()
+    requests_total.labels(request.method, endpoint, response.status_code).inc()
+    duration_seconds.labels(endpoint).observe(duration)
     response.headers["Strict-Transport-Security"] = (
         "max-age=31536000; includeSubDomains"
     )
     return response
 
 
+@app.after_request
+def compress_response(response):
+    """Compress JSON responses for clients that accept it."""
+    if (
+        response.status_code != 200
+        or response.direct_passthrough
+        or response.mimetype != "application/json"
+        or "Content-Encoding" in response.headers
+    ):
+        return response
+    body = response.get_data()
+    if len(body) < compression.MIN_SIZE:
+        return response
+    encoding = compression.choose_encoding(request.accept_encodings)
+    if encoding:
+        response.set_data(compression.encode(body, encoding))
+        response.headers["Content-Encoding"] = encoding
+        response.vary.add("Accept-Encoding")
+    return response
+
+
 @app.route("/metrics")
 def metrics():
+    from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+    request_metrics()
     return generate_latest(), 200, {"Content-Type": CONTENT_TYPE_LATEST}
 
 
@@ -167,18 +295,23 @@ def login():
 @require_auth
 def refresh():
     token = create_token(g.user["sub"], g.user["role"])
+    revoke_token(g.token, g.user)
     return jsonify({"token": token})
 
 
+@app.route("/auth/logout", methods=["POST"])
+@require_auth
+def logout():
+    revoke_token(g.token, g.user)
+    return "", 204
+
+
 def init_db():
     DB_PATH.parent.mkdir(exist_ok=True)
-    with sqlite3.connect(DB_PATH) as conn:
+    with db.connect(DB_PATH) as conn:
+        db.init_hosts_schema(conn)
         cur = conn.cursor()
-        cur.execute(
-            "CREATE TABLE IF NOT EXISTS hosts (hostname TEXT PRIMARY KEY, data TEXT)"
-        )
-        cur.execute(
-            """
+        cur.execute("""
             CREATE TABLE IF NOT EXISTS templates (
                 id TEXT PRIMARY KEY,
                 name TEXT NOT NULL,
@@ -190,29 +323,64 @@ def init_db():
                 active INTEGER DEFAULT 0,
                 UNIQUE(name, version)
             )
-            """
-        )
+            """)
         cur.execute(
             "CREATE UNIQUE INDEX IF NOT EXISTS idx_templates_name_version "
             "ON templates(name, version)"
         )
 
 
-def load_data():
-    """Load hosts from ``DATA_JSON`` into the SQLite database."""
-    if DATA_JSON.exists():
+def _open_snapshot():
+    """Return ``DATA_SNAPSHOT`` if it is at least as new as ``DATA_JSON``."""
+    try:
+        if DATA_SNAPSHOT.stat().st_mtime < DATA_JSON.stat().st_mtime:
+            return None
+    except FileNotFoundError:
+        if not DATA_SNAPSHOT.exists():
+            return None
+    try:
+        return snapshot.Snapshot(DATA_SNAPSHOT)
+    except (OSError, ValueError) as exc:
+        logger.warning("Ignoring unreadable snapshot: %s", exc)
+        return None
+
+
+def load_data(hostnames=None):
+    """Load hosts from ``DATA_SNAPSHOT`` or ``DATA_JSON`` into the database.
+
+    The binary snapshot is preferred when it is current: hosts whose stored
+    hash is unchanged are skipped without being parsed. Otherwise the JSON
+    file is parsed one host at a time. Either way hosts are written in
+    batches, so memory use stays flat regardless of the fleet size. With
+    ``hostnames`` only those hosts are loaded, looked up in the memory-mapped
+    snapshot index, and no other host is removed. A full load only prunes
+    hosts that came from these files, never hosts pushed to
+    ``/api/v1/hosts:batch``, and prunes nothing when neither file exists.
+    Returns the ``added``/``changed``/``removed`` row counts.
+    """
+    prune = hostnames is None
+    with db.connect(DB_PATH) as conn:
+        snap = _open_snapshot()
+        if snap is not None:
+            with snap:
+                if prune:
+                    return db.sync_hosts(conn, snap)
+                records = (snap.record(name) for name in hostnames)
+                return db.sync_hosts(conn, (r for r in records if r), prune=False)
+        if not DATA_JSON.exists():
+            # Nothing to compare with: hosts written by a collector daemon
+            # without ``--write-site`` must not be pruned.
+            return {"added": 0, "changed": 0, "removed": 0}
         with open(DATA_JSON) as f:
-            hosts = json.load(f)
-    else:
-        hosts = []
-    with sqlite3.connect(DB_PATH) as conn:
-        cur = conn.cursor()
-        cur.execute("DELETE FROM hosts")
-        for h in hosts:
-            cur.execute(
-                "INSERT OR REPLACE INTO hosts(hostname, data) VALUES(?, ?)",
-                (h.get("hostname"), json.dumps(h)),
-            )
+            hosts = jsonstream.iter_json_array(f)
+            if not prune:
+                wanted = set(hostnames)
+                hosts = (
+                    h
+                    for h in hosts
+                    if isinstance(h, dict) and h.get("hostname") in wanted
+                )
+            return db.sync_hosts(conn, hosts, prune=prune)
 
 
 def _now() -> str:
@@ -220,7 +388,7 @@ def _now() -> str:
 
 
 def create_template(name: str, description: str | None, config: dict) -> Template:
-    with sqlite3.connect(DB_PATH) as conn:
+    with db.connect(DB_PATH) as conn:
         cur = conn.cursor()
         cur.execute("SELECT MAX(version) FROM templates WHERE name = ?", (name,))
         row = cur.fetchone()
@@ -245,7 +413,7 @@ def list_latest_templates(limit: int = 100, offset: int = 0) -> list[Template]:
       ON t1.name = t2.name AND t1.version = t2.ver
     ORDER BY t1.name LIMIT ? OFFSET ?
     """
-    with sqlite3.connect(DB_PATH) as conn:
+    with db.connect(DB_PATH) as conn:
         cur = conn.cursor()
         cur.execute(query, (limit, offset))
         rows = cur.fetchall()
@@ -265,7 +433,7 @@ def list_latest_templates(limit: int = 100, offset: int = 0) -> list[Template]:
 
 
 def get_template(template_id: str) -> Template | None:
-    with sqlite3.connect(DB_PATH) as conn:
+    with db.connect(DB_PATH) as conn:
         cur = conn.cursor()
         cur.execute("SELECT * FROM templates WHERE id = ?", (template_id,))
         row = cur.fetchone()
@@ -292,7 +460,7 @@ def update_template(
     new_desc = description if description is not None else tpl.description
     new_config = config if config is not None else tpl.config
     ts = _now()
-    with sqlite3.connect(DB_PATH) as conn:
+    with db.connect(DB_PATH) as conn:
         cur = conn.cursor()
         cur.execute(
             (
@@ -315,43 +483,288 @@ def update_template(
 
 
 def delete_template(template_id: str) -> bool:
-    with sqlite3.connect(DB_PATH) as conn:
+    with db.connect(DB_PATH) as conn:
         cur = conn.cursor()
         cur.execute("DELETE FROM templates WHERE id = ?", (template_id,))
         conn.commit()
         return cur.rowcount > 0
 
 
-def get_hosts(search=None, sort=None, order="asc"):
-    """Return hosts filtered by search and ordered via SQL."""
-    with sqlite3.connect(DB_PATH) as conn:
-        cur = conn.cursor()
+# Legacy sort keys used by the web UI mapped to their numeric column.
+SORT_ALIASES = {
+    "cpu_load": "load1",
+    "memory": "mem_used",
+    "disk": "disk_used_pct",
+    "net": "rx_bytes",
+}
 
-        query = "SELECT data FROM hosts"
-        params = []
-        if search:
-            query += " WHERE hostname LIKE ?"
-            params.append(f"%{search}%")
-
-        if sort:
-            allowed = {"hostname", "cpu_load", "memory", "disk", "net", "sensors"}
-            if sort == "hostname":
-                order_field = "hostname"
-            elif sort in allowed:
-                order_field = f"json_extract(data, '$.{sort}')"
-            else:
-                order_field = "hostname"
-
-            query += f" ORDER BY {order_field}"
-            if order and order.lower() == "desc":
-                query += " DESC"
-            else:
-                query += " ASC"
-
-        cur.execute(query, params)
-        rows = cur.fetchall()
 
-    return [json.loads(r[0]) for r in rows]
+FIELD_NAME_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(value, hostname) -> str:
+    raw = json.dumps([value, hostname], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """Return ``(value, hostname)`` or raise ``ValueError``."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        value, hostname = json.loads(raw)
+    except (TypeError, ValueError, binascii.Error):
+        raise ValueError("invalid cursor") from None
+    if not isinstance(hostname, str):
+        raise ValueError("invalid cursor")
+    # ``value`` is bound as an SQLite parameter: only scalars fit, and
+    # integers must fit in 64 bits.
+    if value is not None and not isinstance(value, (int, float, str)):
+        raise ValueError("invalid cursor")
+    if isinstance(value, int) and not -(2**63) <= value < 2**63:
+        raise ValueError("invalid cursor")
+    return value, hostname
+
+
+def _projection(fields, params):
+    """Build the SQL expression returning each row as a JSON document."""
+    if not fields:
+        return "data"
+    parts = []
+    for name in fields:
+        if not FIELD_NAME_RE.match(name):
+            raise ValueError(f"invalid field: {name}")
+        if name == "hostname" or name in METRIC_COLUMNS:
+            parts.append(f"?, {name}")
+            params.append(name)
+        else:
+            parts.append("?, json_extract(data, ?)")
+            params.extend([name, f"$.{name}"])
+    return "json_object({})".format(", ".join(parts))
+
+
+def _after_cursor(order_field, descending, value, hostname, params):
+    """Keyset condition selecting rows after ``(value, hostname)``.
+
+    SQLite sorts ``NULL`` first in ascending and last in descending order,
+    which the conditions below mirror so pages never skip or repeat rows.
+    """
+    if order_field == "hostname":
+        params.append(hostname)
+        return "hostname < ?" if descending else "hostname > ?"
+    if descending:
+        if value is None:
+            params.append(hostname)
+            return f"({order_field} IS NULL AND hostname < ?)"
+        params.extend([value, value, hostname])
+        return (
+            f"({order_field} < ? OR ({order_field} = ? AND hostname < ?) "
+            f"OR {order_field} IS NULL)"
+        )
+    if value is None:
+        params.append(hostname)
+        return (
+            f"(({order_field} IS NULL AND hostname > ?) "
+            f"OR {order_field} IS NOT NULL)"
+        )
+    params.extend([value, value, hostname])
+    return f"({order_field} > ? OR ({order_field} = ? AND hostname > ?))"
+
+
+# ``key:value`` prefixes accepted by ``q`` mapped to ``hosts_fts`` columns.
+SEARCH_KEYS = {"host": "name", "hostname": "name", "user": "users", "port": "ports"}
+
+
+def parse_search_query(q: str) -> str:
+    """Translate a ``q`` string such as ``user:deploy port:5432 web``.
+
+    Terms are combined with AND. ``host:``, ``user:`` and ``port:`` restrict a
+    term to hostnames, user names or listening ports; other terms match any
+    of them. Free terms and hostnames match by prefix, user names and ports
+    exactly unless they end with ``*``. Returns an FTS5 query expression.
+    """
+    terms = []
+    for token in q.split():
+        key, sep, value = token.partition(":")
+        column = SEARCH_KEYS.get(key.lower()) if sep else None
+        if column is None:
+            value = token
+        prefix = value.endswith("*") or column in (None, "name")
+        value = value.rstrip("*")
+        if not value:
+            continue
+        expr = '"{}"'.format(value.replace('"', '""'))
+        if prefix:
+            expr += " *"
+        if column:
+            expr = f"{column} : {expr}"
+        terms.append(expr)
+    if not terms:
+        raise ValueError("empty search query")
+    return " AND ".join(terms)
+
+
+def query_hosts(
+    search=None,
+    sort=None,
+    order="asc",
+    filters=None,
+    fields=None,
+    limit=None,
+    cursor=None,
+    q=None,
+):
+    """Run the hosts query and return ``(documents, next_cursor)``.
+
+    Documents are JSON strings produced by SQLite, either the stored host
+    document or, when ``fields`` is given, an object with only those keys.
+    ``filters`` maps metric columns to ``(minimum, maximum)`` bounds, either
+    of which may be ``None``. Sorting and filtering use the indexed numeric
+    columns from :data:`autoconfig.facts.METRIC_COLUMNS`.
+
+    ``q`` runs a ranked full-text search (see :func:`parse_search_query`);
+    without an explicit ``sort`` matches are ordered by relevance.
+
+    With ``limit`` the result is a page ordered by the sort key and hostname;
+    ``next_cursor`` resumes after its last row and is ``None`` on the last
+    page. ``ValueError`` is raised for invalid fields, filters or cursors.
+    """
+    select_params = []
+    projection = _projection(fields, select_params)
+
+    clauses = []
+    params = []
+    source = "hosts"
+    if q:
+        with db.connect(DB_PATH) as conn:
+            if not db.has_search_index(conn):
+                raise ValueError("full-text search is not available")
+        source += " JOIN hosts_fts ON hosts_fts.rowid = hosts.rowid"
+        clauses.append("hosts_fts MATCH ?")
+        params.append(parse_search_query(q))
+    if search:
+        clauses.append("hostname LIKE ?")
+        params.append(f"%{search}%")
+    for column, (low, high) in (filters or {}).items():
+        if column not in METRIC_COLUMNS:
+            raise ValueError(f"unknown filter column: {column}")
+        if low is not None:
+            clauses.append(f"{column} >= ?")
+            params.append(low)
+        if high is not None:
+            clauses.append(f"{column} <= ?")
+            params.append(high)
+
+    order_field = None
+    descending = order is not None and order.lower() == "desc"
+    if q and not sort:
+        order_field = "hosts_fts.rank"
+    elif sort or limit is not None or cursor:
+        sort = SORT_ALIASES.get(sort, sort)
+        order_field = sort if sort in METRIC_COLUMNS else "hostname"
+    if cursor:
+        value, hostname = decode_cursor(cursor)
+        clauses.append(_after_cursor(order_field, descending, value, hostname, params))
+
+    query = f"SELECT {order_field or 'NULL'}, hostname, {projection} FROM {source}"
+    if clauses:
+        query += " WHERE " + " AND ".join(clauses)
+    if order_field:
+        direction = "DESC" if descending else "ASC"
+        query += f" ORDER BY {order_field} {direction}"
+        if order_field != "hostname":
+            query += f", hostname {direction}"
+    if limit is not None:
+        query += " LIMIT ?"
+        params.append(limit + 1)
+
+    with db.connect(DB_PATH) as conn:
+        rows = conn.execute(query, select_params + params).fetchall()
+
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(
+            last[1] if order_field == "hostname" else last[0], last[1]
+        )
+    return [r[2] for r in rows], next_cursor
+
+
+def get_hosts(search=None, sort=None, order="asc", filters=None, **kwargs):
+    """Return hosts filtered by search and ordered via SQL.
+
+    Accepts the same arguments as :func:`query_hosts` and returns the
+    decoded documents.
+    """
+    documents, _ = query_hosts(search, sort, order, filters, **kwargs)
+    return [json.loads(d) for d in documents]
+
+
+def _metric_filters(args):
+    """Parse ``<column>_min``/``<column>_max`` query parameters."""
+    filters = {}
+    for column in METRIC_COLUMNS:
+        low = args.get(f"{column}_min")
+        high = args.get(f"{column}_max")
+        if low is None and high is None:
+            continue
+        filters[column] = (
+            None if low is None else float(low),
+            None if high is None else float(high),
+        )
+    return filters
+
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    etag: str
+    last_modified: float
+    next_cursor: str | None = None
+    encoded: dict = field(default_factory=dict)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.body) + sum(len(body) for body in self.encoded.values())
+
+
+def _cached_hosts_response(key, updated_at, build):
+    """Return the serialized response for ``key``, building it on a miss.
+
+    ``build`` returns the JSON documents of the page and the next cursor.
+    The first two items of ``key`` are the database and data generation;
+    entries of older generations are dropped when a newer one is cached.
+    """
+    entry = HOSTS_CACHE.get(key)
+    if entry is None:
+        documents, next_cursor = build()
+        body = ("[" + ",".join(documents) + "]").encode()
+        etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+        entry = CachedResponse(body, etag, updated_at, next_cursor)
+        HOSTS_CACHE.discard(lambda k: k[0] == key[0] and k[1] < key[1])
+        HOSTS_CACHE.set(key, entry)
+    encoding = None
+    if len(entry.body) >= compression.MIN_SIZE:
+        encoding = compression.choose_encoding(request.accept_encodings)
+    if encoding:
+        body = entry.encoded.get(encoding)
+        if body is None:
+            body = entry.encoded[encoding] = compression.encode(entry.body, encoding)
+            # Re-measure the entry now that it holds another copy.
+            HOSTS_CACHE.set(key, entry)
+        response = app.response_class(body, mimetype="application/json")
+        response.headers["Content-Encoding"] = encoding
+        response.set_etag(f"{entry.etag}-{encoding}")
+    else:
+        response = app.response_class(entry.body, mimetype="application/json")
+        response.set_etag(entry.etag)
+    response.vary.add("Accept-Encoding")
+    response.last_modified = datetime.fromtimestamp(entry.last_modified, timezone.utc)
+    response.cache_control.no_cache = True
+    if entry.next_cursor:
+        response.headers["X-Next-Cursor"] = entry.next_cursor
+    return response.make_conditional(request)
 
 
 @app.route("/api/hosts")
@@ -360,8 +773,195 @@ def hosts():
     search = request.args.get("search")
     sort = request.args.get("sort")
     order = request.args.get("order", "asc")
-    hosts_list = get_hosts(search=search, sort=sort, order=order)
-    return jsonify(hosts_list)
+    cursor = request.args.get("cursor")
+    q = request.args.get("q")
+    fields = request.args.get("fields")
+    fields = tuple(f for f in fields.split(",") if f) if fields else None
+    try:
+        filters = _metric_filters(request.args)
+    except ValueError:
+        return jsonify({"error": "invalid filter"}), 400
+    try:
+        limit = request.args.get("limit")
+        limit = None if limit is None else int(limit)
+    except ValueError:
+        return jsonify({"error": "invalid pagination"}), 400
+    if limit is not None and not 0 < limit <= MAX_PAGE_SIZE:
+        return jsonify({"error": "invalid pagination"}), 400
+    with db.connect(DB_PATH) as conn:
+        generation, updated_at = db.get_generation(conn)
+    key = (
+        str(DB_PATH),
+        generation,
+        search,
+        sort,
+        order,
+        tuple(sorted(filters.items())),
+        fields,
+        limit,
+        cursor,
+        q,
+    )
+    try:
+        return _cached_hosts_response(
+            key,
+            updated_at,
+            lambda: query_hosts(
+                search=search,
+                sort=sort,
+                order=order,
+                filters=filters,
+                fields=fields,
+                limit=limit,
+                cursor=cursor,
+                q=q,
+            ),
+        )
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+
+# Units accepted in the ``step`` parameter of the history endpoint.
+STEP_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+# Upper bound of times and steps, the end of year 9999. Larger values do not
+# fit the 64-bit integers SQLite binds.
+MAX_TIMESTAMP = 253402300799
+
+
+def _parse_time(value, default: float) -> float:
+    """Parse a Unix timestamp or ISO 8601 date, ``ValueError`` if invalid."""
+    if value is None or value == "":
+        return default
+    try:
+        ts = float(value)
+    except ValueError:
+        parsed = datetime.fromisoformat(value)
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        ts = parsed.timestamp()
+    if not -MAX_TIMESTAMP <= ts <= MAX_TIMESTAMP:
+        raise ValueError("time out of range")
+    return ts
+
+
+def _parse_step(value) -> int | None:
+    """Parse ``300``, ``5m``, ``1h`` or ``1d`` into seconds."""
+    if not value:
+        return None
+    unit = STEP_UNITS.get(value[-1])
+    number = value[:-1] if unit else value
+    step = int(number) * (unit or 1)
+    if not 0 < step <= MAX_TIMESTAMP:
+        raise ValueError("step out of range")
+    return step
+
+
+@app.route("/api/v1/hosts/<hostname>/history")
+@require_auth
+def host_history(hostname):
+    """Return the time series of one metric of a host.
+
+    ``metric`` is a metric column or one of the legacy sort keys; ``from``
+    and ``to`` default to the last 24 hours and ``step`` to a resolution of
+    at most ``history.MAX_POINTS`` points.
+    """
+    metric = request.args.get("metric", "")
+    metric = SORT_ALIASES.get(metric, metric)
+    if metric not in METRIC_COLUMNS:
+        return jsonify({"error": "unknown metric"}), 400
+    try:
+        end = _parse_time(
+            request.args.get("to"), datetime.now(timezone.utc).timestamp()
+        )
+        start = _parse_time(request.args.get("from"), end - history.DAY)
+        step = _parse_step(request.args.get("step"))
+    except ValueError:
+        return jsonify({"error": "invalid range"}), 400
+    if start > end:
+        return jsonify({"error": "invalid range"}), 400
+    with db.connect(DB_PATH) as conn:
+        known = conn.execute(
+            "SELECT 1 FROM history_hosts WHERE hostname = ?", (hostname,)
+        ).fetchone()
+        if not known:
+            return jsonify({"error": "Host not found"}), 404
+        tier, step, points = history.query(
+            conn,
+            hostname,
+            metric,
+            start,
+            end,
+            step or history.default_step(start, end),
+        )
+    return jsonify(
+        {
+            "hostname": hostname,
+            "metric": metric,
+            "from": int(start),
+            "to": int(end),
+            "step": step,
+            "resolution": tier.step,
+            "points": points,
+        }
+    )
+
+
+# Seconds between keep-alive comments on idle event streams.
+SSE_HEARTBEAT_SECONDS = 15.0
+# Scope and lifetime of the tokens browsers pass in the stream URL.
+STREAM_SCOPE = "stream"
+STREAM_TOKEN_SECONDS = 60
+
+
+@app.route("/api/v1/hosts/stream/token", methods=["POST"])
+@require_auth
+def hosts_stream_token():
+    """Issue a short-lived token for ``/api/v1/hosts/stream?token=...``."""
+    token = create_token(
+        g.user["sub"], g.user["role"], STREAM_TOKEN_SECONDS, scope=STREAM_SCOPE
+    )
+    return jsonify({"token": token, "expires_in": STREAM_TOKEN_SECONDS})
+
+
+@app.route("/api/v1/hosts/stream")
+def hosts_stream():
+    """Push an event whenever the host data generation changes.
+
+    Each ``hosts`` event carries the new generation as its ``id``; clients
+    refetch ``/api/hosts`` when they receive one. A reconnecting client
+    sending ``Last-Event-ID`` only gets an event if the data changed since.
+    Besides the ``Authorization`` header a stream token is accepted in the
+    ``token`` query parameter; it is only checked when the stream opens.
+    """
+    if not authenticate(query_scope=STREAM_SCOPE):
+        return "", 401
+    try:
+        known = int(request.headers["Last-Event-ID"])
+    except (KeyError, ValueError):
+        known = None
+    watcher = events.get_watcher(DB_PATH)
+
+    def stream():
+        nonlocal known
+        with watcher.subscribe():
+            yield "retry: 5000\n\n"
+            while True:
+                generation = watcher.wait(known, SSE_HEARTBEAT_SECONDS)
+                if generation is None or generation == known:
+                    yield ": keep-alive\n\n"
+                    continue
+                known = generation
+                yield events.format_event(
+                    "hosts",
+                    {"generation": generation, "updated_at": watcher.updated_at},
+                    event_id=generation,
+                )
+
+    return app.response_class(
+        stream(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @app.route("/api/v1/templates", methods=["POST"])
@@ -426,9 +1026,198 @@ def delete_template_endpoint(template_id):
 @app.route("/api/reload", methods=["POST"])
 @require_roles("admin", "operator")
 def reload_data_endpoint():
-    """Reload host information from ``DATA_JSON``. Requires authentication."""
+    """Reload host information from ``DATA_JSON``. Requires authentication.
+
+    ``?host=a,b`` reloads only the listed hosts.
+    """
+    host = request.args.get("host")
+    stats = load_data(host.split(",") if host else None)
+    events.get_watcher(DB_PATH).check_now()
+    return jsonify({"status": "reloaded", **stats})
+
+
+NDJSON_TYPES = {"application/x-ndjson", "application/jsonl", "application/ndjson"}
+# Accepted documents of a batch are kept in memory up to this many bytes of
+# canonical JSON and spooled to a temporary file beyond.
+BATCH_SPOOL_BYTES = 8 * 2**20
+# ``Retry-After`` seconds of a batch rejected because the database is busy.
+BATCH_RETRY_SECONDS = 5
+
+
+class BatchError(ValueError):
+    """The body of a batch ingest is not a JSON array or NDJSON."""
+
+
+class _InputStream(io.RawIOBase):
+    """File object over a WSGI input stream for :mod:`io` wrappers.
+
+    WSGI only requires ``read``; gunicorn's input, for example, lacks the
+    ``readable`` method that :class:`io.TextIOWrapper` needs.
+    """
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self._stream.read(len(buffer))
+        buffer[: len(data)] = data
+        return len(data)
+
+
+def _iter_ndjson(fp):
+    """Yield ``(document, error)`` for every non-empty line of ``fp``."""
+    for line in fp:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line), None
+        except ValueError as exc:
+            yield None, f"invalid JSON: {exc}"
+
+
+def _iter_array(fp):
+    try:
+        for doc in jsonstream.iter_json_array(fp):
+            yield doc, None
+    except ValueError as exc:
+        raise BatchError(str(exc)) from None
+
+
+def _check_metrics(metrics):
+    """Raise ``ValueError`` unless every metric of a host is storable.
+
+    Pushed documents may carry typed fields (``load``, ``memory_bytes``,
+    ...) of any type; :func:`facts.host_metrics` passes them through, so a
+    value that is not a finite number within the 64-bit range of SQLite and
+    of the scaled history columns is rejected here.
+    """
+    for column, value in metrics.items():
+        if value is None:
+            continue
+        limit = 2**63 // history.SCALE.get(column, 1)
+        if (
+            isinstance(value, bool)
+            or not isinstance(value, (int, float))
+            or not math.isfinite(value)
+            or abs(value) >= limit
+        ):
+            raise ValueError(f"{column} must be a number")
+
+
+def _ingest_documents(documents, results):
+    """Validate ``(document, error)`` pairs and yield the accepted hosts.
+
+    One status entry per document is appended to ``results``.
+    """
+    for index, (doc, error) in enumerate(documents):
+        hostname = doc.get("hostname") if isinstance(doc, dict) else None
+        if error is None and not isinstance(doc, dict):
+            error = "host document must be an object"
+        elif error is None and (not isinstance(hostname, str) or not hostname):
+            error = "hostname required"
+        if error is None:
+            try:
+                doc = facts.normalize(doc)
+                _check_metrics(facts.host_metrics(doc))
+                db.search_row(doc)
+            except (TypeError, ValueError, AttributeError, OverflowError) as exc:
+                error = f"invalid facts: {exc}"
+        if error is not None:
+            results.append({"index": index, "status": "rejected", "error": error})
+            continue
+        results.append({"index": index, "hostname": hostname, "status": "accepted"})
+        yield doc
+
+
+def _spool_documents(documents, spool):
+    """Write accepted documents to ``spool``; return their names and hashes."""
+    keys = []
+    for doc in documents:
+        data, digest = db.serialize_host(doc)
+        spool.write(data + "\n")
+        keys.append((doc["hostname"], digest))
+    return keys
+
+
+def _iter_spooled(spool, keys):
+    spool.seek(0)
+    for (hostname, digest), line in zip(keys, spool):
+        yield db.SerializedHost(hostname, line[:-1], digest)
+
+
+@app.route("/api/v1/hosts:batch", methods=["POST"])
+@require_roles("admin", "operator")
+def hosts_batch():
+    """Upsert pushed host documents without pruning missing hosts.
+
+    The body is a JSON array or, with an NDJSON content type, one document
+    per line, optionally gzip encoded. It is parsed and validated while it
+    streams in, and the accepted documents are written in one transaction
+    once the body is complete, so a slow client does not hold the database
+    write lock.
+    """
+    stream = request.stream
+    if not hasattr(stream, "readable"):
+        stream = io.BufferedReader(_InputStream(stream))
+    if request.headers.get("Content-Encoding", "").lower() == "gzip":
+        stream = gzip.GzipFile(fileobj=stream)
+    elif request.headers.get("Content-Encoding", "identity") != "identity":
+        return jsonify({"error": "unsupported content encoding"}), 415
+    fp = io.TextIOWrapper(stream, encoding="utf-8")
+    if request.mimetype in NDJSON_TYPES:
+        documents = _iter_ndjson(fp)
+    else:
+        documents = _iter_array(fp)
+    results = []
+    with tempfile.SpooledTemporaryFile(
+        BATCH_SPOOL_BYTES, mode="w+", encoding="utf-8"
+    ) as spool:
+        try:
+            keys = _spool_documents(_ingest_documents(documents, results), spool)
+        except (BatchError, UnicodeDecodeError, OSError, EOFError) as exc:
+            return jsonify({"error": f"invalid body: {exc}"}), 400
+        try:
+            with db.connect(DB_PATH) as conn:
+                stats = db.sync_hosts(
+                    conn,
+                    _iter_spooled(spool, keys),
+                    prune=False,
+                    source=db.SOURCE_PUSH,
+                )
+        except sqlite3.OperationalError as exc:
+            logger.warning("Batch ingest failed: %s", exc)
+            return (
+                jsonify({"error": f"database unavailable: {exc}"}),
+                503,
+                {"Retry-After": str(BATCH_RETRY_SECONDS)},
+            )
+    if stats["added"] or stats["changed"]:
+        events.get_watcher(DB_PATH).check_now()
+    accepted = sum(r["status"] == "accepted" for r in results)
+    return jsonify(
+        {
+            "accepted": accepted,
+            "rejected": len(results) - accepted,
+            "added": stats["added"],
+            "changed": stats["changed"],
+            "hosts": results,
+        }
+    )
+
+
+def create_app():
+    """Configure logging, load the host data and return the WSGI app.
+
+    Used by servers that import the app, e.g.
+    ``gunicorn -k gevent 'autoconfig.server:create_app()'``.
+    """
+    configure_logging()
+    init_db()
     load_data()
-    return jsonify({"status": "reloaded"})
+    return app
 
 
 @app.route("/")
@@ -460,8 +1249,8 @@ if __name__ == "__main__":
     RESULTS_DIR = Path(args.results_dir)
     DB_PATH = RESULTS_DIR / "data.db"
     DATA_JSON = RESULTS_DIR / "data.json"
+    DATA_SNAPSHOT = RESULTS_DIR / snapshot.SNAPSHOT_FILE
 
-    init_db()
-    load_data()
+    create_app()
     logger.info("Starting Flask server on port %s", args.port)
     app.run(host="0.0.0.0", port=args.port)
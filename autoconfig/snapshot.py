@@ -0,0 +1,177 @@
+"""Binary snapshot of the fleet with a hostname index.
+
+``data.snap`` holds the same host documents as ``data.json`` in a layout
+that can be memory-mapped::
+
+    header   MAGIC
+    records  <u32 length><canonical JSON document>   one per host
+    names    hostnames, UTF-8, concatenated
+    index    <u64 offset><u32 length><u64 name offset><u32 name length>
+             <16 byte content hash>                   sorted by hostname
+    footer   <u64 names offset><u64 index offset><u64 count>MAGIC
+
+Documents are stored in the canonical form of
+:func:`~autoconfig.db.serialize_host` together with their content hash, so
+a reload can compare hashes with the database and only parse the hosts
+that changed. The sorted fixed-size index allows looking up a single host
+with a binary search instead of reading the whole file.
+"""
+
+import json
+import mmap
+import os
+import struct
+from pathlib import Path
+
+from . import db
+
+SNAPSHOT_FILE = "data.snap"
+MAGIC = b"ACSNAP01"
+
+_LENGTH = struct.Struct("<I")
+_ENTRY = struct.Struct("<QIQI16s")
+_FOOTER = struct.Struct("<QQQ8s")
+
+
+class SnapshotWriter:
+    """Write a snapshot to ``path``, replacing it atomically on close.
+
+    Use as a context manager; the file is only replaced if the block
+    completes without an exception.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._tmp = self.path.with_name(f".{self.path.name}.tmp")
+        self._f = open(self._tmp, "wb")
+        self._f.write(MAGIC)
+        self._entries = {}
+
+    def write(self, host):
+        hostname = host.get("hostname") if isinstance(host, dict) else None
+        if not isinstance(hostname, str) or not hostname:
+            return
+        data, digest = db.serialize_host(host)
+        payload = data.encode()
+        offset = self._f.tell()
+        self._f.write(_LENGTH.pack(len(payload)))
+        self._f.write(payload)
+        # A later document of the same host wins, as in ``db.sync_hosts``.
+        self._entries[hostname.encode()] = (offset, len(payload), digest)
+
+    def tee(self, hosts):
+        """Write each of ``hosts`` and yield it on to the caller."""
+        for host in hosts:
+            self.write(host)
+            yield host
+
+    def close(self):
+        names_offset = self._f.tell()
+        name_offsets = {}
+        for name in sorted(self._entries):
+            name_offsets[name] = self._f.tell() - names_offset
+            self._f.write(name)
+        index_offset = self._f.tell()
+        for name in sorted(self._entries):
+            offset, length, digest = self._entries[name]
+            self._f.write(
+                _ENTRY.pack(
+                    offset, length, name_offsets[name], len(name), bytes.fromhex(digest)
+                )
+            )
+        self._f.write(
+            _FOOTER.pack(names_offset, index_offset, len(self._entries), MAGIC)
+        )
+        self._f.close()
+        os.replace(self._tmp, self.path)
+
+    def abort(self):
+        self._f.close()
+        self._tmp.unlink(missing_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class Snapshot:
+    """Read-only, memory-mapped view of a snapshot file.
+
+    ``ValueError`` is raised for files that are not snapshots.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < len(MAGIC) + _FOOTER.size:
+                raise ValueError(f"{self.path} is not a snapshot")
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        footer = self._map[size - _FOOTER.size :]
+        self._names, self._index, self._count, magic = _FOOTER.unpack(footer)
+        if self._map[: len(MAGIC)] != MAGIC or magic != MAGIC:
+            self._map.close()
+            raise ValueError(f"{self.path} is not a snapshot")
+
+    def close(self):
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self._count
+
+    def _entry(self, i: int):
+        offset, length, name_offset, name_length, digest = _ENTRY.unpack_from(
+            self._map, self._index + i * _ENTRY.size
+        )
+        start = self._names + name_offset
+        return self._map[start : start + name_length], offset, length, digest
+
+    def _record(self, i: int) -> db.SerializedHost:
+        name, offset, length, digest = self._entry(i)
+        start = offset + _LENGTH.size
+        data = self._map[start : start + length].decode()
+        return db.SerializedHost(name.decode(), data, digest.hex())
+
+    def _find(self, hostname: str):
+        key = hostname.encode()
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._entry(mid)[0] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._count and self._entry(lo)[0] == key:
+            return lo
+        return None
+
+    def record(self, hostname: str) -> db.SerializedHost | None:
+        """Return the serialized document of ``hostname`` without parsing it."""
+        i = self._find(hostname)
+        return None if i is None else self._record(i)
+
+    def get(self, hostname: str) -> dict | None:
+        record = self.record(hostname)
+        return None if record is None else json.loads(record.data)
+
+    def __contains__(self, hostname: str) -> bool:
+        return self._find(hostname) is not None
+
+    def __iter__(self):
+        """Yield every host as a :class:`~autoconfig.db.SerializedHost`."""
+        for i in range(self._count):
+            yield self._record(i)
+
+    def hostnames(self) -> list[str]:
+        return [self._entry(i)[0].decode() for i in range(self._count)]
@@ -0,0 +1,252 @@
+"""Remote fact collection over SSH.
+
+All fact commands are bundled into one probe script that runs in a single
+``ssh host sh -s`` session. Its output is split into sections by a random
+marker line, so a host costs one SSH round trip instead of one per fact.
+
+Sessions run over persistent OpenSSH master connections (``ControlMaster``
+and ``ControlPersist``) managed by :class:`MasterPool`, so the key exchange
+is paid once per host instead of once per command and run.
+"""
+
+import logging
+import os
+import secrets
+import subprocess
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONTROL_DIR = Path(
+    os.environ.get(
+        "AUTOCONFIG_SSH_CONTROL_DIR", Path.home() / ".cache" / "autoconfig" / "ssh"
+    )
+)
+CONTROL_PERSIST_SECONDS = 600
+MAX_MASTERS = 64
+# Seconds an ``ssh -O check`` or ``-O exit`` may take before the master is
+# treated as unusable.
+CONTROL_TIMEOUT_SECONDS = 10
+
+# Shell commands producing each raw fact, in collection order.
+PROBE_COMMANDS = {
+    "hostname": "hostname",
+    "users": "getent passwd",
+    "ports": "ss -tulwn",
+    "disk": "df -h --output=size,used,avail,pcent / | tail -n 1",
+    "memory": "free -m | grep 'Mem:'",
+    "cpu_load": "cat /proc/loadavg",
+    "net": "cat /proc/net/dev",
+    "sensors": "sensors",
+}
+# Sections that are reported empty instead of failing when the command is
+# missing or exits with an error.
+OPTIONAL_SECTIONS = {"ports", "sensors"}
+
+
+def build_probe_script(marker: str, sections=None) -> str:
+    """Return a POSIX shell script printing every section between markers."""
+    lines = [f"M='{marker}'"]
+    for name in sections or PROBE_COMMANDS:
+        lines.append(f"printf '%s begin {name}\\n' \"$M\"")
+        lines.append(f"({PROBE_COMMANDS[name]}) </dev/null 2>/dev/null")
+        lines.append(f'printf \'\\n%s end {name} %s\\n\' "$M" "$?"')
+    return "\n".join(lines) + "\n"
+
+
+def parse_probe_output(output: str, marker: str) -> dict:
+    """Split probe output into ``{section: (exit_status, text)}``."""
+    results = {}
+    name = None
+    lines = []
+    for line in output.splitlines():
+        if not line.startswith(marker + " "):
+            if name is not None:
+                lines.append(line)
+            continue
+        fields = line.split()
+        if fields[1] == "begin" and len(fields) == 3:
+            name, lines = fields[2], []
+        elif fields[1] == "end" and len(fields) == 4 and fields[2] == name:
+            # Drop the newline the script adds before the end marker.
+            if lines and lines[-1] == "":
+                lines.pop()
+            text = "\n".join(lines) + "\n" if lines else ""
+            results[name] = (int(fields[3]), text)
+            name = None
+    return results
+
+
+class MasterPool:
+    """Persistent multiplexed SSH master connections, one per host.
+
+    Masters are started explicitly, which makes the handshake measurable,
+    and survive for ``persist`` seconds after their last use so repeated
+    runs, even from new processes sharing ``control_dir``, skip the key
+    exchange. At most ``max_masters`` are kept open; the least recently
+    used one is closed when the cap is exceeded.
+    """
+
+    def __init__(
+        self,
+        control_dir=DEFAULT_CONTROL_DIR,
+        max_masters: int = MAX_MASTERS,
+        persist: int = CONTROL_PERSIST_SECONDS,
+    ):
+        self.control_dir = Path(control_dir)
+        self.max_masters = max_masters
+        self.persist = persist
+        # host -> monotonic time of last use, least recently used first
+        self._masters: OrderedDict[str, float] = OrderedDict()
+        self._host_locks: dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _ssh(self, *args: str) -> list[str]:
+        return ["ssh", "-o", f"ControlPath={self.control_dir / '%C'}", *args]
+
+    def client_options(self, host: str) -> list[str]:
+        """``ssh`` options running a command over the master of ``host``."""
+        return self._ssh("-o", "ControlMaster=no")[1:]
+
+    def _control(self, host: str, command: str) -> bool:
+        try:
+            proc = subprocess.run(
+                self._ssh("-O", command, host),
+                capture_output=True,
+                check=False,
+                timeout=CONTROL_TIMEOUT_SECONDS,
+            )
+        except subprocess.TimeoutExpired:
+            logger.debug("ssh -O %s for %s timed out", command, host)
+            return False
+        return proc.returncode == 0
+
+    def _alive(self, host: str) -> bool:
+        last_used = self._masters.get(host)
+        # ControlPersist keeps a master open this long after its last use.
+        if last_used is not None and time.monotonic() - last_used < self.persist / 2:
+            return True
+        return self._control(host, "check")
+
+    def ensure(self, host: str, timeout: float | None = None) -> float:
+        """Make sure a master for ``host`` is running.
+
+        Returns the seconds spent on the SSH handshake, ``0.0`` when an
+        existing master was reused.
+        """
+        with self._lock:
+            host_lock = self._host_locks.setdefault(host, threading.Lock())
+        handshake = 0.0
+        with host_lock:
+            if not self._alive(host):
+                self.control_dir.mkdir(parents=True, exist_ok=True, mode=0o700)
+                start = time.perf_counter()
+                subprocess.run(
+                    self._ssh(
+                        "-o",
+                        "ControlMaster=yes",
+                        "-o",
+                        f"ControlPersist={self.persist}",
+                        "-N",
+                        "-f",
+                        host,
+                    ),
+                    stdin=subprocess.DEVNULL,
+                    capture_output=True,
+                    check=True,
+                    timeout=timeout,
+                )
+                handshake = time.perf_counter() - start
+                logger.debug("Opened SSH master for %s in %.3fs", host, handshake)
+        evicted = []
+        with self._lock:
+            self._masters[host] = time.monotonic()
+            self._masters.move_to_end(host)
+            while len(self._masters) > self.max_masters:
+                evicted.append(self._masters.popitem(last=False)[0])
+        for name in evicted:
+            logger.debug("Closing least recently used SSH master for %s", name)
+            self._control(name, "exit")
+        return handshake
+
+    def close(self, host: str | None = None):
+        """Close the master of ``host`` or of every known host."""
+        with self._lock:
+            hosts = [host] if host else list(self._masters)
+            for name in hosts:
+                self._masters.pop(name, None)
+        for name in hosts:
+            self._control(name, "exit")
+
+    def __len__(self):
+        return len(self._masters)
+
+
+# Shared pool of the process; ``None`` disables multiplexing.
+MASTERS: MasterPool | None = MasterPool()
+
+
+def ssh_command(
+    host: str,
+    *command: str,
+    timings: dict | None = None,
+    timeout: float | None = None,
+) -> list[str]:
+    """Return the ``ssh`` invocation running ``command`` on ``host``.
+
+    With :data:`MASTERS` set the master connection is established first and
+    its handshake time is recorded in ``timings``.
+    """
+    options = []
+    if MASTERS is not None:
+        handshake = MASTERS.ensure(host, timeout=timeout)
+        if timings is not None:
+            timings["handshake"] = timings.get("handshake", 0.0) + handshake
+        options = MASTERS.client_options(host)
+    return ["ssh", *options, host, *command]
+
+
+def run_probe(
+    host: str,
+    sections=None,
+    timeout: float | None = None,
+    timings: dict | None = None,
+) -> dict:
+    """Collect the raw output of ``sections`` from ``host`` in one session.
+
+    Returns ``{section: text}``. A failing required section raises
+    :class:`subprocess.CalledProcessError` like a failing ``ssh host cmd``.
+    ``timings`` receives the ``handshake`` and ``command`` durations.
+    """
+    sections = list(sections or PROBE_COMMANDS)
+    marker = f"__AUTOCONFIG_{secrets.token_hex(8)}__"
+    command = ssh_command(host, "sh", "-s", timings=timings, timeout=timeout)
+    start = time.perf_counter()
+    proc = subprocess.run(
+        command,
+        input=build_probe_script(marker, sections),
+        capture_output=True,
+        text=True,
+        check=True,
+        timeout=timeout,
+    )
+    if timings is not None:
+        timings["command"] = timings.get("command", 0.0) + (time.perf_counter() - start)
+    results = parse_probe_output(proc.stdout, marker)
+    outputs = {}
+    for name in sections:
+        status, text = results.get(name, (None, ""))
+        if status != 0:
+            if name not in OPTIONAL_SECTIONS:
+                raise subprocess.CalledProcessError(
+                    status if status is not None else -1,
+                    PROBE_COMMANDS[name],
+                    output=text,
+                    stderr=proc.stderr,
+                )
+            text = ""
+        outputs[name] = text
+    return outputs
@@ -0,0 +1,94 @@
+"""Per-host collection state for incremental runs.
+
+The state file maps every collected host to the time its volatile and
+stable sections were last collected, the content hash of its fact document
+and the facts file it was written to. Incremental runs use it to skip hosts
+that are still fresh, to collect only the cheap volatile sections while the
+stable ones are recent, and to leave unchanged files alone.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+STATE_FILE = "collect_state.json"
+DEFAULT_TTL = 300
+DEFAULT_STABLE_TTL = 3600
+
+# Cheap sections that change between runs; ``hostname`` names the file.
+VOLATILE_SECTIONS = ("hostname", "disk", "memory", "cpu_load", "net", "sensors")
+# Expensive sections that rarely change.
+STABLE_SECTIONS = ("users", "ports")
+
+
+class CollectionState:
+    """Thread-safe view of the state file of one results directory."""
+
+    def __init__(
+        self,
+        path,
+        ttl: float = DEFAULT_TTL,
+        stable_ttl: float = DEFAULT_STABLE_TTL,
+        clock=time.time,
+    ):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.stable_ttl = stable_ttl
+        self.clock = clock
+        self._lock = threading.Lock()
+        try:
+            with open(self.path) as f:
+                self._hosts = json.load(f)
+        except FileNotFoundError:
+            self._hosts = {}
+        except (OSError, ValueError):
+            logger.warning("Ignoring unreadable collection state %s", self.path)
+            self._hosts = {}
+
+    def get(self, host: str) -> dict | None:
+        with self._lock:
+            entry = self._hosts.get(host)
+            return dict(entry) if entry else None
+
+    def is_fresh(self, host: str) -> bool:
+        """Whether ``host`` was collected less than ``ttl`` seconds ago."""
+        entry = self.get(host)
+        return bool(entry) and self.clock() - entry["collected_at"] < self.ttl
+
+    def sections(self, host: str):
+        """Sections to collect for ``host``; ``None`` means all of them."""
+        entry = self.get(host)
+        if entry and self.clock() - entry["stable_at"] < self.stable_ttl:
+            return list(VOLATILE_SECTIONS)
+        return None
+
+    def record(self, host: str, digest: str, filename: str, full: bool = True):
+        """Store a collection of ``host``.
+
+        Returns ``True`` when the content hash differs from the last one.
+        """
+        now = self.clock()
+        with self._lock:
+            entry = self._hosts.get(host) or {}
+            changed = entry.get("hash") != digest
+            self._hosts[host] = {
+                "collected_at": now,
+                "stable_at": now if full else entry.get("stable_at", 0),
+                "hash": digest,
+                "file": filename,
+            }
+        return changed
+
+    def save(self):
+        """Write the state file atomically."""
+        with self._lock:
+            data = json.dumps(self._hosts, sort_keys=True, indent=1)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w") as f:
+            f.write(data)
+        os.replace(tmp, self.path)
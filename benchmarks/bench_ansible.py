@@ -0,0 +1,88 @@
+"""Wall-clock collection time of per-host versus batched playbook runs.
+
+A fake ``ansible-playbook`` (see ``fake_ansible_playbook.py``) stands in for
+Ansible; its startup and fact-gathering costs are set with the options
+below. Run from the project root::
+
+    python benchmarks/bench_ansible.py --hosts 500
+"""
+
+import argparse
+import logging
+import os
+import stat
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from autoconfig import collect_and_visualize as cav  # noqa: E402
+
+
+def install_fake(bin_dir: Path):
+    fake = bin_dir / "ansible-playbook"
+    fake.write_text(
+        f"#!/bin/sh\nexec {sys.executable} "
+        f"{ROOT / 'benchmarks' / 'fake_ansible_playbook.py'} \"$@\"\n"
+    )
+    fake.chmod(fake.stat().st_mode | stat.S_IEXEC)
+
+
+def timed_run(tmp: Path, name: str, hosts, workers: int, mode: str, playbook):
+    cav.RESULTS_DIR = tmp / name
+    cav.RESULTS_DIR.mkdir()
+    cav.DB_PATH = cav.RESULTS_DIR / "data.db"
+    cav.ANSIBLE_MODE = mode
+    cav.PLAYBOOK = playbook
+    start = time.perf_counter()
+    summary = cav.run_playbook(hosts, max_workers=workers, timeout=None)
+    elapsed = time.perf_counter() - start
+    assert summary.as_dict()["ok"] == len(hosts)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hosts", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--startup", type=float, default=0.5)
+    parser.add_argument("--gather-full", type=float, default=1.0)
+    parser.add_argument("--gather-min", type=float, default=0.2)
+    parser.add_argument("--tasks", type=float, default=0.3)
+    args = parser.parse_args()
+    logging.getLogger("autoconfig").setLevel(logging.WARNING)
+
+    hosts = [f"host{i:05d}" for i in range(args.hosts)]
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        (tmp / "bin").mkdir()
+        install_fake(tmp / "bin")
+        os.environ["PATH"] = f"{tmp / 'bin'}:{os.environ['PATH']}"
+        os.environ["FAKE_ANSIBLE_STARTUP"] = str(args.startup)
+        os.environ["FAKE_ANSIBLE_GATHER_FULL"] = str(args.gather_full)
+        os.environ["FAKE_ANSIBLE_GATHER_MIN"] = str(args.gather_min)
+        os.environ["FAKE_ANSIBLE_TASKS"] = str(args.tasks)
+
+        # The playbook as it was before gather_subset was restricted.
+        full = tmp / "collect_facts_full.yml"
+        text = cav.PLAYBOOK.read_text()
+        subset = '  gather_subset:\n    - "!all"\n'
+        assert subset in text
+        full.write_text(text.replace(subset, ""))
+        runs = [
+            ("per-host, full facts", "per-host", full),
+            ("per-host, minimal facts", "per-host", cav.PLAYBOOK),
+            ("batch, minimal facts", "batch", cav.PLAYBOOK),
+        ]
+        playbook = cav.PLAYBOOK
+        for index, (label, mode, path) in enumerate(runs):
+            elapsed = timed_run(tmp, f"run{index}", hosts, args.workers, mode, path)
+            print(f"{label:<26} {elapsed:8.2f} s for {args.hosts} hosts")
+        cav.PLAYBOOK = playbook
+
+
+if __name__ == "__main__":
+    main()
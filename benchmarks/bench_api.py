@@ -0,0 +1,278 @@
+"""API throughput, tail latency and memory per endpoint at fleet scale.
+
+Run from the project root::
+
+    python benchmarks/bench_api.py --sizes 1000,10000 --json api.json
+    python benchmarks/bench_api.py --sizes 100000 --seconds 10
+
+For every fleet size a synthetic fleet (see ``fleet.py``, ``large`` profile
+by default) is written to ``data.json`` and served by the API in a separate
+process using werkzeug's threaded server. Concurrent clients then drive one
+endpoint at a time for ``--seconds``. For each endpoint the throughput,
+p50/p95/p99 latency, error count and the server's resident and peak
+memory are reported. The anonymous part of the resident memory (heap and
+other private allocations) is shown separately, because pages of the
+memory-mapped database count once per pooled connection that maps them.
+Requests within an endpoint vary their parameters where that matters, so
+the per-generation response cache is not hit every time. ``--json`` saves
+the results for regression comparison.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "benchmarks"))
+
+from autoconfig import server  # noqa: E402
+from fleet import PROFILES, write_fleet  # noqa: E402
+
+SECRET = "benchmark-secret-with-a-reasonable-length"
+
+
+def serve(args):
+    """Child process: load ``--dir`` into a fresh database and serve it."""
+    from werkzeug.serving import make_server
+
+    results = Path(args.dir)
+    server.RESULTS_DIR = results
+    server.DB_PATH = results / "data.db"
+    server.DATA_JSON = results / "data.json"
+    server.DATA_SNAPSHOT = results / "none.snap"
+    server.JWT_SECRET = SECRET
+    server.init_db()
+    start = time.perf_counter()
+    server.load_data()
+    load_seconds = time.perf_counter() - start
+    for i in range(args.templates):
+        server.create_template(f"template{i % 50}", None, {"index": i})
+    httpd = make_server("127.0.0.1", 0, server.app, threaded=True)
+    print(json.dumps({"port": httpd.server_port, "load_seconds": load_seconds}))
+    sys.stdout.flush()
+    httpd.serve_forever()
+
+
+class Endpoint:
+    def __init__(self, name, path, method="GET", body=None, clients=None, limit=None):
+        self.name = name
+        self.path = path if callable(path) else (lambda rng, p=path: p)
+        self.method = method
+        self.body = body
+        # Overrides for expensive endpoints.
+        self.clients = clients
+        self.limit = limit
+
+
+def endpoints(hosts, full_max):
+    def host(rng):
+        return f"host{rng.randrange(hosts):06d}"
+
+    login = json.dumps({"username": "admin", "password": "admin"})
+    result = [
+        Endpoint("hosts_page", "/api/hosts?limit=100"),
+        Endpoint(
+            "hosts_sorted",
+            "/api/hosts?sort=load1&order=desc&limit=100"
+            "&fields=hostname,load1,mem_used,disk_used_pct",
+        ),
+        Endpoint(
+            "hosts_filtered",
+            lambda rng: f"/api/hosts?load1_min={rng.uniform(0, 8):.3f}&limit=100",
+        ),
+        Endpoint(
+            "hosts_search",
+            lambda rng: f"/api/hosts?q=user:user{rng.randrange(300)}&limit=50",
+        ),
+        Endpoint(
+            "host_history",
+            lambda rng: f"/api/v1/hosts/{host(rng)}/history?metric=load1",
+        ),
+        Endpoint("templates", "/api/v1/templates"),
+        Endpoint("login", "/auth/login", "POST", login),
+        Endpoint("reload", "/api/reload", "POST", clients=1, limit=3),
+    ]
+    if hosts <= full_max:
+        result.append(Endpoint("hosts_full", "/api/hosts", clients=1, limit=3))
+    return result
+
+
+def memory(pid):
+    """Resident, anonymous resident and peak memory of ``pid`` in MiB."""
+    values = {}
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in ("VmRSS", "RssAnon", "VmHWM"):
+                values[key] = int(rest.split()[0]) / 1024
+    return values.get("VmRSS"), values.get("RssAnon"), values.get("VmHWM")
+
+
+def reset_peak(pid):
+    try:
+        with open(f"/proc/{pid}/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def drive(port, endpoint, headers, clients, seconds):
+    """Run ``endpoint`` from ``clients`` threads; return latencies and errors."""
+    deadline = time.perf_counter() + seconds
+    latencies, errors = [], []
+    lock = threading.Lock()
+    budget = [endpoint.limit]
+
+    def worker(seed):
+        rng = random.Random(seed)
+        local, failed = [], 0
+        while time.perf_counter() < deadline:
+            with lock:
+                if budget[0] is not None:
+                    if budget[0] <= 0:
+                        break
+                    budget[0] -= 1
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=300)
+            start = time.perf_counter()
+            try:
+                conn.request(
+                    endpoint.method, endpoint.path(rng), endpoint.body, headers
+                )
+                resp = conn.getresponse()
+                resp.read()
+                failed += resp.status >= 400
+            except OSError:
+                failed += 1
+            local.append(time.perf_counter() - start)
+            conn.close()
+        with lock:
+            latencies.extend(local)
+            errors.append(failed)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, sum(errors), time.perf_counter() - started
+
+
+def percentile_ms(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] * 1e3
+
+
+def run_size(args, hosts):
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        write_fleet(
+            Path(tmp) / "data.json", hosts, profile=args.profile, normalize=True
+        )
+        size_mib = (Path(tmp) / "data.json").stat().st_size / 2**20
+        print(
+            f"\n{hosts} hosts ({args.profile}): data.json {size_mib:.1f} MiB, "
+            f"generated in {time.perf_counter() - start:.1f} s"
+        )
+        proc = subprocess.Popen(
+            [sys.executable, __file__, "--serve", "--dir", tmp]
+            + ["--templates", str(args.templates)],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            env=dict(os.environ, LOG_LEVEL="WARNING"),
+        )
+        try:
+            ready = json.loads(proc.stdout.readline())
+            rss, _, _ = memory(proc.pid)
+            print(
+                f"initial load {ready['load_seconds']:.2f} s, server RSS {rss:.1f} MiB"
+            )
+            print(
+                f"{'endpoint':<15} {'req':>6} {'err':>4} {'req/s':>8} {'p50 ms':>8} "
+                f"{'p95 ms':>8} {'p99 ms':>8} {'RSS MiB':>8} {'anon':>7} {'peak':>7}"
+            )
+            server.JWT_SECRET = SECRET
+            token = server.create_token("admin", "admin")
+            headers = {
+                "Authorization": f"Bearer {token}",
+                "Content-Type": "application/json",
+            }
+            for endpoint in endpoints(hosts, args.full_max):
+                reset_peak(proc.pid)
+                clients = endpoint.clients or args.clients
+                latencies, errors, elapsed = drive(
+                    ready["port"], endpoint, headers, clients, args.seconds
+                )
+                rss, anon, peak = memory(proc.pid)
+                result = {
+                    "hosts": hosts,
+                    "endpoint": endpoint.name,
+                    "clients": clients,
+                    "requests": len(latencies),
+                    "errors": errors,
+                    "requests_per_second": len(latencies) / elapsed,
+                    "p50_ms": percentile_ms(latencies, 0.50),
+                    "p95_ms": percentile_ms(latencies, 0.95),
+                    "p99_ms": percentile_ms(latencies, 0.99),
+                    "rss_mib": rss,
+                    "anon_rss_mib": anon,
+                    "peak_rss_mib": peak,
+                    "initial_load_seconds": ready["load_seconds"],
+                }
+                results.append(result)
+                print(
+                    f"{endpoint.name:<15} {len(latencies):>6} {errors:>4} "
+                    f"{result['requests_per_second']:>8.1f} {result['p50_ms']:>8.1f} "
+                    f"{result['p95_ms']:>8.1f} {result['p99_ms']:>8.1f} "
+                    f"{rss:>8.1f} {anon:>7.1f} {peak:>7.1f}"
+                )
+        finally:
+            proc.terminate()
+            proc.wait()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="large")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--templates", type=int, default=200)
+    parser.add_argument(
+        "--full-max",
+        type=int,
+        default=10000,
+        help="largest fleet for which the unpaginated /api/hosts is requested",
+    )
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args)
+        return
+
+    results = []
+    for hosts in (int(s) for s in args.sizes.split(",")):
+        results.extend(run_size(args, hosts))
+    if args.json:
+        params = {k: v for k, v in vars(args).items() if k not in ("serve", "dir")}
+        with open(args.json, "w") as f:
+            json.dump({"params": params, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
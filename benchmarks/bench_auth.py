@@ -0,0 +1,61 @@
+"""Per-request cost of token verification with and without the cache.
+
+Run from the project root::
+
+    python benchmarks/bench_auth.py --iterations 20000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from autoconfig import server  # noqa: E402
+
+
+def per_call_us(func, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    server.JWT_SECRET = "benchmark-secret-with-a-reasonable-length"
+    token = server.create_token("bench", "admin")
+    headers = {"Authorization": f"Bearer {token}"}
+
+    @server.require_auth
+    def view():
+        return "ok"
+
+    def uncached():
+        server.TOKEN_CACHE.clear()
+        return server.decode_token(token)
+
+    def cached():
+        return server.decode_token(token)
+
+    def request_uncached():
+        server.TOKEN_CACHE.clear()
+        return view()
+
+    with server.app.test_request_context("/api/hosts", headers=headers):
+        results = [
+            ("decode_token, no cache", per_call_us(uncached, args.iterations)),
+            ("decode_token, cached", per_call_us(cached, args.iterations)),
+            ("require_auth, no cache", per_call_us(request_uncached, args.iterations)),
+            ("require_auth, cached", per_call_us(view, args.iterations)),
+        ]
+    for label, us in results:
+        print(f"{label:<24} {us:8.2f} us/request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Throughput of pushing hosts to ``POST /api/v1/hosts:batch``.
+
+Run from the project root::
+
+    python benchmarks/bench_batch_ingest.py --hosts 20000 --batch 1000
+
+The API runs in one single-threaded werkzeug server in this process and is
+fed over HTTP with NDJSON bodies. Three rounds are pushed: new hosts,
+unchanged hosts (hash comparison only) and hosts whose load changed.
+"""
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from pathlib import Path
+
+from werkzeug.serving import make_server
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "benchmarks"))
+
+from autoconfig import server  # noqa: E402
+from fleet import make_host  # noqa: E402
+
+
+def push(url, token, hosts):
+    body = "\n".join(json.dumps(h) for h in hosts).encode()
+    req = urllib.request.Request(
+        url,
+        data=body,
+        headers={
+            "Authorization": f"Bearer {token}",
+            "Content-Type": "application/x-ndjson",
+        },
+    )
+    with urllib.request.urlopen(req) as resp:
+        return json.load(resp)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hosts", type=int, default=20000)
+    parser.add_argument("--batch", type=int, default=1000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    fleet = [make_host(i, rng) for i in range(args.hosts)]
+    changed = [
+        dict(h, cpu_load=f"{rng.uniform(0, 8):.2f} 0.10 0.10 1/1 1") for h in fleet
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        server.DB_PATH = Path(tmp) / "data.db"
+        server.init_db()
+        httpd = make_server("127.0.0.1", 0, server.app)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{httpd.server_port}/api/v1/hosts:batch"
+        token = server.create_token("admin", "admin")
+        print(f"{args.hosts} hosts in batches of {args.batch}")
+        for name, hosts in (("new", fleet), ("unchanged", fleet), ("changed", changed)):
+            start = time.perf_counter()
+            totals = {"accepted": 0, "added": 0, "changed": 0}
+            for i in range(0, len(hosts), args.batch):
+                result = push(url, token, hosts[i : i + args.batch])
+                for key in totals:
+                    totals[key] += result[key]
+            elapsed = time.perf_counter() - start
+            print(
+                f"{name:>10}: {elapsed:6.2f} s  {len(hosts) / elapsed:8.0f} hosts/s  "
+                f"added {totals['added']}, changed {totals['changed']}"
+            )
+        httpd.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""Collection throughput over a simulated fleet of SSH or Ansible hosts.
+
+Run from the project root::
+
+    python benchmarks/bench_collect.py --sizes 10,100,1000 --json collect.json
+
+``ssh`` and ``ansible-playbook`` are replaced by the local stand-ins
+``fake_ssh.py`` and ``fake_ansible_playbook.py``, so the suite runs offline.
+Their latency, jitter, failure rate and output size are set with the
+options below. Every mode and fleet size runs ``run_playbook`` in a fresh
+interpreter and reports hosts per second, the p50/p99 duration of
+successful hosts, peak RSS of the collector and of its largest child
+process, and the peak number of open file descriptors. ``--json`` saves
+the results for comparing scheduler changes.
+
+Every stand-in invocation starts a Python interpreter, which sets a floor
+on per-session cost. On machines with few cores that startup, not the
+simulated latency, limits SSH throughput; compare runs on the same machine.
+"""
+
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from autoconfig import collect_and_visualize as cav  # noqa: E402
+from autoconfig import scheduler, ssh  # noqa: E402
+
+MODES = ("ssh-probe", "ssh-per-command", "ansible-batch", "ansible-per-host")
+
+
+def install(bin_dir: Path, name: str, script: Path):
+    """Install ``script`` as executable ``name`` without a shell wrapper."""
+    path = bin_dir / name
+    path.write_text(f"#!{sys.executable} -S\n" + script.read_text())
+    path.chmod(0o755)
+
+
+class FdSampler(threading.Thread):
+    """Track the peak number of open file descriptors of this process."""
+
+    def __init__(self, interval=0.005):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = 0
+        self.done = threading.Event()
+
+    def run(self):
+        while not self.done.wait(self.interval):
+            try:
+                self.peak = max(self.peak, len(os.listdir("/proc/self/fd")))
+            except OSError:
+                return
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def run_child(args):
+    """Collect ``--size`` simulated hosts with ``--mode`` and print JSON."""
+    work = Path(args.dir)
+    cav.RESULTS_DIR = work / "results"
+    cav.RESULTS_DIR.mkdir()
+    cav.DB_PATH = cav.RESULTS_DIR / "data.db"
+    if args.mode.startswith("ssh"):
+        cav.SSH_MODE = args.mode[len("ssh-") :]
+        ssh.MASTERS = ssh.MasterPool(work / "cm") if args.multiplex else None
+        # Collect over SSH even where Ansible is installed.
+        which = shutil.which
+        shutil.which = lambda cmd, *a, **k: (
+            None if cmd == "ansible-playbook" else which(cmd, *a, **k)
+        )
+    else:
+        cav.ANSIBLE_MODE = args.mode[len("ansible-") :]
+    hosts = [f"sim{i:05d}" for i in range(args.size)]
+
+    sampler = FdSampler()
+    sampler.start()
+    start = time.perf_counter()
+    summary = cav.run_playbook(hosts, max_workers=args.workers, timeout=args.timeout)
+    elapsed = time.perf_counter() - start
+    sampler.done.set()
+    sampler.join()
+
+    durations = [r.duration for r in summary.results if r.ok]
+    print(
+        json.dumps(
+            {
+                "seconds": elapsed,
+                "hosts_per_second": args.size / elapsed,
+                "ok": len(durations),
+                "failed": len(summary.hosts(scheduler.FAILED)),
+                "timeout": len(summary.hosts(scheduler.TIMEOUT)),
+                "p50": percentile(durations, 0.5),
+                "p99": percentile(durations, 0.99),
+                "peak_rss_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                "child_rss_kib": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+                "peak_fds": sampler.peak,
+            }
+        )
+    )
+
+
+def fake_env(args, bin_dir):
+    env = dict(os.environ, PATH=f"{bin_dir}:{os.environ['PATH']}")
+    env.update(
+        FAKE_SSH_HANDSHAKE=str(args.handshake),
+        FAKE_SSH_LATENCY=str(args.latency),
+        FAKE_SSH_JITTER=str(args.jitter),
+        FAKE_SSH_FAILURE_RATE=str(args.failure_rate),
+        FAKE_SSH_USERS=str(args.users),
+        FAKE_ANSIBLE_STARTUP=str(args.ansible_startup),
+        FAKE_ANSIBLE_GATHER_MIN=str(args.latency),
+        FAKE_ANSIBLE_TASKS="0",
+        FAKE_ANSIBLE_JITTER=str(args.jitter),
+        FAKE_ANSIBLE_FAILURE_RATE=str(args.failure_rate),
+        FAKE_ANSIBLE_USERS=str(args.users),
+        LOG_LEVEL="WARNING",
+    )
+    return env
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10,100,1000")
+    parser.add_argument("--modes", default="ssh-probe,ansible-batch")
+    parser.add_argument("--workers", type=int, default=scheduler.DEFAULT_MAX_WORKERS)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--handshake", type=float, default=0.05)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--jitter", type=float, default=0.01)
+    parser.add_argument("--failure-rate", type=float, default=0.01)
+    parser.add_argument("--users", type=int, default=30, help="passwd lines per host")
+    parser.add_argument("--ansible-startup", type=float, default=0.5)
+    parser.add_argument("--no-multiplex", dest="multiplex", action="store_false")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--size", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_child(args)
+        return
+
+    modes = args.modes.split(",")
+    for mode in modes:
+        if mode not in MODES:
+            parser.error(f"unknown mode {mode}; choose from {', '.join(MODES)}")
+    results = []
+    print(
+        f"{'mode':<17} {'hosts':>5} {'hosts/s':>8} {'p50 s':>7} {'p99 s':>7} "
+        f"{'ok':>5} {'fail':>4} {'RSS MiB':>8} {'child':>6} {'fds':>4}"
+    )
+    for mode in modes:
+        for size in (int(s) for s in args.sizes.split(",")):
+            with tempfile.TemporaryDirectory() as tmp:
+                bin_dir = Path(tmp) / "bin"
+                bin_dir.mkdir()
+                install(bin_dir, "ssh", ROOT / "benchmarks" / "fake_ssh.py")
+                if mode.startswith("ansible"):
+                    install(
+                        bin_dir,
+                        "ansible-playbook",
+                        ROOT / "benchmarks" / "fake_ansible_playbook.py",
+                    )
+                cmd = [sys.executable, __file__, "--mode", mode, "--size", str(size)]
+                for option in ("workers", "timeout"):
+                    cmd += [f"--{option}", str(getattr(args, option))]
+                if not args.multiplex:
+                    cmd.append("--no-multiplex")
+                out = subprocess.run(
+                    cmd + ["--dir", tmp],
+                    env=fake_env(args, bin_dir),
+                    check=True,
+                    capture_output=True,
+                    text=True,
+                ).stdout
+            result = {"mode": mode, "hosts": size, **json.loads(out.splitlines()[-1])}
+            results.append(result)
+            print(
+                f"{mode:<17} {size:>5} {result['hosts_per_second']:>8.1f} "
+                f"{result['p50'] or 0:>7.3f} {result['p99'] or 0:>7.3f} "
+                f"{result['ok']:>5} {result['failed'] + result['timeout']:>4} "
+                f"{result['peak_rss_kib'] / 1024:>8.1f} "
+                f"{result['child_rss_kib'] / 1024:>6.1f} {result['peak_fds']:>4}"
+            )
+    if args.json:
+        params = {
+            k: v
+            for k, v in vars(args).items()
+            if k not in ("json", "mode", "size", "dir")
+        }
+        with open(args.json, "w") as f:
+            json.dump({"params": params, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Compare API throughput with and without the shared connection pool.
+
+Run from the project root::
+
+    python benchmarks/bench_db_pool.py --hosts 500 --requests 2000
+
+The "per-call" mode swaps :func:`autoconfig.db.connect` for a plain
+``sqlite3.connect`` per call, which is how every query path used to work.
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from autoconfig import db, server  # noqa: E402
+
+
+@contextmanager
+def per_call_connect(path):
+    with sqlite3.connect(path) as conn:
+        yield conn
+
+
+def populate(count):
+    with db.connect(server.DB_PATH) as conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO hosts(hostname, data) VALUES(?, ?)",
+            (
+                (
+                    f"host{i:05d}",
+                    json.dumps({"hostname": f"host{i:05d}", "cpu_load": "0.1"}),
+                )
+                for i in range(count)
+            ),
+        )
+    for i in range(20):
+        server.create_template(f"tpl{i}", None, {"i": i})
+
+
+def run(client, headers, requests):
+    paths = ["/api/hosts?search=host000", "/api/v1/templates"]
+    start = time.perf_counter()
+    for i in range(requests):
+        resp = client.get(paths[i % len(paths)], headers=headers)
+        assert resp.status_code == 200, resp.status_code
+    return requests / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hosts", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        server.DB_PATH = Path(tmp) / "data.db"
+        server.init_db()
+        populate(args.hosts)
+        token = server.create_token("bench", "admin")
+        headers = {"Authorization": f"Bearer {token}"}
+        pooled_connect = db.connect
+        with server.app.test_client() as client:
+            db.connect = per_call_connect
+            before = run(client, headers, args.requests)
+            db.connect = pooled_connect
+            after = run(client, headers, args.requests)
+        db.close_all()
+
+    print(f"per-call connections: {before:8.1f} req/s")
+    print(f"pooled connections:   {after:8.1f} req/s")
+    print(f"speedup:              {after / before:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
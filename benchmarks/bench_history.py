@@ -0,0 +1,99 @@
+"""Storage size and range query latency of the metrics history.
+
+Fills the hourly tier with 30 days of samples for every host, then times
+30-day range queries for random hosts. Run from the project root::
+
+    python benchmarks/bench_history.py --hosts 5000
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from autoconfig import db, history  # noqa: E402
+
+
+def fill(conn, hosts, days, rng):
+    """Insert ``days`` of hourly rows for ``hosts`` hosts."""
+    now = int(time.time())
+    end = now - now % history.HOUR
+    columns = ", ".join(history.METRICS)
+    placeholders = ", ".join("?" * (len(history.METRICS) + 3))
+    ids = history.host_ids(conn, (f"host{i:06d}" for i in range(hosts)))
+    for host_id in ids.values():
+        conn.executemany(
+            f"INSERT INTO history_1h(host_id, ts, n, {columns}) "
+            f"VALUES({placeholders})",
+            (
+                (host_id, end - hour * history.HOUR, 60)
+                + tuple(rng.randrange(400) for _ in range(3))
+                + tuple(rng.randrange(1 << 34) for _ in range(10))
+                for hour in reversed(range(days * 24))
+            ),
+        )
+    return end
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hosts", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+    rng = random.Random(1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "data.db"
+        with db.connect(path) as conn:
+            db.init_hosts_schema(conn)
+            start = time.perf_counter()
+            end = fill(conn, args.hosts, args.days, rng)
+            fill_s = time.perf_counter() - start
+            start = time.perf_counter()
+            history.maintain(conn)
+            rollup_s = time.perf_counter() - start
+        db.close_all()
+        rows = args.hosts * args.days * 24
+        size = path.stat().st_size
+        print(f"rows       {rows:>12,d}  ({fill_s:.1f} s to insert)")
+        print(f"first rollup to daily tier: {rollup_s:.1f} s")
+        print(f"size       {size / 2**20:12.1f} MiB  ({size / rows:.0f} bytes/row)")
+
+        with db.connect(path) as conn:
+            for label, step in (("hourly", history.HOUR), ("daily", history.DAY)):
+                begin = end - args.days * history.DAY
+                latencies = []
+                for _ in range(args.queries):
+                    host = f"host{rng.randrange(args.hosts):06d}"
+                    t0 = time.perf_counter()
+                    _, _, points = history.query(conn, host, "load1", begin, end, step)
+                    latencies.append((time.perf_counter() - t0) * 1000)
+                latencies.sort()
+                print(
+                    f"30d {label:<6} p50 {latencies[len(latencies) // 2]:6.2f} ms  "
+                    f"p99 {latencies[int(len(latencies) * 0.99)]:6.2f} ms  "
+                    f"{len(points)} points"
+                )
+
+            samples = [
+                (f"host{i:06d}", (1.0,) * 3 + (1 << 30,) * 10)
+                for i in range(args.hosts)
+            ]
+            t0 = time.perf_counter()
+            history.record(conn, samples)
+            history.maintain(conn)
+            print(
+                f"record + maintain for {args.hosts} hosts: "
+                f"{(time.perf_counter() - t0) * 1000:.1f} ms"
+            )
+        db.close_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Import time of the command line entry points, checked against a budget.
+
+Run from the project root::
+
+    python benchmarks/bench_import.py --runs 10
+
+Every run imports one entry point in a fresh interpreter with
+``-X importtime`` and reads the cumulative time of the module itself, so
+interpreter startup is not included. The median over ``--runs`` is compared
+with the budget and the script exits with status 1 if any entry point is
+over, which makes it usable as a CI regression check.
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Milliseconds; generous enough for noisy CI machines.
+BUDGETS_MS = {
+    "autoconfig.collect_and_visualize": 100,
+    "autoconfig.server": 250,
+}
+
+
+def import_ms(module: str) -> float:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    for line in proc.stderr.splitlines():
+        fields = [f.strip() for f in line.split("|")]
+        if len(fields) == 3 and fields[2] == module:
+            return int(fields[1]) / 1000
+    raise RuntimeError(f"no import time reported for {module}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument(
+        "--scale",
+        type=float,
+        default=1.0,
+        help="multiply every budget, e.g. for slow machines",
+    )
+    args = parser.parse_args()
+
+    over = False
+    for module, budget in BUDGETS_MS.items():
+        # The first import may compile bytecode; do not count it.
+        import_ms(module)
+        samples = [import_ms(module) for _ in range(args.runs)]
+        median = statistics.median(samples)
+        budget *= args.scale
+        status = "ok" if median <= budget else "OVER BUDGET"
+        over |= median > budget
+        print(
+            f"{module:<34} median {median:6.1f} ms  max {max(samples):6.1f} ms  "
+            f"budget {budget:5.0f} ms  {status}"
+        )
+    sys.exit(1 if over else 0)
+
+
+if __name__ == "__main__":
+    main()
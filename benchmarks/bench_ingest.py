@@ -0,0 +1,86 @@
+"""Memory and throughput of loading data.json into SQLite.
+
+Run from the project root::
+
+    python benchmarks/bench_ingest.py --hosts 100000
+
+Each mode runs in a fresh interpreter so peak RSS is measured separately.
+``load`` parses the whole file with ``json.load`` first, the way
+``server.load_data`` used to; ``stream`` uses the streaming reader.
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "benchmarks"))
+
+from autoconfig import db, jsonstream  # noqa: E402
+from fleet import write_fleet  # noqa: E402
+
+
+def ingest(mode, data_file, db_path):
+    start = time.perf_counter()
+    with db.connect(db_path) as conn:
+        db.init_hosts_schema(conn)
+        with open(data_file) as f:
+            if mode == "load":
+                hosts = json.load(f)
+            else:
+                hosts = jsonstream.iter_json_array(f)
+            stats = db.sync_hosts(conn, hosts)
+    elapsed = time.perf_counter() - start
+    peak_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"seconds": elapsed, "peak_kib": peak_kib, **stats}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hosts", type=int, default=100000)
+    parser.add_argument("--mode", choices=["load", "stream"])
+    parser.add_argument("--data", help=argparse.SUPPRESS)
+    parser.add_argument("--db", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        ingest(args.mode, args.data, args.db)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_file = Path(tmp) / "data.json"
+        write_fleet(data_file, args.hosts)
+        size_mib = data_file.stat().st_size / 2**20
+        print(f"{args.hosts} hosts, data.json {size_mib:.1f} MiB")
+        for mode in ("load", "stream"):
+            out = subprocess.run(
+                [
+                    sys.executable,
+                    __file__,
+                    "--mode",
+                    mode,
+                    "--data",
+                    str(data_file),
+                    "--db",
+                    str(Path(tmp) / f"{mode}.db"),
+                ],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            result = json.loads(out.splitlines()[-1])
+            print(
+                f"{mode:>6}: {result['seconds']:7.2f} s  "
+                f"{args.hosts / result['seconds']:9.0f} hosts/s  "
+                f"peak RSS {result['peak_kib'] / 1024:8.1f} MiB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Local fact collection time with subprocesses versus native /proc reads.
+
+Run from the project root::
+
+    python benchmarks/bench_local_collect.py --iterations 50
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from autoconfig import collect_and_visualize as cav  # noqa: E402
+from autoconfig import procfs  # noqa: E402
+
+SECTIONS = (
+    "hostname",
+    "users",
+    "sockets",
+    "disk",
+    "memory",
+    "loadavg",
+    "net_dev",
+    "sensors",
+)
+
+
+def per_call_ms(func, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    results = [
+        ("commands", per_call_ms(cav._run_fact_commands, args.iterations)),
+        ("native", per_call_ms(procfs.collect_outputs, args.iterations)),
+    ]
+    for label, ms in results:
+        print(f"{label:<10} {ms:8.3f} ms/collection")
+
+    print("native sections:")
+    for name in SECTIONS:
+        ms = per_call_ms(getattr(procfs, name), args.iterations)
+        print(f"  {name:<8} {ms:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
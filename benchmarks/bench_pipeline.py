@@ -0,0 +1,93 @@
+"""Throughput and memory of turning facts files into data.json and the DB.
+
+Run from the project root::
+
+    python benchmarks/bench_pipeline.py --hosts 20000
+
+Each mode runs in a fresh interpreter so peak RSS is measured separately.
+``list`` loads every ``facts_*.json`` into a list, dumps it with
+``indent=2``, gzips the result and syncs the database from the list, the
+way the collector used to. ``stream`` runs ``generate_site`` over
+``iter_results``, reading each file once.
+"""
+
+import argparse
+import gzip
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "benchmarks"))
+
+from autoconfig import collect_and_visualize as cav  # noqa: E402
+from fleet import make_host  # noqa: E402
+
+
+def run_list():
+    hosts = [cav.read_facts(path) for path in cav.RESULTS_DIR.glob("facts_*.json")]
+    data_file = cav.RESULTS_DIR / "data.json"
+    with open(data_file, "w") as f:
+        json.dump(hosts, f, indent=2)
+    with open(data_file, "rb") as src, gzip.open(f"{data_file}.gz", "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    cav.save_to_db(hosts)
+
+
+def run(mode, results_dir):
+    cav.RESULTS_DIR = Path(results_dir)
+    cav.DB_PATH = cav.RESULTS_DIR / f"{mode}.db"
+    start = time.perf_counter()
+    if mode == "list":
+        run_list()
+    else:
+        cav.generate_site(cav.iter_results())
+    elapsed = time.perf_counter() - start
+    peak_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    size = (cav.RESULTS_DIR / "data.json").stat().st_size
+    print(json.dumps({"seconds": elapsed, "peak_kib": peak_kib, "size": size}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hosts", type=int, default=20000)
+    parser.add_argument("--mode", choices=["list", "stream"])
+    parser.add_argument("--dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        run(args.mode, args.dir)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(args.hosts):
+            host = make_host(i)
+            with open(Path(tmp) / f"facts_{host['hostname']}.json", "w") as f:
+                json.dump(host, f, indent=2)
+        print(f"{args.hosts} facts files")
+        for mode in ("list", "stream"):
+            out = subprocess.run(
+                [sys.executable, __file__, "--mode", mode, "--dir", tmp],
+                check=True,
+                capture_output=True,
+                text=True,
+                env={**os.environ, "LOG_LEVEL": "WARNING"},
+            ).stdout
+            result = json.loads(out.splitlines()[-1])
+            print(
+                f"{mode:>6}: {result['seconds']:6.2f} s  "
+                f"{args.hosts / result['seconds']:7.0f} files/s  "
+                f"peak RSS {result['peak_kib'] / 1024:7.1f} MiB  "
+                f"data.json {result['size'] / 2**20:6.1f} MiB"
+            )
+
+
+if __name__ == "__main__":
+    main()
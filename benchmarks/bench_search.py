@@ -0,0 +1,54 @@
+"""Latency of hostname LIKE search versus the FTS5 ``q`` search.
+
+Run from the project root::
+
+    python benchmarks/bench_search.py --hosts 50000
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "benchmarks"))
+
+from autoconfig import db, server  # noqa: E402
+from fleet import make_host  # noqa: E402
+
+
+def timed(repeat, **kwargs):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        documents, _ = server.query_hosts(fields=("hostname",), **kwargs)
+    return (time.perf_counter() - start) / repeat * 1000, len(documents)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hosts", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        server.DB_PATH = Path(tmp) / "data.db"
+        server.init_db()
+        with db.connect(server.DB_PATH) as conn:
+            db.sync_hosts(conn, (make_host(i) for i in range(args.hosts)))
+        cases = [
+            ("LIKE hostname", {"search": "host0123"}),
+            ("q hostname prefix", {"q": "host0123"}),
+            ("q user", {"q": "user:user33"}),
+            ("q port", {"q": "port:5432"}),
+            ("q user+port", {"q": "user:user33 port:5432"}),
+        ]
+        for label, kwargs in cases:
+            ms, matches = timed(args.repeat, **kwargs)
+            print(f"{label:<20} {ms:8.2f} ms  {matches:6d} matches")
+        db.close_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Reload time and size of the binary snapshot compared with data.json.
+
+Run from the project root::
+
+    python benchmarks/bench_snapshot.py --hosts 20000
+
+Both files hold the same normalized synthetic fleet. ``server.load_data`` is
+timed into an empty database and again with nothing changed, and a single
+host is looked up by scanning data.json or through the snapshot index.
+"""
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "benchmarks"))
+
+from autoconfig import facts, jsonstream, server, snapshot  # noqa: E402
+from fleet import make_host  # noqa: E402
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def json_lookup(path, hostname):
+    with open(path) as f:
+        for host in jsonstream.iter_json_array(f):
+            if host.get("hostname") == hostname:
+                return host
+
+
+def snapshot_lookup(path, hostname):
+    with snapshot.Snapshot(path) as snap:
+        return snap.get(hostname)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hosts", type=int, default=20000)
+    parser.add_argument("--lookups", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        json_file = tmp / "data.json"
+        snap_file = tmp / snapshot.SNAPSHOT_FILE
+        with open(json_file, "w") as f, snapshot.SnapshotWriter(snap_file) as snap:
+            writer = jsonstream.ArrayWriter(f)
+            for i in range(args.hosts):
+                host = facts.normalize(make_host(i))
+                writer.write(host)
+                snap.write(host)
+            writer.close()
+        print(
+            f"{args.hosts} hosts: data.json {json_file.stat().st_size / 2**20:.1f} "
+            f"MiB, data.snap {snap_file.stat().st_size / 2**20:.1f} MiB"
+        )
+
+        server.DATA_JSON = json_file
+        for name in ("json", "snapshot"):
+            # load_data only prefers a snapshot that is present.
+            server.DATA_SNAPSHOT = snap_file if name == "snapshot" else tmp / "none"
+            server.DB_PATH = tmp / f"{name}.db"
+            server.init_db()
+            first, _ = timed(server.load_data)
+            again, stats = timed(server.load_data)
+            assert stats == {"added": 0, "changed": 0, "removed": 0}
+            print(
+                f"{name:>9}: initial load {first:6.2f} s, "
+                f"unchanged reload {again:6.2f} s "
+                f"({args.hosts / again:8.0f} hosts/s)"
+            )
+
+        last = f"host{args.hosts - 1:06d}"
+        for name, lookup, path in (
+            ("json", json_lookup, json_file),
+            ("snapshot", snapshot_lookup, snap_file),
+        ):
+            samples = [timed(lookup, path, last)[0] for _ in range(args.lookups)]
+            p50 = statistics.median(samples) * 1e3
+            print(f"{name:>9}: single host lookup p50 {p50:9.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
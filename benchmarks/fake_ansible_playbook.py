@@ -0,0 +1,59 @@
+"""Stand-in for ``ansible-playbook`` with a simple cost model.
+
+A run sleeps ``FAKE_ANSIBLE_STARTUP`` seconds (interpreter start, plugin
+loading, inventory parsing), then processes the ``--limit`` hosts in waves
+of ``--forks``. Each wave costs ``FAKE_ANSIBLE_GATHER_FULL`` seconds when
+the playbook gathers all facts, ``FAKE_ANSIBLE_GATHER_MIN`` when it sets a
+``gather_subset``, plus ``FAKE_ANSIBLE_TASKS`` for the collection tasks
+and a random extra of up to ``FAKE_ANSIBLE_JITTER`` seconds. A
+``facts_<host>.json`` file is written to ``$OUTPUT_DIR`` for every host
+except a ``FAKE_ANSIBLE_FAILURE_RATE`` fraction of unreachable ones, chosen
+from ``FAKE_ANSIBLE_SEED`` and the host name. ``FAKE_ANSIBLE_USERS`` adds
+that many ``users`` lines to every facts file.
+"""
+
+import json
+import math
+import os
+import random
+import sys
+import time
+
+
+def main(argv):
+    startup = float(os.environ.get("FAKE_ANSIBLE_STARTUP", "0.5"))
+    time.sleep(startup)
+    playbook = next(a for a in argv if a.endswith((".yml", ".yaml")))
+    with open(playbook) as f:
+        minimal = "gather_subset" in f.read()
+    gather = os.environ.get(
+        "FAKE_ANSIBLE_GATHER_MIN" if minimal else "FAKE_ANSIBLE_GATHER_FULL",
+        "0.2" if minimal else "1.0",
+    )
+    per_wave = float(gather) + float(os.environ.get("FAKE_ANSIBLE_TASKS", "0.3"))
+    forks = int(argv[argv.index("--forks") + 1]) if "--forks" in argv else 5
+    hosts = argv[argv.index("--limit") + 1].split(",") if "--limit" in argv else []
+    jitter = float(os.environ.get("FAKE_ANSIBLE_JITTER", "0"))
+    time.sleep(math.ceil(len(hosts) / forks) * (per_wave + random.uniform(0, jitter)))
+    failure_rate = float(os.environ.get("FAKE_ANSIBLE_FAILURE_RATE", "0"))
+    seed = os.environ.get("FAKE_ANSIBLE_SEED", "0")
+    users = [
+        f"user{u}:x:{1000 + u}:{1000 + u}::/home/user{u}:/bin/bash"
+        for u in range(int(os.environ.get("FAKE_ANSIBLE_USERS", "0")))
+    ]
+    unreachable = False
+    for host in hosts:
+        if random.Random(f"{seed}:{host}").random() < failure_rate:
+            unreachable = True
+            continue
+        doc = {"hostname": host, "cpu_load": "0.10 0.20 0.30 1/100 1"}
+        if users:
+            doc["users"] = users
+        path = os.path.join(os.environ["OUTPUT_DIR"], f"facts_{host}.json")
+        with open(path, "w") as f:
+            json.dump(doc, f)
+    return 4 if unreachable else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
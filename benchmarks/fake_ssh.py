@@ -0,0 +1,137 @@
+"""Stand-in for ``ssh`` answering fact commands with synthetic output.
+
+Understands what :mod:`autoconfig.ssh` runs: ``-O check|exit`` control
+commands, ``-N -f`` master starts, probe scripts on ``sh -s`` and single
+fact commands. Behaviour is set through the environment:
+
+``FAKE_SSH_HANDSHAKE``
+    Seconds for a new connection (default ``0.05``); sessions over an open
+    master skip it.
+``FAKE_SSH_LATENCY`` / ``FAKE_SSH_JITTER``
+    Seconds per session and the maximum random extra (``0.02`` / ``0.01``).
+``FAKE_SSH_FAILURE_RATE``
+    Fraction of hosts that refuse connections (default ``0``).
+``FAKE_SSH_USERS`` / ``FAKE_SSH_INTERFACES``
+    Size of the ``getent passwd`` and ``/proc/net/dev`` output (``30`` / ``2``).
+``FAKE_SSH_SEED``
+    Failures and jitter are derived from the seed and the host name, so
+    every run sees the same fleet.
+"""
+
+import os
+import random
+import re
+import sys
+import time
+
+
+def env(name, default):
+    return float(os.environ.get(f"FAKE_SSH_{name}", default))
+
+
+def outputs(host, rng):
+    users = "".join(
+        f"user{u}:x:{1000 + u}:{1000 + u}::/home/user{u}:/bin/bash\n"
+        for u in range(int(env("USERS", 30)))
+    )
+    net = (
+        "Inter-|   Receive                                                |  Transmit\n"
+        " face |bytes    packets errs drop fifo frame compressed multicast|bytes\n"
+        "    lo: 1000 10 0 0 0 0 0 0 1000 10 0 0 0 0 0 0\n"
+    ) + "".join(
+        f"  eth{n}: {rng.randint(0, 10**12)} 100 0 0 0 0 0 0 "
+        f"{rng.randint(0, 10**12)} 100 0 0 0 0 0 0\n"
+        for n in range(int(env("INTERFACES", 2)))
+    )
+    load = " ".join(f"{rng.uniform(0, 4):.2f}" for _ in range(3))
+    return {
+        "hostname": f"{host}\n",
+        "users": users,
+        "ports": "Netid State Recv-Q Send-Q Local Address:Port Peer Address:Port\n"
+        "tcp LISTEN 0 128 0.0.0.0:22 0.0.0.0:*\n",
+        "disk": f"100G {rng.randint(1, 99)}G 10G {rng.randint(1, 99)}%\n",
+        "memory": "Mem: 16384 8192 4096 10 100 8192\n",
+        "cpu_load": f"{load} 1/123 4567\n",
+        "net": net,
+        "sensors": "",
+    }
+
+
+# Single fact commands of ``--ssh-mode per-command``.
+COMMANDS = {
+    "hostname": "hostname",
+    "getent passwd": "users",
+    "ss -tulwn": "ports",
+    "df -h": "disk",
+    "free -m": "memory",
+    "cat /proc/loadavg": "cpu_load",
+    "cat /proc/net/dev": "net",
+    "sensors": "sensors",
+}
+
+
+def parse(argv):
+    """Split ``argv`` into options, control command, host and command."""
+    options, control, i = {}, None, 0
+    while i < len(argv) and argv[i].startswith("-"):
+        flag = argv[i]
+        if flag in ("-o", "-O"):
+            value = argv[i + 1]
+            if flag == "-O":
+                control = value
+            else:
+                key, _, val = value.partition("=")
+                options[key] = val
+            i += 2
+        else:
+            options[flag] = True
+            i += 1
+    return options, control, argv[i], argv[i + 1 :]
+
+
+def main(argv):
+    options, control, host, command = parse(argv)
+    socket = None
+    if "ControlPath" in options:
+        socket = options["ControlPath"].replace("%C", host)
+    rng = random.Random(f"{os.environ.get('FAKE_SSH_SEED', '0')}:{host}")
+    refused = rng.random() < env("FAILURE_RATE", 0)
+
+    if control == "check":
+        return 0 if socket and os.path.exists(socket) else 255
+    if control == "exit":
+        if socket and os.path.exists(socket):
+            os.unlink(socket)
+            return 0
+        return 255
+
+    mastered = socket and os.path.exists(socket)
+    if options.get("ControlMaster") == "yes" or not mastered:
+        time.sleep(env("HANDSHAKE", 0.05))
+    if refused:
+        sys.stderr.write(f"ssh: connect to host {host} port 22: Connection refused\n")
+        return 255
+    if "-N" in options:
+        if socket:
+            open(socket, "w").close()
+        return 0
+
+    time.sleep(env("LATENCY", 0.02) + rng.uniform(0, env("JITTER", 0.01)))
+    facts = outputs(host, random.Random(f"{time.time()}:{host}"))
+    if command[:2] == ["sh", "-s"]:
+        script = sys.stdin.read()
+        marker = re.search(r"^M='([^']*)'", script, re.M).group(1)
+        for name in re.findall(r"%s begin (\w+)", script):
+            sys.stdout.write(f"{marker} begin {name}\n{facts[name]}\n")
+            sys.stdout.write(f"{marker} end {name} 0\n")
+        return 0
+    line = " ".join(command)
+    for prefix, name in COMMANDS.items():
+        if line.startswith(prefix):
+            sys.stdout.write(facts[name])
+            return 0
+    return 127
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
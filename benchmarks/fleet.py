@@ -0,0 +1,119 @@
+"""Synthetic host fact documents for benchmarks.
+
+``small`` hosts look like lightly used VMs. ``large`` hosts look like busy
+container hosts, with hundreds of accounts, dozens of ``veth`` interfaces
+and many listening ports, which is where ``users`` and ``net`` dominate
+the size of a document.
+
+Run from the project root to write a fleet as ``data.json``::
+
+    python benchmarks/fleet.py --hosts 10000 --profile large -o data.json
+"""
+
+import argparse
+import json
+import random
+import sys
+from pathlib import Path
+
+# (min, max) counts of passwd lines, extra interfaces and listening ports.
+PROFILES = {
+    "small": {"users": (20, 40), "interfaces": (1, 3), "ports": (3, 12)},
+    "large": {"users": (50, 300), "interfaces": (4, 32), "ports": (10, 60)},
+}
+
+SYSTEM_ACCOUNTS = [
+    "root:x:0:0:root:/root:/bin/bash",
+    "daemon:x:1:1:daemon:/usr/sbin:/usr/sbin/nologin",
+    "www-data:x:33:33:www-data:/var/www:/usr/sbin/nologin",
+    "sshd:x:110:65534::/run/sshd:/usr/sbin/nologin",
+]
+
+
+def _interface_name(profile, n):
+    if profile == "small" or n < 2:
+        return f"eth{n}"
+    return "docker0" if n == 2 else f"veth{n:05x}"
+
+
+def make_host(index, rng=None, profile="small"):
+    """Return a fact document shaped like the collector output."""
+    rng = rng or random.Random(index)
+    sizes = PROFILES[profile]
+    load = [round(rng.uniform(0, 8), 2) for _ in range(3)]
+    total = rng.choice([2048, 4096, 8192, 16384, 65536])
+    used = rng.randint(total // 10, total)
+    users = [
+        f"user{u}:x:{1000 + u}:{1000 + u}::/home/user{u}:/bin/bash"
+        for u in range(rng.randint(*sizes["users"]))
+    ]
+    if profile != "small":
+        users = SYSTEM_ACCOUNTS + users
+    ports = ["Netid State Recv-Q Send-Q Local Address:Port Peer Address:Port"] + [
+        f"tcp LISTEN 0 128 0.0.0.0:{port} 0.0.0.0:*"
+        for port in rng.sample(range(1, 65535), rng.randint(*sizes["ports"]))
+    ]
+    net = [
+        "Inter-|   Receive                                                |  Transmit",
+        " face |bytes    packets errs drop fifo frame compressed multicast|bytes",
+        "    lo: 1000 10 0 0 0 0 0 0 1000 10 0 0 0 0 0 0",
+    ] + [
+        f"  {_interface_name(profile, n)}: {rng.randint(0, 10**12)} 100 0 0 0 0 0 0 "
+        f"{rng.randint(0, 10**12)} 100 0 0 0 0 0 0"
+        for n in range(rng.randint(*sizes["interfaces"]))
+    ]
+    return {
+        "hostname": f"host{index:06d}",
+        "users": users,
+        "ports": ports,
+        "disk": f"100G {rng.randint(1, 99)}G 10G {rng.randint(1, 99)}%",
+        "memory": f"Mem: {total} {used} {total - used} 10 100 {total - used}",
+        "cpu_load": "{} {} {} 1/123 4567".format(*load),
+        "net": net,
+        "sensors": [f"temp1: +{rng.randint(30, 90)}.0°C"],
+    }
+
+
+def iter_fleet(count, seed=0, profile="small", normalize=False):
+    """Yield ``count`` synthetic hosts.
+
+    With ``normalize`` the typed fields the collector adds are included.
+    """
+    rng = random.Random(seed)
+    if normalize:
+        sys.path.append(str(Path(__file__).resolve().parents[1]))
+        from autoconfig import facts
+    for i in range(count):
+        host = make_host(i, rng, profile)
+        yield facts.normalize(host) if normalize else host
+
+
+def write_fleet(path, count, seed=0, profile="small", normalize=False):
+    """Stream ``count`` synthetic hosts as a JSON array into ``path``."""
+    with open(path, "w") as f:
+        f.write("[")
+        for i, host in enumerate(iter_fleet(count, seed, profile, normalize)):
+            if i:
+                f.write(",\n")
+            json.dump(host, f)
+        f.write("]")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic fleet")
+    parser.add_argument("--hosts", type=int, default=1000)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="small")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--raw",
+        dest="normalize",
+        action="store_false",
+        help="omit the typed fields added by the collector",
+    )
+    parser.add_argument("-o", "--output", default="data.json")
+    args = parser.parse_args()
+    write_fleet(args.output, args.hosts, args.seed, args.profile, args.normalize)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from autoconfig.cache import LRUCache
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_lru_entries_expire_after_ttl():
+    now = [100.0]
+    cache = LRUCache(maxsize=2, clock=lambda: now[0])
+    cache.set("a", 1, ttl=10)
+    cache.set("b", 2)
+    now[0] = 109.9
+    assert cache.get("a") == 1
+    now[0] = 110.0
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+
+
+def test_lru_bounded_by_bytes():
+    cache = LRUCache(maxsize=10, maxbytes=10, sizeof=len)
+    cache.set("a", b"xxxx")
+    cache.set("b", b"xxxx")
+    cache.set("c", b"xxxx")
+    assert cache.get("a") is None
+    assert cache.nbytes == 8
+    cache.set("b", b"x")
+    assert cache.nbytes == 5
+    cache.set("big", b"x" * 11)
+    assert cache.get("big") is None
+    assert cache.get("c") == b"xxxx"
+
+
+def test_lru_discard_by_key():
+    cache = LRUCache(maxsize=10, maxbytes=100, sizeof=len)
+    cache.set(("db", 1), b"xx")
+    cache.set(("db", 2), b"xx")
+    cache.discard(lambda key: key[1] < 2)
+    assert cache.get(("db", 1)) is None
+    assert cache.get(("db", 2)) == b"xx"
+    assert cache.nbytes == 2
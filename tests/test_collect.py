@@ -1,9 +1,15 @@
+import gzip
+import json
+import os
+import sqlite3
+import subprocess
 import sys
 from pathlib import Path
 
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
 from autoconfig import collect_and_visualize as cav
+from autoconfig import db
 
 
 def test_parse_args_defaults(monkeypatch):
@@ -18,3 +24,191 @@ def test_parse_args_hosts(monkeypatch):
     monkeypatch.setattr(sys, "argv", ["prog", "--hosts", "a,b"])
     args = cav.parse_args()
     assert args.hosts == ["a", "b"]
+
+
+def test_generate_site_writes_gzip_copies(tmp_path, monkeypatch):
+    monkeypatch.setattr(cav, "RESULTS_DIR", tmp_path)
+    monkeypatch.setattr(cav, "DB_PATH", tmp_path / "data.db")
+    hosts = [{"hostname": "alpha"}]
+    cav.generate_site(hosts)
+    for name in ("index.html", "data.json"):
+        with gzip.open(tmp_path / f"{name}.gz", "rb") as f:
+            assert f.read() == (tmp_path / name).read_bytes()
+
+
+def test_generate_site_does_not_lock_writers_between_batches(tmp_path, monkeypatch):
+    monkeypatch.setattr(cav, "RESULTS_DIR", tmp_path)
+    monkeypatch.setattr(cav, "DB_PATH", tmp_path / "data.db")
+    cav.save_to_db([{"hostname": "stale"}])
+    errors = []
+
+    def hosts():
+        for i in range(db.BATCH_SIZE * 2):
+            if i == db.BATCH_SIZE + 1:
+                # The first batch is stored; another writer gets through.
+                conn = sqlite3.connect(tmp_path / "data.db", timeout=0)
+                try:
+                    with conn:
+                        conn.execute("UPDATE hosts SET data = data")
+                except sqlite3.OperationalError as exc:
+                    errors.append(exc)
+                finally:
+                    conn.close()
+            yield {"hostname": f"host{i}"}
+
+    cav.generate_site(hosts())
+    assert errors == []
+    with db.connect(tmp_path / "data.db") as conn:
+        names = {r[0] for r in conn.execute("SELECT hostname FROM hosts")}
+        # Auto-checkpoints suspended during the sync are enabled again.
+        assert conn.execute("PRAGMA wal_autocheckpoint").fetchone()[0] > 0
+    assert len(names) == db.BATCH_SIZE * 2 and "stale" not in names
+
+
+def test_generate_site_streams_facts_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(cav, "RESULTS_DIR", tmp_path)
+    monkeypatch.setattr(cav, "DB_PATH", tmp_path / "data.db")
+    for name in ("b", "a"):
+        (tmp_path / f"facts_{name}.json").write_text(json.dumps({"hostname": name}))
+    hosts = cav.iter_results()
+    cav.generate_site(hosts)
+
+    text = (tmp_path / "data.json").read_text()
+    assert [h["hostname"] for h in json.loads(text)] == ["a", "b"]
+    assert text == '[\n{"hostname":"a"},\n{"hostname":"b"}\n]\n'
+    with gzip.open(tmp_path / "data.json.gz", "rt") as f:
+        assert f.read() == text
+    with db.connect(tmp_path / "data.db") as conn:
+        assert conn.execute("SELECT count(*) FROM hosts").fetchone()[0] == 2
+    assert not list(tmp_path.glob(".*.tmp"))
+
+
+def test_run_playbook_ingests_hosts_as_they_arrive(tmp_path, monkeypatch):
+    monkeypatch.setattr(cav, "RESULTS_DIR", tmp_path)
+    monkeypatch.setattr(cav, "DB_PATH", tmp_path / "data.db")
+    monkeypatch.setattr(cav.shutil, "which", lambda name: None)
+
+    def fake_collect(host, timeout=None):
+        if host == "down":
+            raise subprocess.CalledProcessError(255, ["ssh", host])
+        return {"hostname": host}
+
+    monkeypatch.setattr(cav, "collect_local_facts", fake_collect)
+    summary = cav.run_playbook(["a", "down", "b"], max_workers=2, timeout=5)
+
+    stats = summary.as_dict()
+    assert stats["ok"] == 2
+    assert stats["failed"] == ["down"]
+    with db.connect(tmp_path / "data.db") as conn:
+        names = [r[0] for r in conn.execute("SELECT hostname FROM hosts")]
+    assert sorted(names) == ["a", "b"]
+
+
+FAKE_PLAYBOOK = """#!{python}
+import json, os, sys
+args = sys.argv[1:]
+with open(os.environ["FAKE_LOG"], "a") as log:
+    log.write(json.dumps(args) + "\\n")
+limit = args[args.index("--limit") + 1].split(",") if "--limit" in args else []
+for host in limit:
+    if host != "down":
+        path = os.path.join(os.environ["OUTPUT_DIR"], f"facts_{{host}}.json")
+        with open(path, "w") as f:
+            json.dump({{"hostname": host}}, f)
+sys.exit(4 if "down" in limit else 0)
+"""
+
+
+def test_run_playbook_batch_uses_one_process(tmp_path, monkeypatch):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    fake = bin_dir / "ansible-playbook"
+    fake.write_text(FAKE_PLAYBOOK.format(python=sys.executable))
+    fake.chmod(0o755)
+    log = tmp_path / "calls.log"
+    monkeypatch.setenv("PATH", f"{bin_dir}:{os.environ['PATH']}")
+    monkeypatch.setenv("FAKE_LOG", str(log))
+    monkeypatch.setattr(cav, "RESULTS_DIR", tmp_path)
+    monkeypatch.setattr(cav, "DB_PATH", tmp_path / "data.db")
+    monkeypatch.setattr(cav, "ANSIBLE_MODE", "batch")
+    monkeypatch.setattr(cav, "FACT_CACHE", tmp_path / "facts-cache")
+
+    summary = cav.run_playbook(["a", "down", "b"], max_workers=8, timeout=30)
+
+    calls = [json.loads(line) for line in log.read_text().splitlines()]
+    assert len(calls) == 1
+    assert calls[0][calls[0].index("--forks") + 1] == "8"
+    assert calls[0][calls[0].index("--limit") + 1] == "a,down,b"
+    assert summary.as_dict()["ok"] == 2
+    assert summary.as_dict()["failed"] == ["down"]
+    env = cav.ansible_env(30)
+    assert env["ANSIBLE_CACHE_PLUGIN"] == "jsonfile"
+    assert env["ANSIBLE_TASK_TIMEOUT"] == "30"
+
+
+def test_run_playbook_batch_without_hosts_reports_written_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(cav, "RESULTS_DIR", tmp_path)
+
+    def fake_run(cmd, env=None, timeout=None):
+        for host in ("a", "b"):
+            (tmp_path / f"facts_{host}.json").write_text(json.dumps({"hostname": host}))
+        return subprocess.CompletedProcess(cmd, 0)
+
+    monkeypatch.setattr(cav.subprocess, "run", fake_run)
+    results = list(cav._run_playbook_batch([], forks=4, timeout=None))
+    assert sorted(r.host for r in results) == ["a", "b"]
+    assert all(r.ok and r.data for r in results)
+
+
+def test_run_playbook_batch_is_killed_after_wall_clock_timeout(tmp_path, monkeypatch):
+    monkeypatch.setattr(cav, "RESULTS_DIR", tmp_path)
+    timeouts = []
+
+    def fake_run(cmd, env=None, timeout=None):
+        timeouts.append(timeout)
+        (tmp_path / "facts_a.json").write_text(json.dumps({"hostname": "a"}))
+        raise subprocess.TimeoutExpired(cmd, timeout)
+
+    monkeypatch.setattr(cav.subprocess, "run", fake_run)
+    results = list(cav._run_playbook_batch(["a", "b", "c"], forks=2, timeout=10))
+    assert timeouts == [20 + cav.scheduler.TIMEOUT_GRACE_SECONDS]
+    assert [(r.host, r.status) for r in results] == [
+        ("a", cav.scheduler.OK),
+        ("b", cav.scheduler.TIMEOUT),
+        ("c", cav.scheduler.TIMEOUT),
+    ]
+
+
+def test_next_delay_stays_within_jitter():
+    assert cav.next_delay(100, 0.1, rng=lambda: 0.0) == 90
+    assert round(cav.next_delay(100, 0.1, rng=lambda: 1.0), 6) == 110
+    assert cav.next_delay(100, 0.0) == 100
+
+
+def test_daemon_ingests_every_cycle(tmp_path, monkeypatch):
+    monkeypatch.setattr(cav, "RESULTS_DIR", tmp_path)
+    monkeypatch.setattr(cav, "DB_PATH", tmp_path / "data.db")
+    monkeypatch.setattr(cav.shutil, "which", lambda name: None)
+    loads = iter(["0.10", "0.20"])
+
+    def fake_collect(host, timeout=None):
+        data = {"hostname": host, "cpu_load": f"{next(loads)} 0.00 0.00 1/1 1"}
+        (tmp_path / f"facts_{host}.json").write_text(json.dumps(data))
+        return data
+
+    monkeypatch.setattr(cav, "collect_local_facts", fake_collect)
+    count = cav.run_daemon(["a"], interval=0, site=True, cycles=2)
+
+    assert count == 2
+    with db.connect(tmp_path / "data.db") as conn:
+        load = conn.execute("SELECT load1 FROM hosts").fetchone()[0]
+        generation = db.get_generation(conn)[0]
+    assert load == 0.2
+    assert generation == 2
+    assert json.loads((tmp_path / "data.json").read_text())[0]["hostname"] == "a"
+
+
+def test_daemon_stops_when_signalled(monkeypatch):
+    monkeypatch.setattr(cav, "run_playbook", lambda *a, **k: stop.set())
+    stop = cav.threading.Event()
+    assert cav.run_daemon(["a"], interval=3600, jitter=0, stop=stop) == 1
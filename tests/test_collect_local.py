@@ -12,7 +12,7 @@ def test_collect_local_adds_net_and_sensors(tmp_path, monkeypatch):
     sample_net = ["lo: 0 0 0 0"]
     sample_sensors = ["temp: 42C"]
 
-    def fake_check_output(cmd, text=True, shell=False):
+    def fake_check_output(cmd, text=True, shell=False, timeout=None):
         if cmd == ["hostname"]:
             return "testhost\n"
         elif cmd == ["getent", "passwd"]:
@@ -33,6 +33,7 @@ def test_collect_local_adds_net_and_sensors(tmp_path, monkeypatch):
             raise FileNotFoundError
 
     monkeypatch.setattr(subprocess, "check_output", fake_check_output)
+    monkeypatch.setattr(cav, "LOCAL_COLLECTOR", "commands")
 
     original_dir = cav.RESULTS_DIR
     cav.RESULTS_DIR = tmp_path
@@ -0,0 +1,90 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from autoconfig import db
+
+
+def test_connect_enables_wal_and_reuses_connections(tmp_path):
+    path = tmp_path / "data.db"
+    with db.connect(path) as conn:
+        mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        first = id(conn)
+    with db.connect(path) as conn:
+        second = id(conn)
+    assert mode == "wal"
+    assert first == second
+    db.close_all()
+
+
+def test_connect_rolls_back_on_error(tmp_path):
+    path = tmp_path / "data.db"
+    with db.connect(path) as conn:
+        conn.execute("CREATE TABLE t (x INTEGER)")
+    with pytest.raises(RuntimeError):
+        with db.connect(path) as conn:
+            conn.execute("INSERT INTO t VALUES (1)")
+            raise RuntimeError("boom")
+    with db.connect(path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+    db.close_all()
+
+
+def test_init_hosts_schema_backfills_metric_columns(tmp_path):
+    path = tmp_path / "data.db"
+    with db.connect(path) as conn:
+        conn.execute("CREATE TABLE hosts (hostname TEXT PRIMARY KEY, data TEXT)")
+        conn.execute(
+            "INSERT INTO hosts VALUES (?, ?)",
+            ("alpha", json.dumps({"hostname": "alpha", "cpu_load": "1.5 1 1"})),
+        )
+    with db.connect(path) as conn:
+        db.init_hosts_schema(conn)
+        load1, source = conn.execute("SELECT load1, source FROM hosts").fetchone()
+    assert load1 == 1.5
+    assert source == db.SOURCE_FILE
+    db.close_all()
+
+
+def test_sync_hosts_only_touches_changed_rows(tmp_path):
+    path = tmp_path / "data.db"
+    with db.connect(path) as conn:
+        db.init_hosts_schema(conn)
+        stats = db.sync_hosts(conn, [{"hostname": "a"}, {"hostname": "b"}])
+        assert stats == {"added": 2, "changed": 0, "removed": 0}
+        generation, _ = db.get_generation(conn)
+
+        stats = db.sync_hosts(conn, [{"hostname": "a"}, {"hostname": "b"}])
+        assert stats == {"added": 0, "changed": 0, "removed": 0}
+        assert db.get_generation(conn)[0] == generation
+
+        stats = db.sync_hosts(
+            conn, [{"hostname": "a", "cpu_load": "1 1 1"}, {"hostname": "c"}]
+        )
+        assert stats == {"added": 1, "changed": 1, "removed": 1}
+        assert db.get_generation(conn)[0] == generation + 1
+        names = [r[0] for r in conn.execute("SELECT hostname FROM hosts ORDER BY 1")]
+        assert names == ["a", "c"]
+    db.close_all()
+
+
+def test_sync_hosts_prunes_only_its_own_source(tmp_path):
+    path = tmp_path / "data.db"
+    with db.connect(path) as conn:
+        db.init_hosts_schema(conn)
+        db.sync_hosts(conn, [{"hostname": "a"}, {"hostname": "b"}])
+        stats = db.sync_hosts(
+            conn, [{"hostname": "b"}, {"hostname": "p"}], source=db.SOURCE_PUSH
+        )
+        # "b" is taken over by the push although its content is unchanged.
+        assert stats == {"added": 1, "changed": 1, "removed": 0}
+
+        stats = db.sync_hosts(conn, [])
+        assert stats == {"added": 0, "changed": 0, "removed": 1}
+        rows = conn.execute("SELECT hostname, source FROM hosts ORDER BY 1")
+        assert rows.fetchall() == [("b", "push"), ("p", "push")]
+    db.close_all()
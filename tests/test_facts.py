@@ -0,0 +1,64 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from autoconfig import facts
+
+RAW_HOST = {
+    "hostname": "alpha",
+    "cpu_load": "0.15 0.10 0.05 1/123 4567",
+    "memory": "Mem:  7972  3456  1234  56  3282  4200",
+    "disk": "50G 20G 30G 40%",
+    "net": [
+        "Inter-|   Receive",
+        " face |bytes    packets errs drop fifo frame compressed multicast|bytes",
+        "    lo: 100 1 0 0 0 0 0 0 100 1 0 0 0 0 0 0",
+        "  eth0: 2000 10 0 0 0 0 0 0 3000 12 0 0 0 0 0 0",
+    ],
+    "users": ["root:x:0:0:root:/root:/bin/bash"],
+    "ports": ["Netid State", "tcp LISTEN 0 128 0.0.0.0:22 0.0.0.0:*"],
+}
+
+
+def test_host_metrics_parses_raw_output():
+    metrics = facts.host_metrics(RAW_HOST)
+    assert metrics["load1"] == 0.15
+    assert metrics["load15"] == 0.05
+    assert metrics["mem_total"] == 7972 * facts.MIB
+    assert metrics["mem_available"] == 4200 * facts.MIB
+    assert metrics["disk_total"] == 50 << 30
+    assert metrics["disk_used_pct"] == 40.0
+    assert metrics["rx_bytes"] == 2000
+    assert metrics["tx_bytes"] == 3000
+    assert metrics["user_count"] == 1
+    assert metrics["port_count"] == 1
+
+
+def test_host_metrics_tolerates_missing_fields():
+    metrics = facts.host_metrics({"hostname": "alpha"})
+    assert set(metrics) == set(facts.METRIC_COLUMNS)
+    assert all(v is None for v in metrics.values())
+
+
+def test_normalize_adds_typed_fields():
+    doc = facts.normalize(RAW_HOST)
+    assert doc["cpu_load"] == RAW_HOST["cpu_load"]
+    assert doc["load"] == [0.15, 0.10, 0.05]
+    assert doc["memory_bytes"]["used"] == 3456 * facts.MIB
+    assert doc["disk_usage"] == {
+        "total": 50 << 30,
+        "used": 20 << 30,
+        "used_pct": 40.0,
+    }
+    assert doc["interfaces"]["eth0"] == {"rx_bytes": 2000, "tx_bytes": 3000}
+    assert doc["sockets"] == [
+        {"proto": "tcp", "state": "LISTEN", "address": "0.0.0.0", "port": 22}
+    ]
+
+
+def test_compact_documents_keep_their_metrics():
+    doc = facts.normalize(RAW_HOST, compact=True)
+    assert not set(facts.RAW_FIELDS) & set(doc)
+    assert facts.normalize(doc) == doc
+    assert facts.host_metrics(doc) == facts.host_metrics(RAW_HOST)
@@ -0,0 +1,139 @@
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from autoconfig import db, history, server
+
+DAY = history.DAY
+
+
+def _load(value):
+    return {"hostname": "alpha", "cpu_load": f"{value} 0 0 1/1 1"}
+
+
+def _values(conn, table):
+    rows = conn.execute(f"SELECT ts, n, load1 FROM {table} ORDER BY ts")
+    return [(ts, n, load / history.SCALE["load1"]) for ts, n, load in rows]
+
+
+def test_sync_records_samples_and_rolls_up(tmp_path, monkeypatch):
+    base = 1_700_000_000 - 1_700_000_000 % DAY
+    clock = [base]
+    monkeypatch.setattr(db.time, "time", lambda: clock[0])
+    with db.connect(tmp_path / "data.db") as conn:
+        db.init_hosts_schema(conn)
+        for minute, load in enumerate([1.0, 2.0, 3.0]):
+            clock[0] = base + minute * 60
+            db.sync_hosts(conn, [_load(load)])
+        # Unchanged documents do not produce samples.
+        db.sync_hosts(conn, [_load(3.0)])
+        assert [r[2] for r in _values(conn, "history_1m")] == [1.0, 2.0, 3.0]
+        assert _values(conn, "history_1h") == []
+
+        clock[0] = base + 3600
+        db.sync_hosts(conn, [_load(6.0)])
+        assert _values(conn, "history_1h") == [(base, 3, 2.0)]
+
+        clock[0] = base + DAY + 60
+        db.sync_hosts(conn, [_load(7.0)])
+        daily = _values(conn, "history_1d")
+        assert daily[0][:2] == (base, 4)
+        assert daily[0][2] == 3.0
+
+        # Minute samples expire after two days, rollups remain.
+        history.maintain(conn, now=base + 4 * DAY)
+        assert _values(conn, "history_1m") == []
+        hourly = _values(conn, "history_1h")
+        assert [r[0] for r in hourly] == [base, base + 3600, base + DAY]
+
+
+def test_rollup_rounds_means(tmp_path):
+    base = 1_700_000_000 - 1_700_000_000 % DAY
+    with db.connect(tmp_path / "data.db") as conn:
+        db.init_hosts_schema(conn)
+        for minute, load in enumerate([1.0, 1.0, 1.0, 1.99]):
+            history.record(
+                conn, [("alpha", (load,) + (None,) * 12)], base + minute * 60
+            )
+        history.record(conn, [("beta", (0.01,) + (None,) * 12)], base)
+        history.record(conn, [("beta", (0.02,) + (None,) * 12)], base + 60)
+        history.maintain(conn, now=base + 3600)
+        means = conn.execute("SELECT load1 FROM history_1h ORDER BY host_id").fetchall()
+    assert [m[0] / history.SCALE["load1"] for m in means] == [1.25, 0.02]
+
+
+def test_query_picks_tier_and_buckets(tmp_path):
+    now = time.time()
+    with db.connect(tmp_path / "data.db") as conn:
+        db.init_hosts_schema(conn)
+        start = int(now) - int(now) % 3600 - 3600
+        for minute in range(60):
+            history.record(
+                conn, [("alpha", (float(minute),) + (None,) * 12)], start + minute * 60
+            )
+        tier, step, points = history.query(
+            conn, "alpha", "load1", start, start + 3599, 600
+        )
+        assert tier.step == 60 and step == 600
+        assert [p[1] for p in points] == [4.5, 14.5, 24.5, 34.5, 44.5, 54.5]
+
+    assert history.choose_tier(now - 30 * DAY, 3600, now).table == "history_1h"
+    assert history.choose_tier(now - 30 * DAY, 60, now).table == "history_1h"
+    assert history.choose_tier(now - 600, 60, now).table == "history_1m"
+    assert history.choose_tier(now - 400 * DAY, DAY, now).table == "history_1d"
+
+
+def test_history_endpoint(tmp_path, monkeypatch):
+    monkeypatch.setattr(server, "DB_PATH", tmp_path / "data.db")
+    monkeypatch.setattr(server, "JWT_SECRET", "secret")
+    server.init_db()
+    with db.connect(server.DB_PATH) as conn:
+        db.sync_hosts(conn, [_load(1.5)])
+    headers = {"Authorization": f"Bearer {server.create_token('admin', 'admin')}"}
+    with server.app.test_client() as client:
+        resp = client.get(
+            "/api/v1/hosts/alpha/history?metric=cpu_load&step=5m", headers=headers
+        )
+        assert resp.status_code == 200
+        body = resp.get_json()
+        assert body["metric"] == "load1"
+        assert body["step"] == 300
+        assert [p[1] for p in body["points"]] == [1.5]
+
+        url = "/api/v1/hosts/alpha/history?metric=load1&from=2024-01-01T00:00:00"
+        assert client.get(url, headers=headers).status_code == 200
+        bad = "/api/v1/hosts/alpha/history?metric=nope"
+        assert client.get(bad, headers=headers).status_code == 400
+        bad = "/api/v1/hosts/alpha/history?metric=load1&step=x"
+        assert client.get(bad, headers=headers).status_code == 400
+        missing = "/api/v1/hosts/ghost/history?metric=load1"
+        assert client.get(missing, headers=headers).status_code == 404
+        assert client.get("/api/v1/hosts/alpha/history?metric=load1").status_code == 401
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "step=10000000000000000000000d",
+        "to=99999999999999999999",
+        "from=-99999999999999999999",
+        "to=nan",
+        "to=inf",
+    ],
+)
+def test_history_endpoint_rejects_out_of_range(tmp_path, monkeypatch, query):
+    monkeypatch.setattr(server, "DB_PATH", tmp_path / "data.db")
+    monkeypatch.setattr(server, "JWT_SECRET", "secret")
+    server.init_db()
+    with db.connect(server.DB_PATH) as conn:
+        db.sync_hosts(conn, [_load(1.5)])
+    headers = {"Authorization": f"Bearer {server.create_token('admin', 'admin')}"}
+    with server.app.test_client() as client:
+        resp = client.get(
+            f"/api/v1/hosts/alpha/history?metric=load1&{query}", headers=headers
+        )
+    assert resp.status_code == 400
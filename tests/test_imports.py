@@ -0,0 +1,72 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from autoconfig import collect_and_visualize as cav
+
+DEFERRED = ("jinja2", "jwt", "prometheus_client")
+
+PROBE = """
+import json, logging, sys
+import {module}
+print(json.dumps({{
+    "loaded": [name for name in {deferred!r} if name in sys.modules],
+    "handlers": len(logging.getLogger().handlers),
+}}))
+"""
+
+
+@pytest.mark.parametrize(
+    "module, allowed",
+    [
+        ("autoconfig.collect_and_visualize", ()),
+        # Flask itself depends on Jinja.
+        ("autoconfig.server", ("jinja2",)),
+    ],
+)
+def test_import_defers_heavy_modules_and_logging(module, allowed):
+    code = PROBE.format(module=module, deferred=DEFERRED)
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    result = json.loads(out)
+    assert [name for name in result["loaded"] if name not in allowed] == []
+    assert result["handlers"] == 0
+
+
+def test_templates_are_compiled_once():
+    template = cav.load_template(cav.HTML_TEMPLATE_PATH)
+    assert cav.load_template(cav.HTML_TEMPLATE_PATH) is template
+
+
+def test_request_metrics_are_created_once_under_concurrency():
+    code = """
+import threading
+from autoconfig import server
+barrier = threading.Barrier(8)
+results, errors = [], []
+def first_request():
+    barrier.wait()
+    try:
+        results.append(server.request_metrics())
+    except Exception as exc:
+        errors.append(exc)
+threads = [threading.Thread(target=first_request) for _ in range(8)]
+for thread in threads:
+    thread.start()
+for thread in threads:
+    thread.join()
+assert not errors, errors
+assert all(result is results[0] for result in results)
+"""
+    subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True)
@@ -0,0 +1,108 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from autoconfig import collect_and_visualize as cav
+from autoconfig import state
+
+OUTPUTS = {
+    "hostname": "web1\n",
+    "users": "root:x:0:0::/root:/bin/sh\n",
+    "ports": "Netid State\ntcp LISTEN 0 128 0.0.0.0:22 0.0.0.0:*\n",
+    "disk": "50G 20G 30G 40%\n",
+    "memory": "Mem: 100 50 50 0 0 50\n",
+    "cpu_load": "0.10 0.20 0.30 1/100 42\n",
+    "net": "eth0: 1 0 0 0 0 0 0 0 2 0 0 0 0 0 0 0\n",
+    "sensors": "",
+}
+
+
+class Clock:
+    now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_state_ttls_and_persistence(tmp_path):
+    clock = Clock()
+    path = tmp_path / state.STATE_FILE
+    st = state.CollectionState(path, ttl=60, stable_ttl=600, clock=clock)
+    assert not st.is_fresh("a")
+    assert st.sections("a") is None
+    assert st.record("a", "h1", "facts_a.json")
+    assert st.is_fresh("a")
+
+    clock.now += 120
+    assert not st.is_fresh("a")
+    assert st.sections("a") == list(state.VOLATILE_SECTIONS)
+    assert not st.record("a", "h1", "facts_a.json", full=False)
+    st.save()
+
+    clock.now += 600
+    reloaded = state.CollectionState(path, ttl=60, stable_ttl=600, clock=clock)
+    assert reloaded.get("a")["hash"] == "h1"
+    assert reloaded.sections("a") is None
+
+
+def test_incremental_probe_collects_volatile_sections(tmp_path, monkeypatch):
+    clock = Clock()
+    calls = []
+    outputs = dict(OUTPUTS)
+
+    def fake_probe(host, sections=None, timeout=None, timings=None):
+        calls.append(sections)
+        return {k: v for k, v in outputs.items() if not sections or k in sections}
+
+    monkeypatch.setattr(cav.ssh, "run_probe", fake_probe)
+    monkeypatch.setattr(cav, "RESULTS_DIR", tmp_path)
+    monkeypatch.setattr(cav, "SSH_MODE", "probe")
+    monkeypatch.setattr(
+        cav,
+        "STATE",
+        state.CollectionState(tmp_path / "state.json", 60, 600, clock=clock),
+    )
+
+    first = cav.collect_local_facts("web1")
+    assert calls == [None]
+    path = tmp_path / "facts_web1.json"
+    path.write_text(path.read_text() + " ")  # detect rewrites
+
+    clock.now += 120
+    outputs["users"] = "someone:x:1:1::/:/bin/sh\n"
+    assert cav.collect_local_facts("web1") == first
+    assert calls[-1] == list(state.VOLATILE_SECTIONS)
+    assert path.read_text().endswith(" ")
+
+    outputs["cpu_load"] = "4.00 3.00 2.00 1/100 42\n"
+    clock.now += 120
+    second = cav.collect_local_facts("web1")
+    assert second["load"] == [4.0, 3.0, 2.0]
+    assert second["users"] == first["users"]
+    assert not path.read_text().endswith(" ")
+
+
+def test_fresh_hosts_are_skipped(tmp_path, monkeypatch):
+    monkeypatch.setattr(cav, "RESULTS_DIR", tmp_path)
+    monkeypatch.setattr(cav, "DB_PATH", tmp_path / "data.db")
+    monkeypatch.setattr(cav.shutil, "which", lambda name: None)
+    monkeypatch.setattr(
+        cav, "STATE", state.CollectionState(tmp_path / "state.json", ttl=60)
+    )
+    collected = []
+
+    def fake_collect(host, timeout=None):
+        collected.append(host)
+        data = {"hostname": host}
+        cav._record(host, data)
+        return data
+
+    monkeypatch.setattr(cav, "collect_local_facts", fake_collect)
+    cav.run_playbook(["a", "b"])
+    summary = cav.run_playbook(["a", "b", "c"])
+
+    assert sorted(collected) == ["a", "b", "c"]
+    assert summary.as_dict()["skipped"] == 2
+    assert summary.as_dict()["ok"] == 1
+    assert (tmp_path / "state.json").exists()
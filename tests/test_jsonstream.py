@@ -0,0 +1,40 @@
+import io
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from autoconfig.jsonstream import ArrayWriter, iter_json_array
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 65536])
+def test_iter_json_array_matches_json_load(chunk_size):
+    data = [{"hostname": "a", "users": ["x", "y"]}, 12345, "s,]", [], {"n": 1.5}]
+    text = " \n" + json.dumps(data, indent=2) + "\n"
+    result = list(iter_json_array(io.StringIO(text), chunk_size=chunk_size))
+    assert result == data
+
+
+def test_iter_json_array_empty():
+    assert list(iter_json_array(io.StringIO(" [ ] "))) == []
+
+
+@pytest.mark.parametrize("text", ["{}", "[1, 2", "[1 2]", '[{"a": ]'])
+def test_iter_json_array_rejects_malformed(text):
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.StringIO(text), chunk_size=2))
+
+
+@pytest.mark.parametrize("data", [[], [{"hostname": "a", "users": ["x"]}, 1, "s"]])
+def test_array_writer_round_trips(data):
+    out, copy = io.StringIO(), io.StringIO()
+    writer = ArrayWriter(out, copy)
+    assert list(writer.tee(iter(data))) == data
+    writer.close()
+    assert out.getvalue() == copy.getvalue()
+    assert json.loads(out.getvalue()) == data
+    assert list(iter_json_array(io.StringIO(out.getvalue()))) == data
+    assert ": " not in out.getvalue()
@@ -0,0 +1,96 @@
+import json
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from autoconfig import collect_and_visualize as cav
+from autoconfig import facts, procfs
+
+MEMINFO = """MemTotal:        6158152 kB
+MemFree:         5001716 kB
+MemAvailable:    5651760 kB
+Buffers:           60564 kB
+Cached:           799564 kB
+Shmem:              9288 kB
+SReclaimable:      23056 kB
+"""
+
+TCP = """  sl  local_address rem_address   st tx_queue rx_queue tr tm->when
+   0: 0100007F:0035 00000000:0000 0A 00000000:00000000 00:00000000 0
+   1: 0100007F:88BE 0100007F:BC8F 01 00000000:00000000 02:00001088 0
+"""
+
+TCP6 = (
+    "  sl  local_address remote_address st\n"
+    "   0: " + "0" * 32 + ":0016 " + "0" * 32 + ":0000 0A 00000000:00000000\n"
+)
+
+UDP = """   sl  local_address rem_address   st tx_queue rx_queue
+  1: 00000000:0044 00000000:0000 07 00000000:00000000 00:00000000 0
+"""
+
+
+def fake_proc(root):
+    (root / "net").mkdir(parents=True)
+    (root / "meminfo").write_text(MEMINFO)
+    (root / "loadavg").write_text("0.04 0.11 0.10 1/71 12290\n")
+    (root / "net" / "tcp").write_text(TCP)
+    (root / "net" / "tcp6").write_text(TCP6)
+    (root / "net" / "udp").write_text(UDP)
+    return root
+
+
+def test_memory_matches_free(tmp_path):
+    line = procfs.memory(fake_proc(tmp_path))
+    assert line == "Mem: 6013 494 4884 9 862 5519\n"
+    total, used, available = facts.parse_memory(line.strip())
+    assert (total, used, available) == (
+        6013 * facts.MIB,
+        494 * facts.MIB,
+        5519 * facts.MIB,
+    )
+
+
+def test_sockets_match_ss(tmp_path):
+    lines = procfs.sockets(fake_proc(tmp_path)).splitlines()
+    assert facts.parse_ss(lines) == [
+        {"proto": "tcp", "state": "LISTEN", "address": "127.0.0.1", "port": 53},
+        {"proto": "tcp", "state": "LISTEN", "address": "::", "port": 22},
+        {"proto": "udp", "state": "UNCONN", "address": "0.0.0.0", "port": 68},
+    ]
+
+
+def test_human_size_rounds_up_like_df():
+    assert procfs.human_size(512) == "512"
+    assert procfs.human_size(1536) == "1.5K"
+    assert procfs.human_size(18 * (1 << 30) + 1) == "19G"
+    assert procfs.human_size(9.81 * (1 << 30)) == "9.9G"
+
+
+def test_collect_local_facts_native(tmp_path, monkeypatch):
+    monkeypatch.setattr(cav, "RESULTS_DIR", tmp_path)
+    monkeypatch.setattr(cav, "LOCAL_COLLECTOR", "native")
+    monkeypatch.setattr(cav.subprocess, "check_output", None)
+    data = cav.collect_local_facts()
+    assert set(data) == {
+        "hostname",
+        "users",
+        "ports",
+        "disk",
+        "memory",
+        "cpu_load",
+        "net",
+        "sensors",
+        "load",
+        "memory_bytes",
+        "disk_usage",
+        "interfaces",
+        "sockets",
+    }
+    assert "root" in facts.parse_usernames(data["users"])
+    metrics = facts.host_metrics(data)
+    assert metrics["mem_total"] > 0 and metrics["disk_total"] > 0
+    assert metrics["load1"] is not None
+    with open(tmp_path / f"facts_{data['hostname']}.json") as f:
+        assert json.load(f) == data
@@ -0,0 +1,92 @@
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from autoconfig import scheduler
+
+
+def test_results_are_yielded_as_hosts_complete():
+    delays = {"slow": 0.2, "fast": 0.0}
+
+    def task(host, timeout):
+        time.sleep(delays[host])
+        return {"hostname": host}
+
+    results = list(scheduler.run_tasks(task, ["slow", "fast"], max_workers=2))
+    assert [r.host for r in results] == ["fast", "slow"]
+    assert all(r.ok for r in results)
+    assert results[1].data == {"hostname": "slow"}
+    assert results[1].duration >= 0.2
+
+
+def test_concurrency_is_bounded():
+    lock = threading.Lock()
+    active = peak = 0
+
+    def task(host, timeout):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.01)
+        with lock:
+            active -= 1
+
+    results = list(scheduler.run_tasks(task, range(1, 21), max_workers=3))
+    assert len(results) == 20
+    assert peak <= 3
+
+
+def test_failures_and_timeouts_are_reported():
+    release = threading.Event()
+
+    def task(host, timeout):
+        if host == "broken":
+            raise subprocess.CalledProcessError(255, "ssh")
+        if host == "slow":
+            raise subprocess.TimeoutExpired("ssh", timeout)
+        if host == "hung":
+            release.wait(5)
+        return {}
+
+    summary = scheduler.Summary()
+    hosts = ["ok", "broken", "slow", "hung"]
+    for result in scheduler.run_tasks(
+        task, hosts, max_workers=4, timeout=0.05, grace=0.05
+    ):
+        summary.add(result)
+    release.set()
+
+    stats = summary.as_dict()
+    assert stats["ok"] == 1
+    assert stats["failed"] == ["broken"]
+    assert sorted(stats["timeout"]) == ["hung", "slow"]
+    assert set(stats["durations"]) == set(hosts)
+    assert stats["durations"]["hung"] < 1
+
+
+def test_timeout_counts_from_task_start():
+    ran = []
+
+    def task(host, timeout):
+        ran.append(host)
+        if host == "hang":
+            # Overruns its timeout and grace, then returns.
+            time.sleep(0.4)
+        return {}
+
+    results = list(
+        scheduler.run_tasks(
+            task, ["hang", "b", "c"], max_workers=1, timeout=0.05, grace=0.05
+        )
+    )
+    assert ran == ["hang", "b", "c"]
+    assert {r.host: r.status for r in results} == {
+        "hang": scheduler.TIMEOUT,
+        "b": scheduler.OK,
+        "c": scheduler.OK,
+    }
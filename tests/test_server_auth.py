@@ -3,6 +3,8 @@ from pathlib import Path
 
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
+import jwt
+
 from autoconfig import server
 
 
@@ -43,3 +45,43 @@ def test_hosts_valid_token(tmp_path, monkeypatch):
         assert resp.status_code == 200
     server.DB_PATH = original_db
 
+
+def test_token_cache_skips_signature_check(tmp_path, monkeypatch):
+    original_db = _setup(tmp_path, monkeypatch)
+    token = server.create_token("admin", "admin")
+    calls = []
+    real_decode = jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        calls.append(1)
+        return real_decode(*args, **kwargs)
+
+    monkeypatch.setattr(jwt, "decode", counting_decode)
+    assert server.decode_token(token)["sub"] == "admin"
+    assert server.decode_token(token)["sub"] == "admin"
+    assert len(calls) == 1
+    server.DB_PATH = original_db
+
+
+def test_logout_revokes_token(tmp_path, monkeypatch):
+    original_db = _setup(tmp_path, monkeypatch)
+    app = server.app
+    with app.test_client() as client:
+        token = server.create_token("admin", "admin")
+        headers = {"Authorization": f"Bearer {token}"}
+        assert client.get("/api/hosts", headers=headers).status_code == 200
+        assert client.post("/auth/logout", headers=headers).status_code == 204
+        assert client.get("/api/hosts", headers=headers).status_code == 401
+    server.DB_PATH = original_db
+
+
+def test_refresh_revokes_previous_token(tmp_path, monkeypatch):
+    original_db = _setup(tmp_path, monkeypatch)
+    app = server.app
+    with app.test_client() as client:
+        old = {"Authorization": f"Bearer {server.create_token('admin', 'admin')}"}
+        resp = client.post("/auth/refresh", headers=old)
+        new = {"Authorization": f"Bearer {resp.get_json()['token']}"}
+        assert client.get("/api/hosts", headers=old).status_code == 401
+        assert client.get("/api/hosts", headers=new).status_code == 200
+    server.DB_PATH = original_db
@@ -0,0 +1,218 @@
+import gzip
+import io
+import json
+import sqlite3
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from autoconfig import db, server
+
+
+def _setup(tmp_path, monkeypatch, role="admin"):
+    monkeypatch.setattr(server, "DB_PATH", tmp_path / "data.db")
+    monkeypatch.setattr(server, "JWT_SECRET", "secret")
+    server.init_db()
+    return {"Authorization": f"Bearer {server.create_token(role, role)}"}
+
+
+def _hostnames():
+    with db.connect(server.DB_PATH) as conn:
+        return sorted(r[0] for r in conn.execute("SELECT hostname FROM hosts"))
+
+
+def test_batch_requires_writer_role(tmp_path, monkeypatch):
+    headers = _setup(tmp_path, monkeypatch, role="readonly")
+    with server.app.test_client() as client:
+        assert client.post("/api/v1/hosts:batch", json=[]).status_code == 401
+        resp = client.post("/api/v1/hosts:batch", json=[], headers=headers)
+        assert resp.status_code == 403
+
+
+def test_batch_json_array_upserts_without_pruning(tmp_path, monkeypatch):
+    headers = _setup(tmp_path, monkeypatch)
+    with db.connect(server.DB_PATH) as conn:
+        db.sync_hosts(conn, [{"hostname": "old"}])
+    body = [
+        {"hostname": "alpha", "cpu_load": "0.50 0.40 0.30 1/100 1"},
+        {"users": []},
+        "beta",
+        {"hostname": "old"},
+    ]
+    with server.app.test_client() as client:
+        resp = client.post("/api/v1/hosts:batch", json=body, headers=headers)
+    result = resp.get_json()
+    assert resp.status_code == 200
+    assert (result["accepted"], result["rejected"], result["added"]) == (2, 2, 1)
+    assert [h["status"] for h in result["hosts"]] == [
+        "accepted",
+        "rejected",
+        "rejected",
+        "accepted",
+    ]
+    assert result["hosts"][1] == {
+        "index": 1,
+        "status": "rejected",
+        "error": "hostname required",
+    }
+    assert _hostnames() == ["alpha", "old"]
+    hosts = {h["hostname"]: h for h in server.get_hosts()}
+    assert hosts["alpha"]["load"] == [0.5, 0.4, 0.3]
+
+
+def test_batch_ndjson_gzip_rejects_bad_lines(tmp_path, monkeypatch):
+    headers = _setup(tmp_path, monkeypatch)
+    lines = [
+        json.dumps({"hostname": "a"}),
+        "{not json",
+        "",
+        json.dumps({"hostname": "b"}),
+    ]
+    body = gzip.compress("\n".join(lines).encode())
+    headers.update({"Content-Type": "application/x-ndjson", "Content-Encoding": "gzip"})
+    with server.app.test_client() as client:
+        resp = client.post("/api/v1/hosts:batch", data=body, headers=headers)
+    result = resp.get_json()
+    assert (result["accepted"], result["rejected"]) == (2, 1)
+    assert result["hosts"][1]["error"].startswith("invalid JSON")
+    assert _hostnames() == ["a", "b"]
+
+
+def test_batch_malformed_array_is_rolled_back(tmp_path, monkeypatch):
+    headers = _setup(tmp_path, monkeypatch)
+    headers["Content-Type"] = "application/json"
+    body = '[{"hostname": "a"}, {"hostname": '
+    with server.app.test_client() as client:
+        resp = client.post("/api/v1/hosts:batch", data=body, headers=headers)
+    assert resp.status_code == 400
+    assert _hostnames() == []
+
+
+def test_batch_rejects_badly_typed_documents_only(tmp_path, monkeypatch):
+    headers = _setup(tmp_path, monkeypatch)
+    body = [
+        {"hostname": "d", "cpu_load": "1 2 3"},
+        {"hostname": "e", "disk_usage": {"used_pct": "50%"}},
+        {"hostname": "f", "load": ["x"]},
+        {"hostname": "g", "sockets": [{"port": "abc"}]},
+        {"hostname": "h", "interfaces": {"eth0": "x"}},
+        {"hostname": "i", "memory_bytes": {"total": 2**70}},
+        {"hostname": "j", "sockets": [{"port": 22}], "load": [0.5, 0.1, 0.1]},
+    ]
+    with server.app.test_client() as client:
+        resp = client.post("/api/v1/hosts:batch", json=body, headers=headers)
+    assert resp.status_code == 200
+    result = resp.get_json()
+    assert (result["accepted"], result["rejected"]) == (2, 5)
+    assert [h["status"] for h in result["hosts"]] == ["accepted"] + ["rejected"] * 5 + [
+        "accepted"
+    ]
+    assert _hostnames() == ["d", "j"]
+
+
+def test_reload_keeps_pushed_hosts(tmp_path, monkeypatch):
+    headers = _setup(tmp_path, monkeypatch)
+    data_json = tmp_path / "data.json"
+    monkeypatch.setattr(server, "DATA_JSON", data_json)
+    monkeypatch.setattr(server, "DATA_SNAPSHOT", tmp_path / "data.snap")
+    with server.app.test_client() as client:
+        body = [{"hostname": "pushed1"}, {"hostname": "pushed2"}]
+        client.post("/api/v1/hosts:batch", json=body, headers=headers)
+        resp = client.post("/api/reload", headers=headers)
+        assert resp.get_json()["removed"] == 0
+        assert _hostnames() == ["pushed1", "pushed2"]
+
+        data_json.write_text(json.dumps([{"hostname": "filed"}]))
+        resp = client.post("/api/reload", headers=headers)
+        assert resp.get_json()["removed"] == 0
+        assert _hostnames() == ["filed", "pushed1", "pushed2"]
+
+        data_json.write_text("[]")
+        resp = client.post("/api/reload", headers=headers)
+        assert resp.get_json()["removed"] == 1
+        assert _hostnames() == ["pushed1", "pushed2"]
+
+
+class _ReadOnlyBody:
+    """WSGI input offering nothing but ``read``, like gunicorn's."""
+
+    def __init__(self, data):
+        self._data = io.BytesIO(data)
+
+    def read(self, size=-1):
+        return self._data.read(size)
+
+
+def test_batch_reads_minimal_wsgi_input(tmp_path, monkeypatch):
+    headers = _setup(tmp_path, monkeypatch)
+    body = b'{"hostname": "alpha"}\n{"hostname": "beta"}\n'
+    with server.app.test_client() as client:
+        resp = client.post(
+            "/api/v1/hosts:batch",
+            headers={**headers, "Content-Type": "application/x-ndjson"},
+            environ_overrides={
+                "wsgi.input": _ReadOnlyBody(body),
+                "wsgi.input_terminated": True,
+            },
+        )
+    assert resp.get_json()["accepted"] == 2
+    assert _hostnames() == ["alpha", "beta"]
+
+
+class _WritingBody(_ReadOnlyBody):
+    """Body that tries a write from another connection while it is read."""
+
+    def __init__(self, data, path):
+        super().__init__(data)
+        self._path = path
+        self.error = None
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        if not chunk and self.error is None:
+            conn = sqlite3.connect(self._path, timeout=0)
+            try:
+                with conn:
+                    conn.execute("UPDATE hosts SET data = data")
+                self.error = ""
+            except sqlite3.OperationalError as exc:
+                self.error = str(exc)
+            finally:
+                conn.close()
+        return chunk
+
+
+def test_batch_does_not_lock_writers_while_reading(tmp_path, monkeypatch):
+    headers = _setup(tmp_path, monkeypatch)
+    lines = [json.dumps({"hostname": f"host{i}"}) for i in range(db.BATCH_SIZE + 1)]
+    body = _WritingBody(("\n".join(lines) + "\n").encode(), server.DB_PATH)
+    with server.app.test_client() as client:
+        resp = client.post(
+            "/api/v1/hosts:batch",
+            headers={**headers, "Content-Type": "application/x-ndjson"},
+            environ_overrides={"wsgi.input": body, "wsgi.input_terminated": True},
+        )
+    assert resp.get_json()["accepted"] == db.BATCH_SIZE + 1
+    assert body.error == ""
+
+
+def test_batch_answers_503_when_database_is_locked(tmp_path, monkeypatch):
+    headers = _setup(tmp_path, monkeypatch)
+    monkeypatch.setattr(db, "BUSY_TIMEOUT_SECONDS", 0)
+    db.close_all()
+    blocker = sqlite3.connect(server.DB_PATH)
+    blocker.execute("BEGIN IMMEDIATE")
+    try:
+        with server.app.test_client() as client:
+            resp = client.post(
+                "/api/v1/hosts:batch", json=[{"hostname": "a"}], headers=headers
+            )
+    finally:
+        blocker.rollback()
+        blocker.close()
+        db.close_all()
+    assert resp.status_code == 503
+    assert resp.headers["Retry-After"] == str(server.BATCH_RETRY_SECONDS)
+    assert "locked" in resp.get_json()["error"]
+    assert _hostnames() == []
@@ -0,0 +1,93 @@
+import sys
+from pathlib import Path
+import json
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from autoconfig import server
+
+
+def _setup(tmp_path, monkeypatch):
+    data_file = tmp_path / "data.json"
+    with open(data_file, "w") as f:
+        json.dump([{"hostname": "alpha"}], f)
+    monkeypatch.setattr(server, "DB_PATH", tmp_path / "data.db")
+    monkeypatch.setattr(server, "DATA_JSON", data_file)
+    monkeypatch.setattr(server, "JWT_SECRET", "secret")
+    monkeypatch.setattr(
+        server, "USERS", {"admin": {"password": "admin", "role": "admin"}}
+    )
+    server.init_db()
+    server.load_data()
+    return data_file
+
+
+def _auth(client):
+    login = client.post("/auth/login", json={"username": "admin", "password": "admin"})
+    return {"Authorization": f"Bearer {login.get_json()['token']}"}
+
+
+def test_hosts_etag_not_modified(tmp_path, monkeypatch):
+    _setup(tmp_path, monkeypatch)
+    with server.app.test_client() as client:
+        headers = _auth(client)
+        resp = client.get("/api/hosts", headers=headers)
+        assert resp.status_code == 200
+        etag = resp.headers["ETag"]
+        assert resp.headers["Last-Modified"]
+
+        resp = client.get("/api/hosts", headers={**headers, "If-None-Match": etag})
+        assert resp.status_code == 304
+        assert resp.data == b""
+
+
+def test_hosts_cache_invalidated_by_reload(tmp_path, monkeypatch):
+    data_file = _setup(tmp_path, monkeypatch)
+    with server.app.test_client() as client:
+        headers = _auth(client)
+        first = client.get("/api/hosts", headers=headers)
+        with open(data_file, "w") as f:
+            json.dump([{"hostname": "alpha"}, {"hostname": "beta"}], f)
+        client.post("/api/reload", headers=headers)
+        resp = client.get(
+            "/api/hosts", headers={**headers, "If-None-Match": first.headers["ETag"]}
+        )
+        assert resp.status_code == 200
+        assert [h["hostname"] for h in resp.get_json()] == ["alpha", "beta"]
+
+
+def test_generation_bumps_on_write(tmp_path, monkeypatch):
+    _setup(tmp_path, monkeypatch)
+    with server.db.connect(server.DB_PATH) as conn:
+        before, _ = server.db.get_generation(conn)
+        server.db.sync_hosts(conn, [{"hostname": "beta"}])
+        after, _ = server.db.get_generation(conn)
+    assert after == before + 1
+
+
+def test_hosts_cache_drops_older_generations(tmp_path, monkeypatch):
+    data_file = _setup(tmp_path, monkeypatch)
+    monkeypatch.setattr(server, "HOSTS_CACHE", server.LRUCache(128))
+    with server.app.test_client() as client:
+        headers = _auth(client)
+        client.get("/api/hosts", headers=headers)
+        client.get("/api/hosts?search=al", headers=headers)
+        assert len(server.HOSTS_CACHE) == 2
+        with open(data_file, "w") as f:
+            json.dump([{"hostname": "beta"}], f)
+        client.post("/api/reload", headers=headers)
+        client.get("/api/hosts", headers=headers)
+        assert len(server.HOSTS_CACHE) == 1
+
+
+def test_hosts_cache_bounded_by_bytes(tmp_path, monkeypatch):
+    _setup(tmp_path, monkeypatch)
+    cache = server.LRUCache(128, maxbytes=60, sizeof=lambda entry: entry.nbytes)
+    monkeypatch.setattr(server, "HOSTS_CACHE", cache)
+    with server.app.test_client() as client:
+        headers = _auth(client)
+        for i in range(5):
+            resp = client.get(f"/api/hosts?search=alpha&limit={i + 1}", headers=headers)
+            assert resp.status_code == 200
+        assert 0 < cache.nbytes <= 60
+        assert len(cache) < 5
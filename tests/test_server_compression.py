@@ -0,0 +1,62 @@
+import gzip
+import json
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from autoconfig import db, server
+
+
+def _setup(tmp_path, monkeypatch, count=50):
+    monkeypatch.setattr(server, "DB_PATH", tmp_path / "data.db")
+    monkeypatch.setattr(server, "JWT_SECRET", "secret")
+    server.init_db()
+    hosts = [
+        {"hostname": f"host{i}", "users": ["root:x:0:0:root:/root:/bin/bash"] * 5}
+        for i in range(count)
+    ]
+    with db.connect(server.DB_PATH) as conn:
+        db.sync_hosts(conn, hosts)
+    return {"Authorization": f"Bearer {server.create_token('admin', 'admin')}"}
+
+
+def test_hosts_gzip_negotiation(tmp_path, monkeypatch):
+    headers = _setup(tmp_path, monkeypatch)
+    with server.app.test_client() as client:
+        plain = client.get("/api/hosts", headers=headers)
+        assert "Content-Encoding" not in plain.headers
+        resp = client.get(
+            "/api/hosts", headers={**headers, "Accept-Encoding": "gzip, deflate"}
+        )
+        assert resp.headers["Content-Encoding"] == "gzip"
+        assert "Accept-Encoding" in resp.headers["Vary"]
+        assert gzip.decompress(resp.data) == plain.data
+        assert len(resp.data) < len(plain.data)
+
+        etag = resp.headers["ETag"]
+        resp = client.get(
+            "/api/hosts",
+            headers={**headers, "Accept-Encoding": "gzip", "If-None-Match": etag},
+        )
+        assert resp.status_code == 304
+
+
+def test_small_responses_are_not_compressed(tmp_path, monkeypatch):
+    headers = _setup(tmp_path, monkeypatch, count=1)
+    with server.app.test_client() as client:
+        resp = client.get("/api/hosts", headers={**headers, "Accept-Encoding": "gzip"})
+        assert "Content-Encoding" not in resp.headers
+        assert json.loads(resp.data)[0]["hostname"] == "host0"
+
+
+def test_other_json_responses_are_compressed(tmp_path, monkeypatch):
+    headers = _setup(tmp_path, monkeypatch)
+    for i in range(20):
+        server.create_template(f"tpl{i}", "description " * 10, {"i": i})
+    with server.app.test_client() as client:
+        resp = client.get(
+            "/api/v1/templates", headers={**headers, "Accept-Encoding": "gzip"}
+        )
+        assert resp.headers["Content-Encoding"] == "gzip"
+        assert len(json.loads(gzip.decompress(resp.data))) == 20
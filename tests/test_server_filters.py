@@ -1,11 +1,9 @@
 import sys
 from pathlib import Path
-import json
-import sqlite3
 
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
-from autoconfig import server
+from autoconfig import db, server
 
 
 def _prepare_db(tmp_path):
@@ -17,13 +15,8 @@ def _prepare_db(tmp_path):
         {"hostname": "beta", "memory": 1024},
         {"hostname": "gamma", "memory": 3072},
     ]
-    with sqlite3.connect(server.DB_PATH) as conn:
-        cur = conn.cursor()
-        for h in sample:
-            cur.execute(
-                "INSERT INTO hosts(hostname, data) VALUES(?, ?)",
-                (h["hostname"], json.dumps(h)),
-            )
+    with db.connect(server.DB_PATH) as conn:
+        db.sync_hosts(conn, sample)
     return sample, original_db
 
 
@@ -47,3 +40,21 @@ def test_get_hosts_order_desc(tmp_path):
     result = server.get_hosts(sort="hostname", order="desc")
     assert [h["hostname"] for h in result] == ["gamma", "beta", "alpha"]
     server.DB_PATH = original_db
+
+
+def test_get_hosts_sorts_load_numerically(tmp_path):
+    original_db = server.DB_PATH
+    server.DB_PATH = tmp_path / "data.db"
+    server.init_db()
+    sample = [
+        {"hostname": "alpha", "cpu_load": "10.50 1.00 0.50 1/123 4567"},
+        {"hostname": "beta", "cpu_load": "9.00 2.00 0.10 1/123 4567"},
+        {"hostname": "gamma", "cpu_load": "0.15 0.10 0.05 1/123 4567"},
+    ]
+    with db.connect(server.DB_PATH) as conn:
+        db.sync_hosts(conn, sample)
+    result = server.get_hosts(sort="cpu_load", order="desc")
+    assert [h["hostname"] for h in result] == ["alpha", "beta", "gamma"]
+    result = server.get_hosts(filters={"load1": (None, 9.0)})
+    assert sorted(h["hostname"] for h in result) == ["beta", "gamma"]
+    server.DB_PATH = original_db
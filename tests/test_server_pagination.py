@@ -0,0 +1,88 @@
+import base64
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from autoconfig import db, server
+
+
+def _prepare_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(server, "DB_PATH", tmp_path / "data.db")
+    server.init_db()
+    sample = [
+        {"hostname": f"host{i}", "cpu_load": f"{i % 3} 0 0", "users": ["root"]}
+        for i in range(7)
+    ]
+    sample.append({"hostname": "noload", "users": []})
+    with db.connect(server.DB_PATH) as conn:
+        db.sync_hosts(conn, sample)
+    return sample
+
+
+def _all_pages(**kwargs):
+    names, cursor = [], None
+    while True:
+        documents, cursor = server.query_hosts(limit=3, cursor=cursor, **kwargs)
+        names.extend(json.loads(d)["hostname"] for d in documents)
+        if cursor is None:
+            return names
+
+
+@pytest.mark.parametrize("order", ["asc", "desc"])
+@pytest.mark.parametrize("sort", ["hostname", "cpu_load"])
+def test_cursor_pages_match_full_listing(tmp_path, monkeypatch, sort, order):
+    _prepare_db(tmp_path, monkeypatch)
+    expected = [h["hostname"] for h in server.get_hosts(sort=sort, order=order)]
+    assert len(expected) == 8
+    assert _all_pages(sort=sort, order=order) == expected
+
+
+def test_fields_projection(tmp_path, monkeypatch):
+    _prepare_db(tmp_path, monkeypatch)
+    result = server.get_hosts(sort="hostname", fields=("hostname", "load1", "users"))
+    assert result[0] == {"hostname": "host0", "load1": 0.0, "users": ["root"]}
+    with pytest.raises(ValueError):
+        server.get_hosts(fields=("data') --",))
+
+
+def test_hosts_endpoint_pagination(tmp_path, monkeypatch):
+    _prepare_db(tmp_path, monkeypatch)
+    monkeypatch.setattr(server, "JWT_SECRET", "secret")
+    headers = {"Authorization": f"Bearer {server.create_token('admin', 'admin')}"}
+    with server.app.test_client() as client:
+        resp = client.get(
+            "/api/hosts?limit=5&sort=hostname&fields=hostname", headers=headers
+        )
+        assert resp.status_code == 200
+        assert len(resp.get_json()) == 5
+        cursor = resp.headers["X-Next-Cursor"]
+        resp = client.get(
+            f"/api/hosts?limit=5&sort=hostname&fields=hostname&cursor={cursor}",
+            headers=headers,
+        )
+        assert [h["hostname"] for h in resp.get_json()] == [
+            "host5",
+            "host6",
+            "noload",
+        ]
+        assert "X-Next-Cursor" not in resp.headers
+        resp = client.get("/api/hosts?limit=5&cursor=%%%", headers=headers)
+        assert resp.status_code == 400
+
+
+@pytest.mark.parametrize("value", [{"a": 1}, [1], 2**64])
+def test_crafted_cursor_rejected(tmp_path, monkeypatch, value):
+    _prepare_db(tmp_path, monkeypatch)
+    monkeypatch.setattr(server, "JWT_SECRET", "secret")
+    headers = {"Authorization": f"Bearer {server.create_token('admin', 'admin')}"}
+    cursor = base64.urlsafe_b64encode(json.dumps([value, "x"]).encode())
+    with server.app.test_client() as client:
+        resp = client.get(
+            f"/api/hosts?limit=1&sort=load1&cursor={cursor.decode()}",
+            headers=headers,
+        )
+    assert resp.status_code == 400
@@ -57,7 +57,12 @@ def test_reload_valid_token(tmp_path, monkeypatch):
         token = login.get_json()["token"]
         resp = client.post("/api/reload", headers={"Authorization": f"Bearer {token}"})
         assert resp.status_code == 200
-        assert resp.get_json() == {"status": "reloaded"}
+        assert resp.get_json() == {
+            "status": "reloaded",
+            "added": 1,
+            "changed": 0,
+            "removed": 0,
+        }
     hosts = server.get_hosts()
     assert hosts[0]["hostname"] == "alpha"
     _teardown(originals)
@@ -0,0 +1,73 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from autoconfig import db, server
+
+SS_HEADER = "Netid State Recv-Q Send-Q Local Address:Port Peer Address:Port"
+
+
+def _prepare_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(server, "DB_PATH", tmp_path / "data.db")
+    server.init_db()
+    sample = [
+        {
+            "hostname": "web-01.example.com",
+            "users": ["root:x:0:0::/root:/bin/bash", "deploy:x:1000:1000::/:/bin/sh"],
+            "ports": [SS_HEADER, "tcp LISTEN 0 128 0.0.0.0:443 0.0.0.0:*"],
+        },
+        {
+            "hostname": "db-01.example.com",
+            "users": ["root:x:0:0::/root:/bin/bash", "postgres:x:26:26::/:/bin/sh"],
+            "ports": [SS_HEADER, "tcp LISTEN 0 128 [::]:5432 [::]:*"],
+        },
+        {
+            "hostname": "db-02.example.com",
+            "users": ["deploy:x:1000:1000::/:/bin/sh"],
+            "ports": [SS_HEADER, "tcp LISTEN 0 128 0.0.0.0:15432 0.0.0.0:*"],
+        },
+    ]
+    with db.connect(server.DB_PATH) as conn:
+        db.sync_hosts(conn, sample)
+    return sample
+
+
+def _names(**kwargs):
+    return sorted(h["hostname"] for h in server.get_hosts(**kwargs))
+
+
+def test_search_by_user_port_and_hostname(tmp_path, monkeypatch):
+    _prepare_db(tmp_path, monkeypatch)
+    assert _names(q="user:deploy") == ["db-02.example.com", "web-01.example.com"]
+    assert _names(q="port:5432") == ["db-01.example.com"]
+    assert _names(q="user:deploy port:443") == ["web-01.example.com"]
+    assert _names(q="db") == ["db-01.example.com", "db-02.example.com"]
+    assert _names(q="host:db-02") == ["db-02.example.com"]
+    assert _names(q='user:"') == []
+
+
+def test_search_index_follows_updates(tmp_path, monkeypatch):
+    sample = _prepare_db(tmp_path, monkeypatch)
+    sample[1]["users"] = ["deploy:x:1000:1000::/:/bin/sh"]
+    with db.connect(server.DB_PATH) as conn:
+        db.sync_hosts(conn, sample[1:])
+    assert _names(q="user:deploy") == ["db-01.example.com", "db-02.example.com"]
+    assert _names(q="port:443") == []
+
+
+def test_search_rejects_empty_query(tmp_path, monkeypatch):
+    _prepare_db(tmp_path, monkeypatch)
+    with pytest.raises(ValueError):
+        server.parse_search_query("user:")
+
+
+def test_hosts_endpoint_q(tmp_path, monkeypatch):
+    _prepare_db(tmp_path, monkeypatch)
+    monkeypatch.setattr(server, "JWT_SECRET", "secret")
+    headers = {"Authorization": f"Bearer {server.create_token('admin', 'admin')}"}
+    with server.app.test_client() as client:
+        resp = client.get("/api/hosts?q=port:5432&fields=hostname", headers=headers)
+        assert resp.get_json() == [{"hostname": "db-01.example.com"}]
@@ -0,0 +1,94 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from autoconfig import db, events, server
+
+
+def _setup(tmp_path, monkeypatch):
+    monkeypatch.setattr(server, "DB_PATH", tmp_path / "data.db")
+    monkeypatch.setattr(server, "JWT_SECRET", "secret")
+    monkeypatch.setattr(server, "SSE_HEARTBEAT_SECONDS", 0.2)
+    server.init_db()
+    return {"Authorization": f"Bearer {server.create_token('admin', 'admin')}"}
+
+
+def _next_event(chunks):
+    for chunk in chunks:
+        chunk = chunk.decode()
+        if chunk.startswith("id:"):
+            return dict(line.split(": ", 1) for line in chunk.strip().splitlines())
+
+
+def test_stream_requires_token(tmp_path, monkeypatch):
+    _setup(tmp_path, monkeypatch)
+    with server.app.test_client() as client:
+        assert client.get("/api/v1/hosts/stream").status_code == 401
+
+
+def test_stream_pushes_generation_changes(tmp_path, monkeypatch):
+    headers = _setup(tmp_path, monkeypatch)
+    with server.app.test_client() as client:
+        resp = client.get("/api/v1/hosts/stream", headers=headers, buffered=False)
+        assert resp.mimetype == "text/event-stream"
+        chunks = resp.response
+        first = _next_event(chunks)
+        assert first["event"] == "hosts"
+
+        with db.connect(server.DB_PATH) as conn:
+            db.sync_hosts(conn, [{"hostname": "alpha"}])
+        events.get_watcher(server.DB_PATH).check_now()
+        second = _next_event(chunks)
+        assert int(second["id"]) == int(first["id"]) + 1
+        resp.close()
+
+
+def test_stream_resumes_from_last_event_id(tmp_path, monkeypatch):
+    headers = _setup(tmp_path, monkeypatch)
+    with db.connect(server.DB_PATH) as conn:
+        current, _ = db.get_generation(conn)
+    with server.app.test_client() as client:
+        resp = client.get(
+            "/api/v1/hosts/stream",
+            headers={**headers, "Last-Event-ID": str(current)},
+            buffered=False,
+        )
+        chunks = iter(resp.response)
+        assert next(chunks).startswith(b"retry:")
+        assert next(chunks) == b": keep-alive\n\n"
+        resp.close()
+
+
+def test_stream_accepts_short_lived_query_token(tmp_path, monkeypatch):
+    headers = _setup(tmp_path, monkeypatch)
+    with server.app.test_client() as client:
+        resp = client.post("/api/v1/hosts/stream/token", headers=headers)
+        assert resp.status_code == 200
+        body = resp.get_json()
+        assert body["expires_in"] == server.STREAM_TOKEN_SECONDS
+        token = body["token"]
+
+        resp = client.get(f"/api/v1/hosts/stream?token={token}", buffered=False)
+        assert resp.status_code == 200
+        assert next(iter(resp.response)).startswith(b"retry:")
+        resp.close()
+
+        # Stream tokens do not work as bearer tokens, and full tokens are
+        # not accepted in the URL.
+        bearer = {"Authorization": f"Bearer {token}"}
+        assert client.get("/api/hosts", headers=bearer).status_code == 401
+        full = headers["Authorization"].split()[1]
+        assert client.get(f"/api/v1/hosts/stream?token={full}").status_code == 401
+        assert client.post("/api/v1/hosts/stream/token").status_code == 401
+
+
+def test_create_app_loads_host_data(tmp_path, monkeypatch):
+    monkeypatch.setattr(server, "DB_PATH", tmp_path / "data.db")
+    monkeypatch.setattr(server, "DATA_JSON", tmp_path / "data.json")
+    monkeypatch.setattr(server, "DATA_SNAPSHOT", tmp_path / "data.snap")
+    monkeypatch.setattr(server, "configure_logging", lambda: None)
+    (tmp_path / "data.json").write_text('[{"hostname": "alpha"}]')
+    assert server.create_app() is server.app
+    with db.connect(server.DB_PATH) as conn:
+        assert conn.execute("SELECT hostname FROM hosts").fetchall() == [("alpha",)]
@@ -0,0 +1,117 @@
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from autoconfig import collect_and_visualize as cav
+from autoconfig import db, server, snapshot
+
+HOSTS = [
+    {"hostname": "web2", "users": ["root:x:0:0::/root:/bin/sh"]},
+    {"hostname": "db1", "cpu_load": "0.10 0.20 0.30 1/1 1"},
+    {"users": []},
+    {"hostname": "web10"},
+    {"hostname": "db1", "cpu_load": "0.50 0.20 0.30 1/1 1"},
+]
+
+
+def _write(path, hosts=HOSTS):
+    with snapshot.SnapshotWriter(path) as writer:
+        assert list(writer.tee(iter(hosts))) == hosts
+
+
+def test_snapshot_round_trip(tmp_path):
+    path = tmp_path / "data.snap"
+    _write(path)
+    with snapshot.Snapshot(path) as snap:
+        assert len(snap) == 3
+        assert snap.hostnames() == ["db1", "web10", "web2"]
+        assert snap.get("db1") == HOSTS[4]
+        assert snap.get("web2") == HOSTS[0]
+        assert snap.get("missing") is None
+        assert "web10" in snap and "web1" not in snap
+        record = snap.record("web2")
+        assert (record.data, record.digest) == db.serialize_host(HOSTS[0])
+        assert [r.hostname for r in snap] == ["db1", "web10", "web2"]
+
+
+def test_empty_snapshot(tmp_path):
+    path = tmp_path / "data.snap"
+    _write(path, [])
+    with snapshot.Snapshot(path) as snap:
+        assert len(snap) == 0
+        assert snap.get("a") is None
+
+
+def test_failed_write_keeps_previous_snapshot(tmp_path):
+    path = tmp_path / "data.snap"
+    _write(path)
+    with pytest.raises(RuntimeError):
+        with snapshot.SnapshotWriter(path) as writer:
+            writer.write({"hostname": "new"})
+            raise RuntimeError
+    with snapshot.Snapshot(path) as snap:
+        assert "new" not in snap
+    assert [p.name for p in tmp_path.iterdir()] == ["data.snap"]
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "data.json"
+    path.write_text(json.dumps(HOSTS))
+    with pytest.raises(ValueError):
+        snapshot.Snapshot(path)
+
+
+def _setup_server(tmp_path, monkeypatch):
+    monkeypatch.setattr(server, "DB_PATH", tmp_path / "data.db")
+    monkeypatch.setattr(server, "DATA_JSON", tmp_path / "data.json")
+    monkeypatch.setattr(server, "DATA_SNAPSHOT", tmp_path / "data.snap")
+    server.init_db()
+
+
+def test_load_data_prefers_current_snapshot(tmp_path, monkeypatch):
+    _setup_server(tmp_path, monkeypatch)
+    (tmp_path / "data.json").write_text(json.dumps([{"hostname": "json-only"}]))
+    _write(tmp_path / "data.snap")
+    assert server.load_data() == {"added": 3, "changed": 0, "removed": 0}
+    assert server.load_data() == {"added": 0, "changed": 0, "removed": 0}
+    assert sorted(h["hostname"] for h in server.get_hosts()) == [
+        "db1",
+        "web10",
+        "web2",
+    ]
+
+    # A data.json written after the snapshot wins.
+    os.utime(tmp_path / "data.snap", (1, 1))
+    assert server.load_data() == {"added": 1, "changed": 0, "removed": 3}
+
+
+def test_reload_single_host_from_snapshot(tmp_path, monkeypatch):
+    _setup_server(tmp_path, monkeypatch)
+    monkeypatch.setattr(server, "JWT_SECRET", "secret")
+    _write(tmp_path / "data.snap")
+    headers = {"Authorization": f"Bearer {server.create_token('admin', 'admin')}"}
+    with server.app.test_client() as client:
+        resp = client.post("/api/reload?host=web2,missing", headers=headers)
+    assert resp.get_json() == {
+        "status": "reloaded",
+        "added": 1,
+        "changed": 0,
+        "removed": 0,
+    }
+    assert [h["hostname"] for h in server.get_hosts()] == ["web2"]
+
+
+def test_generate_site_writes_snapshot(tmp_path, monkeypatch):
+    monkeypatch.setattr(cav, "RESULTS_DIR", tmp_path)
+    monkeypatch.setattr(cav, "DB_PATH", tmp_path / "data.db")
+    monkeypatch.setattr(cav, "SNAPSHOT", True)
+    cav.generate_site(iter(HOSTS[:2]))
+    snap_path = tmp_path / snapshot.SNAPSHOT_FILE
+    assert snap_path.stat().st_mtime >= (tmp_path / "data.json").stat().st_mtime
+    with snapshot.Snapshot(snap_path) as snap:
+        assert snap.get("web2") == HOSTS[0]
@@ -0,0 +1,141 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from autoconfig import collect_and_visualize as cav
+from autoconfig import ssh
+
+FAKE_COMMANDS = {
+    "hostname": "echo remotehost",
+    "users": "printf 'root:x:0:0::/root:/bin/sh\\ndeploy:x:1000:1000::/:/bin/sh\\n'",
+    "ports": "no-such-command-autoconfig",
+    "disk": "printf '50G 20G 30G 40%%'",
+    "memory": "echo 'Mem: 100 50 50 0 0 50'",
+    "cpu_load": "echo '0.10 0.20 0.30 1/100 42'",
+    "net": "printf 'lo: 1 2\\neth0: 3 4\\n'",
+    "sensors": "exit 1",
+}
+
+
+@pytest.fixture
+def local_probe(monkeypatch):
+    """Run probe scripts with the local shell instead of over SSH."""
+    calls = []
+
+    def local_command(host, *command, timings=None, timeout=None):
+        calls.append(host)
+        return ["sh", "-s"]
+
+    monkeypatch.setattr(ssh, "PROBE_COMMANDS", FAKE_COMMANDS)
+    monkeypatch.setattr(ssh, "ssh_command", local_command)
+    return calls
+
+
+def test_run_probe_splits_sections(local_probe):
+    outputs = ssh.run_probe("remotehost")
+    assert local_probe == ["remotehost"]
+    assert outputs["hostname"] == "remotehost\n"
+    assert outputs["users"].splitlines()[1].startswith("deploy:")
+    assert outputs["disk"] == "50G 20G 30G 40%\n"
+    assert outputs["ports"] == ""
+    assert outputs["sensors"] == ""
+
+
+def test_run_probe_fails_on_required_section(local_probe, monkeypatch):
+    monkeypatch.setitem(FAKE_COMMANDS, "hostname", "exit 3")
+    with pytest.raises(subprocess.CalledProcessError) as exc:
+        ssh.run_probe("remotehost")
+    assert exc.value.returncode == 3
+
+
+def test_collect_remote_facts_uses_one_session(local_probe, tmp_path, monkeypatch):
+    monkeypatch.setattr(cav, "RESULTS_DIR", tmp_path)
+    monkeypatch.setattr(cav, "SSH_MODE", "probe")
+    data = cav.collect_local_facts("remotehost")
+    assert local_probe == ["remotehost"]
+    with open(tmp_path / "facts_remotehost.json") as f:
+        assert json.load(f) == data
+    assert data["net"] == ["lo: 1 2", "eth0: 3 4"]
+    assert data["cpu_load"] == "0.10 0.20 0.30 1/100 42"
+    assert data["ports"] == []
+
+
+class FakeSSH:
+    """Record ``ssh`` invocations and track master sockets by host."""
+
+    def __init__(self):
+        self.calls = []
+        self.masters = set()
+
+    def __call__(self, cmd, **kwargs):
+        self.calls.append(cmd)
+        host = cmd[-1]
+        returncode = 0
+        if "-O" in cmd:
+            op = cmd[cmd.index("-O") + 1]
+            if op == "exit":
+                self.masters.discard(host)
+            returncode = 0 if host in self.masters else 255
+        elif "ControlMaster=yes" in cmd:
+            self.masters.add(host)
+        return subprocess.CompletedProcess(cmd, returncode, b"", b"")
+
+    def started(self):
+        return [c[-1] for c in self.calls if "ControlMaster=yes" in c]
+
+
+def test_master_pool_reuses_and_caps_masters(tmp_path, monkeypatch):
+    fake = FakeSSH()
+    monkeypatch.setattr(ssh.subprocess, "run", fake)
+    pool = ssh.MasterPool(tmp_path / "cm", max_masters=2, persist=60)
+
+    assert pool.ensure("a") >= 0
+    pool.ensure("a")
+    assert fake.started() == ["a"]
+    assert "ControlPersist=60" in fake.calls[-1]
+
+    pool.ensure("b")
+    pool.ensure("c")
+    assert fake.masters == {"b", "c"}
+    assert len(pool) == 2
+
+    # A later run in a fresh pool reuses the masters that are still open.
+    other = ssh.MasterPool(tmp_path / "cm", max_masters=2)
+    assert other.ensure("c") == 0.0
+    assert fake.started() == ["a", "b", "c"]
+
+
+def test_hung_master_check_starts_a_new_master(tmp_path, monkeypatch):
+    fake = FakeSSH()
+
+    def run(cmd, **kwargs):
+        if "-O" in cmd:
+            assert kwargs["timeout"] == ssh.CONTROL_TIMEOUT_SECONDS
+            raise subprocess.TimeoutExpired(cmd, kwargs["timeout"])
+        return fake(cmd, **kwargs)
+
+    monkeypatch.setattr(ssh.subprocess, "run", run)
+    pool = ssh.MasterPool(tmp_path / "cm")
+    assert pool.ensure("a") >= 0
+    assert fake.started() == ["a"]
+    pool.close("a")
+
+
+def test_ssh_command_uses_master(tmp_path, monkeypatch):
+    fake = FakeSSH()
+    monkeypatch.setattr(ssh.subprocess, "run", fake)
+    monkeypatch.setattr(ssh, "MASTERS", ssh.MasterPool(tmp_path))
+    timings = {}
+    cmd = ssh.ssh_command("web1", "sh", "-s", timings=timings)
+    assert cmd[0] == "ssh" and cmd[-3:] == ["web1", "sh", "-s"]
+    assert "ControlMaster=no" in cmd
+    assert f"ControlPath={tmp_path / '%C'}" in cmd
+    assert "handshake" in timings
+
+    monkeypatch.setattr(ssh, "MASTERS", None)
+    assert ssh.ssh_command("web1", "hostname") == ["ssh", "web1", "hostname"]
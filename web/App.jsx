@@ -1,5 +1,20 @@
 import React, { useState, useEffect, useCallback } from 'react';
 import Charts from './Charts';
+import {
+  load1,
+  formatLoad,
+  formatMemory,
+  formatDisk,
+  listPorts,
+  listInterfaces,
+} from './facts';
+
+function authHeaders() {
+  const token = localStorage.getItem('token');
+  return token ? { Authorization: `Bearer ${token}` } : {};
+}
+
+class Unauthorized extends Error {}
 
 function fetchData(search, sort, order) {
   const params = new URLSearchParams();
@@ -7,10 +22,81 @@ function fetchData(search, sort, order) {
   if (sort) params.set('sort', sort);
   if (order) params.set('order', order);
   const url = '/api/hosts?' + params.toString();
-  return fetch(url).then(r => r.json());
+  return fetch(url, { headers: authHeaders() }).then(r => {
+    if (r.status === 401) throw new Unauthorized();
+    return r.json();
+  });
+}
+
+// Stores the token of a successful login for authHeaders().
+function login(username, password) {
+  return fetch('/auth/login', {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ username, password }),
+  })
+    .then(r => {
+      if (!r.ok) throw new Error('Invalid username or password');
+      return r.json();
+    })
+    .then(({ token }) => localStorage.setItem('token', token));
+}
+
+function LoginForm({ onLogin }) {
+  const [username, setUsername] = useState('');
+  const [password, setPassword] = useState('');
+  const [error, setError] = useState(null);
+
+  const submit = e => {
+    e.preventDefault();
+    login(username, password).then(onLogin, err => setError(err.message));
+  };
+
+  return (
+    <form className="col-md-4" onSubmit={submit}>
+      <h1 className="mb-4">Sign in</h1>
+      {error && <div className="alert alert-danger">{error}</div>}
+      <input
+        className="form-control mb-2"
+        placeholder="Username"
+        autoComplete="username"
+        value={username}
+        onChange={e => setUsername(e.target.value)}
+      />
+      <input
+        className="form-control mb-2"
+        type="password"
+        placeholder="Password"
+        autoComplete="current-password"
+        value={password}
+        onChange={e => setPassword(e.target.value)}
+      />
+      <button className="btn btn-primary" type="submit">Sign in</button>
+    </form>
+  );
+}
+
+// EventSource cannot send an Authorization header, so the stream is opened
+// with a short-lived token passed in the URL.
+function openStream() {
+  return fetch('/api/v1/hosts/stream/token', {
+    method: 'POST',
+    headers: authHeaders(),
+  })
+    .then(r => {
+      if (!r.ok) throw new Error(`stream token: ${r.status}`);
+      return r.json();
+    })
+    .then(
+      ({ token }) =>
+        new EventSource(
+          '/api/v1/hosts/stream?token=' + encodeURIComponent(token)
+        )
+    );
 }
 
 export default function App() {
+  const [authed, setAuthed] = useState(() => !!localStorage.getItem('token'));
   const [data, setData] = useState([]);
   const [search, setSearch] = useState('');
   const [cpuFilter, setCpuFilter] = useState('');
@@ -18,14 +104,46 @@ export default function App() {
   const [sortDir, setSortDir] = useState('asc');
 
   const load = useCallback(() => {
-    fetchData(search, sortKey, sortDir).then(setData);
+    fetchData(search, sortKey, sortDir).then(setData, err => {
+      // An expired or revoked token: ask for the credentials again.
+      if (err instanceof Unauthorized) {
+        localStorage.removeItem('token');
+        setAuthed(false);
+      }
+    });
   }, [search, sortKey, sortDir]);
 
   useEffect(() => {
+    if (!authed) return undefined;
     load();
-    const t = setInterval(load, 30000);
-    return () => clearInterval(t);
-  }, [load]);
+    let source = null;
+    let timer = null;
+    let closed = false;
+    // Without a working stream, poll instead.
+    const poll = () => {
+      if (source) source.close();
+      if (!timer && !closed) timer = setInterval(load, 30000);
+    };
+    if (typeof EventSource === 'undefined') {
+      poll();
+    } else {
+      openStream().then(s => {
+        if (closed) {
+          s.close();
+          return;
+        }
+        source = s;
+        // Refetch only when the server reports new host data.
+        source.addEventListener('hosts', load);
+        source.onerror = poll;
+      }, poll);
+    }
+    return () => {
+      closed = true;
+      if (source) source.close();
+      clearInterval(timer);
+    };
+  }, [load, authed]);
 
   const handleSort = key => {
     if (sortKey === key) {
@@ -39,9 +157,11 @@ export default function App() {
   const filtered = data
     .filter(h => h.hostname.toLowerCase().includes(search.toLowerCase()))
     .filter(h =>
-      cpuFilter ? parseFloat(h.cpu_load) <= parseFloat(cpuFilter) : true
+      cpuFilter ? load1(h) <= parseFloat(cpuFilter) : true
     );
 
+  if (!authed) return <LoginForm onLogin={() => setAuthed(true)} />;
+
   return (
     <div>
       <h1 className="mb-4">Collected System Facts</h1>
@@ -82,17 +202,17 @@ export default function App() {
               {filtered.map((h, i) => (
                 <tr key={i}>
                   <td>{h.hostname}</td>
-                  <td>{h.cpu_load}</td>
-                  <td>{h.memory}</td>
-                  <td>{h.disk}</td>
+                  <td>{formatLoad(h)}</td>
+                  <td>{formatMemory(h)}</td>
+                  <td>{formatDisk(h)}</td>
                   <td>
                     <ul className="mb-0">{h.users.map((u, j) => <li key={j}>{u}</li>)}</ul>
                   </td>
                   <td>
-                    <ul className="mb-0">{h.ports.map((p, j) => <li key={j}>{p}</li>)}</ul>
+                    <ul className="mb-0">{listPorts(h).map((p, j) => <li key={j}>{p}</li>)}</ul>
                   </td>
                   <td>
-                    <ul className="mb-0">{h.net.map((n, j) => <li key={j}>{n}</li>)}</ul>
+                    <ul className="mb-0">{listInterfaces(h).map((n, j) => <li key={j}>{n}</li>)}</ul>
                   </td>
                   <td>
                     <ul className="mb-0">{h.sensors.map((s, j) => <li key={j}>{s}</li>)}</ul>
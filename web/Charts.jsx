@@ -1,5 +1,6 @@
 import React, { useRef, useEffect } from 'react';
 import Chart from 'chart.js/auto';
+import { load1 } from './facts';
 
 export default function Charts({ hosts }) {
   const cpuChartRef = useRef(null);
@@ -8,8 +9,12 @@ export default function Charts({ hosts }) {
   useEffect(() => {
     if (!hosts) return;
     const labels = hosts.map(h => h.hostname);
-    const cpuData = hosts.map(h => parseFloat(String(h.cpu_load).split(' ')[0]) || 0);
+    const cpuData = hosts.map(h => load1(h) || 0);
     const memData = hosts.map(h => {
+      if (h.memory_bytes) {
+        const { total, used } = h.memory_bytes;
+        return total ? (used / total * 100).toFixed(2) : 0;
+      }
       const m = String(h.memory).match(/Mem:\s+(\d+)\s+(\d+)/);
       if (m) {
         const total = parseFloat(m[1]);
@@ -0,0 +1,44 @@
+// Typed fields are added by the collector; older documents only carry the
+// raw command output.
+export function load1(h) {
+  return h.load ? h.load[0] : parseFloat(h.cpu_load);
+}
+
+export function formatBytes(n) {
+  if (n == null) return '';
+  const units = ['B', 'KiB', 'MiB', 'GiB', 'TiB'];
+  let i = 0;
+  while (n >= 1024 && i < units.length - 1) {
+    n /= 1024;
+    i++;
+  }
+  return `${n.toFixed(i ? 1 : 0)} ${units[i]}`;
+}
+
+export function formatLoad(h) {
+  return h.load ? h.load.filter(v => v != null).join(' ') : h.cpu_load;
+}
+
+export function formatMemory(h) {
+  const m = h.memory_bytes;
+  return m ? `${formatBytes(m.used)} / ${formatBytes(m.total)}` : h.memory;
+}
+
+export function formatDisk(h) {
+  const d = h.disk_usage;
+  return d ? `${d.used_pct}% of ${formatBytes(d.total)}` : h.disk;
+}
+
+export function listPorts(h) {
+  return h.sockets
+    ? h.sockets.map(s => `${s.proto} ${s.address}:${s.port ?? '*'}`)
+    : h.ports || [];
+}
+
+export function listInterfaces(h) {
+  return h.interfaces
+    ? Object.entries(h.interfaces).map(
+        ([name, c]) => `${name}: rx ${formatBytes(c.rx_bytes)}, tx ${formatBytes(c.tx_bytes)}`
+      )
+    : h.net || [];
+}